@@ -39,15 +39,23 @@ Key features include:
 
 from __future__ import annotations
 
-import re
-from typing import Any
+import copy
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
+from functools import cache, lru_cache
+from typing import Any, TypeVar
 
 import anyio
+from anyio.to_thread import run_sync
+from pydantic import BaseModel
 
 from dotpromptz.helpers import BUILTIN_HELPERS
 from dotpromptz.parse import parse_document, to_messages
-from dotpromptz.picoschema import picoschema_to_json_schema
-from dotpromptz.resolvers import resolve_json_schema, resolve_partial, resolve_tool
+from dotpromptz.picoschema import picoschema_references, picoschema_to_json_schema
+from dotpromptz.resolvers import CacheDeadline, ResolverCache, resolve_json_schema, resolve_many, supports_batches
 from dotpromptz.typing import (
     DataArgument,
     JsonSchema,
@@ -64,14 +72,98 @@ from dotpromptz.typing import (
     VariablesT,
 )
 from dotpromptz.util import remove_undefined_fields
-from handlebarrz import Context, EscapeFunction, Handlebars, HelperFn, RuntimeOptions
+from handlebarrz import (
+    CompiledRenderer,
+    Context,
+    EscapeFunction,
+    Handlebars,
+    HelperFn,
+    RuntimeOptions,
+    analyze_template,
+)
+
+# Maximum number of distinct template sources whose partial references are
+# remembered by `_identify_partials`.
+_PARTIAL_CACHE_SIZE = 1024
+
+# Default number of compiled prompts remembered by each `Dotprompt`.
+_COMPILE_CACHE_SIZE = 128
+
+# Default estimated size, in characters of template and input, from which a
+# prompt is rendered in a worker thread instead of on the event loop.
+_RENDER_OFFLOAD_THRESHOLD = 64 * 1024
+
+_T = TypeVar('_T')
+
+
+@dataclass
+class RenderStats:
+    """Time spent rendering a compiled prompt, or the variants of a `Dotprompt`.
+
+    Only the template rendering and the parsing of the result into messages
+    are timed; metadata resolution is not included.
+
+    Attributes:
+        renders: Number of completed renders.
+        offloaded: Number of those renders that ran in a worker thread.
+        total_seconds: Total time spent rendering.
+        last_seconds: Time spent by the latest render.
+    """
+
+    renders: int = 0
+    offloaded: int = 0
+    total_seconds: float = 0.0
+    last_seconds: float = 0.0
+
+
+@cache
+def _base_handlebars(escape_fn: EscapeFunction) -> Handlebars:
+    """Returns the shared template engine that `Dotprompt` instances fork.
+
+    The engine has the native built-in helpers registered and is never changed
+    afterwards, so every `Dotprompt` shares its registry until it defines its
+    own helpers or partials.
+
+    Args:
+        escape_fn: The escape function of the engine.
+
+    Returns:
+        The shared template engine.
+    """
+    handlebars = Handlebars(escape_fn=escape_fn)
+    handlebars.register_dotprompt_helpers()
+    return handlebars
 
-# Pre-compiled regex for finding partial references in handlebars templates
 
-# Since the handlebars-rust implementation doesn't expose a visitor
-# to walk the AST to find partial nodes, we're using a crude regular expression
-# to find partials.
-_PARTIAL_PATTERN = re.compile(r'{{\s*>\s*([a-zA-Z0-9_.-]+)\s*}}')
+def _metadata_fields(metadata: PromptMetadata[Any]) -> dict[str, Any]:
+    """Collect the fields of a metadata object that are not None.
+
+    The values are taken as they are, so that already validated tool
+    definitions and schemas are not dumped and validated again. Lists and
+    dicts are copied, but the objects inside them are shared, so the fields
+    must not be handed to callers as they are. A config model is converted
+    to a dict, as dumping the metadata would.
+
+    Args:
+        metadata: The metadata object, which may be a subclass such as
+            `ParsedPrompt`.
+
+    Returns:
+        The values of the fields and extra fields, by field name.
+    """
+    fields: dict[str, Any] = {}
+    for name in type(metadata).model_fields:
+        value = getattr(metadata, name)
+        if value is not None:
+            fields[name] = copy.copy(value) if isinstance(value, list | dict) else value
+    for name, value in (metadata.model_extra or {}).items():
+        if value is not None:
+            fields[name] = value
+
+    config = fields.get('config')
+    if isinstance(config, BaseModel):
+        fields['config'] = config.model_dump(exclude_none=True, by_alias=True)
+    return fields
 
 
 def _merge_metadata(
@@ -80,6 +172,9 @@ def _merge_metadata(
 ) -> PromptMetadata[ModelConfigT]:
     """Merges a single metadata object into the current one.
 
+    Both objects are already validated, so the merged object is constructed
+    from their fields without validating them again.
+
     Args:
         current: The current metadata object.
         merge: The metadata object to merge into the current one.
@@ -87,34 +182,104 @@ def _merge_metadata(
     Returns:
         The merged metadata object.
     """
-    # Convert Pydantic models to raw dicts by alias first. Skip None values.
-    merge_dict = merge.model_dump(exclude_none=True, by_alias=True)
-    current_dict = current.model_dump(exclude_none=True, by_alias=True)
+    current_fields = _metadata_fields(current)
+    merge_fields = _metadata_fields(merge)
 
     # Keep a reference to the original config.
-    original_config = current_dict.get('config', {})
-    new_config = merge_dict.get('config', {})
+    original_config = current_fields.get('config', {})
+    new_config = merge_fields.get('config', {})
 
     # Merge the new metadata.
-    current_dict.update(merge_dict)
+    current_fields.update(merge_fields)
 
     # Merge the configs and set the resulting config.
-    current_dict['config'] = {**original_config, **new_config}
+    current_fields['config'] = {**original_config, **new_config}
 
-    # Recreate the Pydantic model from the merged dict and validate it.
-    return PromptMetadata[ModelConfigT].model_validate(current_dict)
+    return PromptMetadata[ModelConfigT].model_construct(**current_fields)
 
 
-def _identify_partials(template: str) -> set[str]:
+@lru_cache(maxsize=_PARTIAL_CACHE_SIZE)
+def _identify_partials(template: str) -> frozenset[str]:
     """Identify all unique partial references in a template.
 
+    The template is parsed, so block partials are found as well, and inline
+    partials defined by the template itself are left out. Each distinct
+    source is only parsed once. Syntax errors are reported when the template
+    is rendered, so a template that fails to parse references no partials.
+
     Args:
         template: The template to scan for partial references.
 
     Returns:
-        A set of partial names referenced in the template.
+        The names of the partials referenced in the template.
     """
-    return set(_PARTIAL_PATTERN.findall(template))
+    try:
+        return frozenset(analyze_template(template)['partials'])
+    except ValueError:
+        return frozenset()
+
+
+def _estimate_size(value: Any, limit: int) -> int:
+    """Estimate how much a template context adds to the cost of a render.
+
+    Strings count their length and every other value counts one. The walk
+    stops as soon as the estimate reaches `limit`, so estimating a huge
+    context stays cheap.
+
+    Args:
+        value: The template context or a value inside it.
+        limit: The estimate at which to stop walking.
+
+    Returns:
+        The estimated size, which is at least `limit` if the walk stopped early.
+    """
+    size = 0
+    stack = [value]
+    while stack and size < limit:
+        item = stack.pop()
+        if isinstance(item, str):
+            size += len(item)
+        elif isinstance(item, dict):
+            size += 1
+            stack.extend(item.values())
+        elif isinstance(item, list | tuple):
+            size += 1
+            stack.extend(item)
+        else:
+            size += 1
+    return size
+
+
+def _render_context(data: DataArgument[VariablesT], options: PromptMetadata[ModelConfigT] | None = None) -> Context:
+    """Build the template context for rendering a prompt.
+
+    Args:
+        data: The data to be used to render the prompt.
+        options: Additional options for the prompt.
+
+    Returns:
+        The input data merged over the input defaults from the options.
+    """
+    return {
+        **((options.input.default or {}) if options and options.input else {}),
+        **(data.input if data.input is not None else {}),
+    }
+
+
+def _runtime_options(data: DataArgument[VariablesT]) -> RuntimeOptions:
+    """Build the runtime options for rendering a prompt.
+
+    Args:
+        data: The data to be used to render the prompt.
+
+    Returns:
+        Runtime options exposing the data context as `@` variables.
+    """
+    return {
+        'data': {
+            **(data.context or {}),
+        },
+    }
 
 
 class RenderFunc(PromptFunction[ModelConfigT]):
@@ -126,24 +291,65 @@ class RenderFunc(PromptFunction[ModelConfigT]):
     It exposes the prompt property to the user.
     """
 
-    def __init__(self, dotprompt: Dotprompt, handlebars: Handlebars, prompt: ParsedPrompt[ModelConfigT]):
+    def __init__(
+        self,
+        dotprompt: Dotprompt,
+        handlebars: Handlebars,
+        prompt: ParsedPrompt[ModelConfigT],
+        metadata: PromptMetadata[ModelConfigT],
+    ):
         """Initialize the renderer.
 
         Args:
             dotprompt: The Dotprompt instance.
             handlebars: The Handlebars instance.
             prompt: The parsed prompt.
+            metadata: The metadata of the prompt, with its tools and schemas
+                resolved.
         """
         self._dotprompt = dotprompt
         self._handlebars = handlebars
+        self._render_string = handlebars.compile(prompt.template)
+        self._metadata = metadata
+        self._stats = RenderStats()
 
         self.prompt = prompt
 
+    @property
+    def render_string(self) -> CompiledRenderer:
+        """The compiled template of the prompt.
+
+        Returns:
+            The compiled template function.
+        """
+        return self._render_string
+
+    @property
+    def metadata(self) -> PromptMetadata[ModelConfigT]:
+        """The metadata of the prompt, resolved when it was compiled.
+
+        Returns:
+            The resolved metadata, which must not be modified.
+        """
+        return self._metadata
+
+    @property
+    def stats(self) -> RenderStats:
+        """The time spent rendering the prompt so far.
+
+        Returns:
+            A copy of the render statistics.
+        """
+        return replace(self._stats)
+
     async def __call__(
         self, data: DataArgument[VariablesT], options: PromptMetadata[ModelConfigT] | None = None
     ) -> RenderedPrompt[ModelConfigT]:
         """Render the prompt.
 
+        Large renders run in a worker thread so that they do not block the
+        event loop; see the `render_offload_threshold` of `Dotprompt`.
+
         Args:
             data: The data to be used to render the prompt.
             options: Additional options for the prompt.
@@ -151,32 +357,45 @@ class RenderFunc(PromptFunction[ModelConfigT]):
         Returns:
             The rendered prompt.
         """
-        merged_metadata: PromptMetadata[ModelConfigT] = await self._dotprompt.render_metadata(self.prompt, options)
+        merged_metadata: PromptMetadata[ModelConfigT] = await self._dotprompt._overlay_metadata(
+            self.prompt, self._metadata, options
+        )
+        context = _render_context(data, options)
+        runtime_options = _runtime_options(data)
 
-        # Prepare input data, merging defaults from options if available.
-        context: Context = {
-            **((options.input.default or {}) if options and options.input else {}),
-            **(data.input if data.input is not None else {}),
-        }
+        def render() -> RenderedPrompt[ModelConfigT]:
+            rendered_string = self._render_string(context, runtime_options)
+            return self.to_rendered_prompt(merged_metadata, rendered_string, data)
 
-        # Prepare runtime options.
-        runtime_options: RuntimeOptions = {
-            'data': {
-                **(data.context or {}),
-            },
-        }
+        return await self._dotprompt._run_render(render, len(self.prompt.template), context, self._stats)
 
-        # Render the string.
-        render_string = self._handlebars.compile(self.prompt.template)
-        rendered_string = render_string(context, runtime_options)
+    def to_rendered_prompt(
+        self,
+        metadata: PromptMetadata[ModelConfigT],
+        rendered_string: str,
+        data: DataArgument[VariablesT],
+    ) -> RenderedPrompt[ModelConfigT]:
+        """Build the rendered prompt from a rendered template string.
 
+        Args:
+            metadata: The merged metadata of the prompt.
+            rendered_string: The rendered template.
+            data: The data the template was rendered with.
+
+        Returns:
+            The rendered prompt.
+        """
         # Parse the rendered string into messages.
         messages = to_messages(rendered_string, data)
 
-        # Construct and return the final RenderedPrompt.
+        # Construct and return the final RenderedPrompt. The metadata is
+        # dumped and validated again so that the rendered prompt owns its
+        # schemas and tool definitions: the metadata is cached with the
+        # compiled prompt, and changes made by the caller must not leak into
+        # later renders. This is cheaper than copying the models in Python.
         return RenderedPrompt[ModelConfigT](
             # Spread the metadata fields into the RenderedPrompt constructor.
-            **merged_metadata.model_dump(exclude_none=True, by_alias=True),
+            **metadata.model_dump(exclude_none=True, by_alias=True),
             messages=messages,
         )
 
@@ -196,6 +415,9 @@ class Dotprompt:
         schema_resolver: SchemaResolver | None = None,
         partial_resolver: PartialResolver | None = None,
         escape_fn: EscapeFunction = EscapeFunction.NO_ESCAPE,
+        render_offload_threshold: int | None = _RENDER_OFFLOAD_THRESHOLD,
+        compile_cache_size: int = _COMPILE_CACHE_SIZE,
+        resolver_cache: ResolverCache | None = None,
     ) -> None:
         """Initialize Dotprompt with a Handlebars template.
 
@@ -209,9 +431,22 @@ class Dotprompt:
             schemas: Provide a static mapping of schema names to their JSON schema definitions.
             schema_resolver: resolver for schema names to JSON schema definitions.
             partial_resolver: resolver for partial names to their content.
-            escape_fn: escape function to use for the template.
+            escape_fn: escape function to use for the template; use
+                `EscapeFunction.MARKER_ESCAPE` to keep variables from injecting
+                role, history or media markers.
+            render_offload_threshold: Estimated size, in characters of
+                template and input, from which prompts are rendered in a worker
+                thread instead of on the event loop. `None` renders every prompt
+                on the event loop and 0 offloads every render.
+            compile_cache_size: Maximum number of compiled prompts to keep, so
+                that rendering the same source again skips parsing and
+                compiling it. 0 disables the cache.
+            resolver_cache: Cache for the results of the tool, schema and
+                partial resolvers, shared with forks of this instance.
+                Cached compiled prompts expire with the earliest of the
+                results they were compiled with.
         """
-        self._handlebars: Handlebars = Handlebars(escape_fn=escape_fn)
+        self._handlebars: Handlebars = _base_handlebars(escape_fn).fork()
 
         self._known_helpers: dict[str, bool] = {}
         self._default_model: str | None = default_model
@@ -224,13 +459,48 @@ class Dotprompt:
         self._schema_resolver: SchemaResolver | None = schema_resolver
         self._partial_resolver: PartialResolver | None = partial_resolver
         self._store: PromptStore | None = None
-
-        self._register_initial_helpers(
-            builtin_helpers=BUILTIN_HELPERS,
-            custom_helpers=helpers,
+        self._render_offload_threshold: int | None = render_offload_threshold
+        self._compile_cache_size: int = compile_cache_size
+        # Compiled prompts with the deadline of the resolver results they use.
+        self._compiled: OrderedDict[tuple[str, str | None], tuple[RenderFunc[Any], CacheDeadline | None]] = (
+            OrderedDict()
         )
+        self._compiled_generation: int = 0
+        self._resolver_cache: ResolverCache | None = resolver_cache
+        self._variant_stats: RenderStats = RenderStats()
+
+        self._register_initial_helpers(custom_helpers=helpers)
         self._register_initial_partials(partials)
 
+    def fork(self) -> Dotprompt:
+        """Create a Dotprompt that starts out with the configuration of this one.
+
+        The new instance has the same helpers, partials, tools, schemas,
+        resolvers, store and model configuration. Helpers and partials are
+        shared with this instance copy-on-write, so a base instance holding
+        the common helpers and partials can be forked cheaply, e.g. once per
+        tenant. Helpers, partials, tools and model configurations defined on
+        either instance afterwards are not visible to the other.
+
+        Returns:
+            The new Dotprompt instance.
+        """
+        forked = copy.copy(self)
+        forked._handlebars = self._handlebars.fork()
+        forked._known_helpers = dict(self._known_helpers)
+        forked._model_configs = dict(self._model_configs)
+        forked._tools = dict(self._tools)
+        forked._schemas = dict(self._schemas)
+        # Compiled prompts render with the engine of this instance.
+        forked._compiled = OrderedDict()
+        forked._variant_stats = RenderStats()
+        return forked
+
+    def _invalidate_compiled(self) -> None:
+        """Forget the compiled prompts after the helpers, partials or tools changed."""
+        self._compiled.clear()
+        self._compiled_generation += 1
+
     def define_helper(self, name: str, fn: HelperFn) -> Dotprompt:
         """Define a helper function for the template.
 
@@ -244,6 +514,7 @@ class Dotprompt:
         """
         self._handlebars.register_helper(name, fn)
         self._known_helpers[name] = True
+        self._invalidate_compiled()
         return self
 
     def define_partial(self, name: str, source: str) -> Dotprompt:
@@ -257,6 +528,7 @@ class Dotprompt:
             The Dotprompt instance.
         """
         self._handlebars.register_partial(name, source)
+        self._invalidate_compiled()
         return self
 
     def define_tool(self, definition: ToolDefinition) -> Dotprompt:
@@ -269,6 +541,7 @@ class Dotprompt:
             The Dotprompt instance.
         """
         self._tools[definition.name] = definition
+        self._invalidate_compiled()
         return self
 
     def parse(self, source: str) -> ParsedPrompt[ModelConfigT]:
@@ -298,11 +571,128 @@ class Dotprompt:
         renderer: PromptFunction[ModelConfigT] = await self.compile(source)
         return await renderer(data, options)
 
+    @property
+    def variant_stats(self) -> RenderStats:
+        """The time spent by `render_variants` on this instance so far.
+
+        Each call counts as one render, however many variants it renders.
+
+        Returns:
+            A copy of the render statistics.
+        """
+        return replace(self._variant_stats)
+
+    async def render_variants(
+        self,
+        variants: Sequence[str | RenderFunc[ModelConfigT]],
+        data: DataArgument[VariablesT],
+        options: PromptMetadata[ModelConfigT] | None = None,
+    ) -> list[RenderedPrompt[ModelConfigT]]:
+        """Render several prompts against the same data.
+
+        The template context is built once and shared by all the variants, and
+        the templates are rendered in a single call into the template engine.
+        This is useful for comparing many variants of a prompt on one input.
+
+        Args:
+            variants: Prompt sources or functions returned by `compile`.
+                Functions compiled by other instances are rendered with
+                their own template engine.
+            data: The data to be used to render every prompt.
+            options: Additional options for the prompts.
+
+        The time spent is recorded in `variant_stats`, not in the `stats` of
+        the compiled functions.
+
+        Returns:
+            The rendered prompts, in the same order as `variants`.
+        """
+        renderers: list[RenderFunc[ModelConfigT]] = []
+        for variant in variants:
+            if isinstance(variant, RenderFunc):
+                renderers.append(variant)
+            else:
+                renderers.append(await self.compile(variant))
+
+        metadata: list[PromptMetadata[ModelConfigT]] = [
+            await self._overlay_metadata(renderer.prompt, renderer.metadata, options) for renderer in renderers
+        ]
+        context = _render_context(data, options)
+        runtime_options = _runtime_options(data)
+
+        def render() -> list[RenderedPrompt[ModelConfigT]]:
+            rendered_strings = self._handlebars.render_variants(
+                [renderer.render_string for renderer in renderers],
+                context,
+                runtime_options,
+            )
+            return [
+                renderer.to_rendered_prompt(meta, rendered_string, data)
+                for renderer, meta, rendered_string in zip(renderers, metadata, rendered_strings, strict=True)
+            ]
+
+        # Every variant renders the shared context, so the template sizes alone
+        # do not account for the cost.
+        template_size = sum(len(renderer.prompt.template) for renderer in renderers)
+        scale = max(len(renderers), 1)
+        # The variants are not timed individually.
+        return await self._run_render(render, template_size, context, self._variant_stats, scale)
+
+    async def _run_render(
+        self,
+        render: Callable[[], _T],
+        template_size: int,
+        context: Context,
+        stats: RenderStats,
+        scale: int = 1,
+    ) -> _T:
+        """Run a render, in a worker thread if it is estimated to be large.
+
+        The template engine releases the GIL while rendering templates that do
+        not use Python helpers, so offloaded renders then run in parallel
+        with the event loop.
+
+        Args:
+            render: Renders the prompt.
+            template_size: The length of the rendered templates.
+            context: The template context.
+            stats: The statistics to record the render in.
+            scale: The number of times the context is rendered.
+
+        Returns:
+            The result of `render`.
+        """
+        threshold = self._render_offload_threshold
+        offload = False
+        if threshold is not None:
+            remaining = threshold - template_size
+            offload = remaining <= 0 or _estimate_size(context, remaining) * scale >= remaining
+
+        start = time.perf_counter()
+        result = await run_sync(render) if offload else render()
+        elapsed = time.perf_counter() - start
+
+        stats.renders += 1
+        stats.offloaded += int(offload)
+        stats.total_seconds += elapsed
+        stats.last_seconds = elapsed
+        return result
+
     async def compile(
         self, source: str, additional_metadata: PromptMetadata[ModelConfigT] | None = None
-    ) -> PromptFunction[ModelConfigT]:
+    ) -> RenderFunc[ModelConfigT]:
         """Compile a prompt.
 
+        The metadata of the prompt is resolved here, including its tools and
+        schemas, so rendering only has to apply the options of each call.
+        Prompts compiled from a source string are cached by source and
+        additional metadata until helpers, partials or tools are defined on
+        this instance, so compiling the same source again returns the same
+        function. With a resolver cache, a cached prompt is also compiled
+        again once one of the tools or schemas it was compiled with expires
+        from the resolver cache. Resolved partials stay registered with the
+        template engine, so they are not resolved again.
+
         Args:
             source: The source code for the prompt.
             additional_metadata: Additional metadata to be used to render the prompt.
@@ -310,6 +700,23 @@ class Dotprompt:
         Returns:
             A function that can be used to render the prompt.
         """
+        key: tuple[str, str | None] | None = None
+        if isinstance(source, str) and self._compile_cache_size > 0:
+            key = (
+                source,
+                additional_metadata.model_dump_json(exclude_none=True, by_alias=True)
+                if additional_metadata is not None
+                else None,
+            )
+            cached = self._compiled.get(key)
+            if cached is not None:
+                cached_renderer, deadline = cached
+                if deadline is None or not deadline.passed():
+                    self._compiled.move_to_end(key)
+                    return cached_renderer
+                del self._compiled[key]
+        generation = self._compiled_generation
+
         prompt: ParsedPrompt[ModelConfigT] = self.parse(source) if isinstance(source, str) else source
         if additional_metadata is not None:
             prompt = prompt.model_copy(
@@ -317,9 +724,20 @@ class Dotprompt:
                 update=additional_metadata.model_dump(exclude_none=True, by_alias=True),
             )
 
-        # Resolve partials before compiling.
-        await self._resolve_partials(prompt.template)
-        return RenderFunc(self, self._handlebars, prompt)
+        tracking = self._resolver_cache.track_expiry() if self._resolver_cache is not None else nullcontext()
+        with tracking as deadline:
+            # Resolve partials before compiling.
+            await self._resolve_partials(prompt.template)
+            metadata = await self.render_metadata(prompt)
+        renderer = RenderFunc(self, self._handlebars, prompt, metadata)
+
+        # Skip caching if the helpers, partials or tools changed meanwhile, or
+        # if a resolver result it uses already expired.
+        if key is not None and generation == self._compiled_generation and not (deadline and deadline.passed()):
+            self._compiled[key] = (renderer, deadline)
+            if len(self._compiled) > self._compile_cache_size:
+                self._compiled.popitem(last=False)
+        return renderer
 
     async def render_metadata(
         self,
@@ -338,7 +756,7 @@ class Dotprompt:
         prompt = self.parse(source) if isinstance(source, str) else source
 
         default_model = prompt.model or self._default_model
-        model = additional_metadata.model if additional_metadata else default_model
+        model = (additional_metadata.model if additional_metadata else None) or default_model
 
         config: ModelConfigT | None = None
         if model is not None and self._model_configs.get(model) is not None:
@@ -354,6 +772,37 @@ class Dotprompt:
             additional_metadata,
         )
 
+    async def _overlay_metadata(
+        self,
+        prompt: ParsedPrompt[ModelConfigT],
+        resolved: PromptMetadata[ModelConfigT],
+        options: PromptMetadata[ModelConfigT] | None,
+    ) -> PromptMetadata[ModelConfigT]:
+        """Apply the options of a render to metadata resolved at compile time.
+
+        The result is the same as `render_metadata(prompt, options)`, but only
+        the schemas of the options are resolved. Options that change the tools
+        or select another model need the prompt metadata resolved again.
+
+        Args:
+            prompt: The compiled prompt.
+            resolved: The metadata of the prompt, as returned by
+                `render_metadata(prompt)`.
+            options: Additional options for the prompt.
+
+        Returns:
+            The metadata of the render.
+        """
+        if options is None:
+            return resolved
+
+        changes_tools = options.tools is not None or options.tool_defs is not None
+        changes_model = options.model is not None and options.model != (prompt.model or self._default_model)
+        if changes_tools or changes_model:
+            return await self.render_metadata(prompt, options)
+
+        return _merge_metadata(resolved, await self._render_picoschema(options))
+
     async def _resolve_metadata(
         self, base: PromptMetadata[ModelConfigT], *merges: PromptMetadata[ModelConfigT] | None
     ) -> PromptMetadata[ModelConfigT]:
@@ -400,19 +849,23 @@ class Dotprompt:
             return meta
 
         new_meta = meta.model_copy(deep=True)
+        schema_resolver = await self._prefetch_schemas(
+            meta.input.schema if meta.input is not None else None,
+            meta.output.schema if meta.output is not None else None,
+        )
 
         async def _process_input_schema(schema_to_process: Any) -> None:
             if new_meta.input is not None:
                 new_meta.input.schema = await picoschema_to_json_schema(
                     schema_to_process,
-                    self._wrapped_schema_resolver,
+                    schema_resolver,
                 )
 
         async def _process_output_schema(schema_to_process: Any) -> None:
             if new_meta.output is not None:
                 new_meta.output.schema = await picoschema_to_json_schema(
                     schema_to_process,
-                    self._wrapped_schema_resolver,
+                    schema_resolver,
                 )
 
         async with anyio.create_task_group() as tg:
@@ -425,6 +878,33 @@ class Dotprompt:
 
         return new_meta
 
+    async def _prefetch_schemas(self, *schemas: Any) -> SchemaResolver:
+        """Resolve the schemas named by Picoschema definitions in one batch.
+
+        Only schema resolvers that support batches are called up front; other
+        resolvers are called for each name as the definitions are converted.
+
+        Args:
+            schemas: The Picoschema definitions.
+
+        Returns:
+            A schema resolver that answers from the prefetched schemas first.
+        """
+        if not supports_batches(self._schema_resolver):
+            return self._wrapped_schema_resolver
+
+        names = set().union(*(picoschema_references(schema) for schema in schemas)) - self._schemas.keys()
+        prefetched: dict[str, JsonSchema] = await resolve_many(
+            sorted(names), 'schema', self._schema_resolver, self._resolver_cache, missing_ok=True
+        )
+
+        async def schema_resolver(name: str) -> JsonSchema | None:
+            if name in prefetched:
+                return prefetched[name]
+            return await self._wrapped_schema_resolver(name)
+
+        return schema_resolver
+
     async def _wrapped_schema_resolver(self, name: str) -> JsonSchema | None:
         """Resolve a schema from either instance local mapping or the resolver.
 
@@ -440,8 +920,7 @@ class Dotprompt:
         if self._schema_resolver is None:
             return None
 
-        # TODO(#498): Should we cache the resolved schema in self._schemas?
-        return await resolve_json_schema(name, self._schema_resolver)
+        return await resolve_json_schema(name, self._schema_resolver, self._resolver_cache)
 
     async def _resolve_tools(self, metadata: PromptMetadata[ModelConfigT]) -> PromptMetadata[ModelConfigT]:
         """Resolve all tools in a prompt.
@@ -484,28 +963,11 @@ class Dotprompt:
                 # Unregistered tool.
                 unregistered_names.append(name)
 
-        # Resolve all the tools to be resolved using the resolver.
+        # Resolve all the tools to be resolved using the resolver, in a
+        # single call if it supports batches.
         if to_resolve:
-
-            async def resolve_and_append(tool_name: str) -> None:
-                """Resolve a tool and append it to the list of tools.
-
-                Args:
-                    tool_name: The name of the tool to resolve.
-
-                Raises:
-                    ToolNotFoundError: If a tool is not found in the resolver or store.
-                    ToolResolverFailedError: If a tool resolver fails.
-                    TypeError: If a tool resolver returns an invalid type.
-                    ValueError: If a tool resolver is not defined.
-                """
-                tool = await resolve_tool(tool_name, self._tool_resolver)
-                if out.tool_defs is not None:
-                    out.tool_defs.append(tool)
-
-            async with anyio.create_task_group() as tg:
-                for name in to_resolve:
-                    tg.start_soon(resolve_and_append, name)
+            resolved = await resolve_many(to_resolve, 'tool', self._tool_resolver, self._resolver_cache)
+            out.tool_defs.extend(resolved.values())
 
         out.tools = unregistered_names
         return out
@@ -515,7 +977,9 @@ class Dotprompt:
 
         This method recursively resolves partials, meaning if a partial itself
         contains partial references, those will also be resolved. Cycle detection
-        prevents infinite loops when partials reference each other.
+        prevents infinite loops when partials reference each other. The partials
+        are resolved level by level, so a partial resolver that supports batches
+        is called once per level of references.
 
         Args:
             template: The template to resolve partials in.
@@ -530,65 +994,75 @@ class Dotprompt:
         if visited is None:
             visited = set()
 
-        names = _identify_partials(template)
-        # Skip partials that are already registered OR currently being processed (cycle detection)
-        unregistered_names: list[str] = [
-            name for name in names if not self._handlebars.has_partial(name) and name not in visited
-        ]
+        templates = [template]
+        while templates:
+            names = sorted(frozenset().union(*(_identify_partials(t) for t in templates)))
+            # Skip partials that are already registered OR currently being processed (cycle detection)
+            unregistered_names: list[str] = [
+                name for name in names if not self._handlebars.has_partial(name) and name not in visited
+            ]
+            visited.update(unregistered_names)
+
+            contents = await self._load_partials(unregistered_names)
+            for name, content in contents.items():
+                # Resolved partials were missing before, so the compiled
+                # prompts remain valid.
+                self._handlebars.register_partial(name, content)
 
-        async def resolve_and_register(name: str) -> None:
-            """Resolve a partial from the resolver or store and register it.
+            # Resolve the partials referenced by the new ones next.
+            templates = list(contents.values())
 
-            The partial resolver is preferred, and the store is used as a
-            fallback. If neither is available, the partial is not registered.
+    async def _load_partials(self, names: list[str]) -> dict[str, str]:
+        """Load partials from the resolver or store.
 
-            Args:
-                name: The name of the partial to resolve.
+        The partial resolver is preferred, and the store is used as a
+        fallback. If neither is available, the partial is left out.
 
-            Returns:
-                None.
-            """
-            content: str | None = None
+        Args:
+            names: The names of the partials to load.
 
-            if self._partial_resolver is not None:
-                content = await resolve_partial(name, self._partial_resolver)
+        Returns:
+            The sources of the loaded partials, by name.
+        """
+        if not names:
+            return {}
+
+        contents: dict[str, str] = {}
+        if self._partial_resolver is not None:
+            contents = await resolve_many(
+                names,
+                'partial',
+                self._partial_resolver,
+                self._resolver_cache,
+                missing_ok=self._store is not None,
+            )
 
-            if content is None and self._store is not None:
+        async def load(name: str) -> None:
+            if self._store is not None:
                 partial = await self._store.load_partial(name)
                 if partial is not None:
-                    content = partial.source
-
-            if content is not None:
-                self.define_partial(name, content)
-
-                # Recursively resolve partials in the content.
-                await self._resolve_partials(content, visited)
-
-        # Mark all partials as being processed before starting resolution
-        for name in unregistered_names:
-            visited.add(name)
+                    contents[name] = partial.source
 
         async with anyio.create_task_group() as tg:
-            for name in unregistered_names:
-                tg.start_soon(resolve_and_register, name)
+            for name in names:
+                if name not in contents:
+                    tg.start_soon(load, name)
+        return contents
 
-    def _register_initial_helpers(
-        self,
-        builtin_helpers: dict[str, HelperFn] | None = None,
-        custom_helpers: dict[str, HelperFn] | None = None,
-    ) -> None:
+    def _register_initial_helpers(self, custom_helpers: dict[str, HelperFn] | None = None) -> None:
         """Register the initial helpers.
 
-        Built-in helpers are registered first, then custom helpers are
-        registered.
+        The native implementations of the built-in helpers are already
+        registered in the shared base engine, so templates using only them
+        render without calling back into Python. Custom helpers are registered
+        on top of them and take precedence over built-in helpers with the same
+        name.
 
         Args:
-            builtin_helpers: Built-in helpers to register.
             custom_helpers: Custom helpers to register.
         """
-        if builtin_helpers is not None:
-            for name, fn in builtin_helpers.items():
-                self.define_helper(name, fn)
+        for name in BUILTIN_HELPERS:
+            self._known_helpers[name] = True
 
         if custom_helpers is not None:
             for name, fn in custom_helpers.items():
@@ -597,9 +1071,10 @@ class Dotprompt:
     def _register_initial_partials(self, partials: dict[str, str] | None = None) -> None:
         """Register the initial partials.
 
+        The partials are parsed in parallel and registered together.
+
         Args:
             partials: Partials to register.
         """
-        if partials is not None:
-            for name, source in partials.items():
-                self.define_partial(name, source)
+        if partials:
+            self._handlebars.register_partials(partials)
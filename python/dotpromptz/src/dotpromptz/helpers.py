@@ -34,15 +34,20 @@
 |------------------------|-------------------------------------------|
 | `register_all_helpers` | Registers all the helpers in this module. |
 
+`Dotprompt` registers the native equivalents of these helpers provided by
+`handlebarrz` (see `Template.register_dotprompt_helpers`), which render the same
+output without calling back into Python. The implementations in this module
+remain available for use with other `Handlebars` instances.
 """
 
 import json
+from collections.abc import Sequence
 from typing import Any
 
 from handlebarrz import Handlebars, HelperFn, HelperOptions
 
 
-def json_helper(params: list[Any], options: HelperOptions) -> str:
+def json_helper(params: Sequence[Any], options: HelperOptions) -> str:
     """Convert a value to a JSON string.
 
     Args:
@@ -73,7 +78,7 @@ def json_helper(params: list[Any], options: HelperOptions) -> str:
     return json.dumps(obj, indent=indent)
 
 
-def role_helper(params: list[Any], options: HelperOptions) -> str:
+def role_helper(params: Sequence[Any], options: HelperOptions) -> str:
     """Create a dotprompt role marker.
 
     Example:
@@ -95,7 +100,7 @@ def role_helper(params: list[Any], options: HelperOptions) -> str:
     return f'<<<dotprompt:role:{role_name}>>>'
 
 
-def history_helper(params: list[Any], options: HelperOptions) -> str:
+def history_helper(params: Sequence[Any], options: HelperOptions) -> str:
     """Create a dotprompt history marker.
 
     Example:
@@ -113,7 +118,7 @@ def history_helper(params: list[Any], options: HelperOptions) -> str:
     return '<<<dotprompt:history>>>'
 
 
-def section_helper(params: list[Any], options: HelperOptions) -> str:
+def section_helper(params: Sequence[Any], options: HelperOptions) -> str:
     """Create a dotprompt section marker.
 
     Example:
@@ -135,7 +140,7 @@ def section_helper(params: list[Any], options: HelperOptions) -> str:
     return f'<<<dotprompt:section {section_name}>>>'
 
 
-def media_helper(params: list[Any], options: HelperOptions) -> str:
+def media_helper(params: Sequence[Any], options: HelperOptions) -> str:
     """Create a dotprompt media marker.
 
     Example:
@@ -161,7 +166,7 @@ def media_helper(params: list[Any], options: HelperOptions) -> str:
         return f'<<<dotprompt:media:url {url}>>>'
 
 
-def if_equals_helper(params: list[Any], options: HelperOptions) -> str:
+def if_equals_helper(params: Sequence[Any], options: HelperOptions) -> str:
     """Compares two values and returns appropriate content.
 
     Example:
@@ -186,7 +191,7 @@ def if_equals_helper(params: list[Any], options: HelperOptions) -> str:
     return options.fn() if a == b else options.inverse()
 
 
-def unless_equals_helper(params: list[Any], options: HelperOptions) -> str:
+def unless_equals_helper(params: Sequence[Any], options: HelperOptions) -> str:
     """Compares two values and returns appropriate content.
 
     Example:
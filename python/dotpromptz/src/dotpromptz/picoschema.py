@@ -89,6 +89,42 @@ async def picoschema_to_json_schema(schema: Any, schema_resolver: SchemaResolver
     return await PicoschemaParser(schema_resolver).parse(schema)
 
 
+def picoschema_references(schema: Any) -> set[str]:
+    """Finds the names of the schemas a Picoschema definition refers to.
+
+    The definition is walked the way `PicoschemaParser` parses it, but
+    nothing is resolved, so the named schemas can be fetched up front.
+
+    Args:
+        schema: The Picoschema definition (can be a dict or string).
+
+    Returns:
+        The names of the referenced schemas.
+    """
+    if not schema:
+        return set()
+    if isinstance(schema, dict) and (_is_json_schema(schema) or isinstance(schema.get('properties'), dict)):
+        return set()
+
+    names: set[str] = set()
+    pending: list[Any] = [schema]
+    while pending:
+        obj = pending.pop()
+        if isinstance(obj, str):
+            type_name, _ = extract_description(obj)
+            if type_name not in JSON_SCHEMA_SCALAR_TYPES:
+                names.add(type_name)
+        elif isinstance(obj, dict):
+            for key, value in obj.items():
+                parts = key.split('(')
+                type_info = parts[1][:-1] if len(parts) > 1 else None
+                if key == WILDCARD_PROPERTY_NAME or not type_info:
+                    pending.append(value)
+                elif extract_description(type_info)[0] in ('array', 'object'):
+                    pending.append(value)
+    return names
+
+
 class PicoschemaParser:
     """Parses Picoschema definitions into JSON Schema.
 
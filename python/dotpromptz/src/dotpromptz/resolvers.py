@@ -29,19 +29,42 @@ object.
 | `resolve_tool`        | Helper async function specifically for resolving tool names.               |
 | `resolve_partial`     | Helper async function specifically for resolving partial names.            |
 | `resolve_json_schema` | Helper async function specifically for resolving JSON schemas.             |
+| `resolve_many`        | Resolves several names, in one call if the resolver supports batches.      |
+| `ResolverCache`       | Caches resolved objects and misses, with a TTL per kind and LRU eviction.  |
+| `CacheDeadline`       | Earliest expiry of the cached results a computation used.                  |
+| `non_blocking`        | Marks a sync resolver as cheap enough to call on the event loop.           |
+| `with_thread_limiter` | Runs a blocking resolver in threads bounded by its own limiter.            |
 
 The `resolve` function handles both sync and async resolvers. If the resolver is
-sync, it is run in a thread pool to avoid blocking the event loop. If the
-resolver is async, it is awaited directly.
+sync, it is run in a thread pool to avoid blocking the event loop, unless it was
+marked with `non_blocking`. If the resolver is async, it is awaited directly.
 
 The `resolve_*` functions are convenience wrappers around `resolve` that handle
-the specific types of resolvers for tools, partials, and schemas.
+the specific types of resolvers for tools, partials, and schemas. When given a
+`ResolverCache`, they answer repeated lookups from it instead of calling the
+resolver every time.
+
+A resolver supports batches if it also has a `resolve_many` method, sync or
+async, that takes a list of names and returns a mapping from the names it found
+to their objects. `resolve_many` then calls it once for all the names, e.g. to
+fetch them from a remote registry in one round trip.
 """
 
+from __future__ import annotations
+
+import asyncio
 import inspect
-from collections.abc import Awaitable, Callable
+import math
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
 from typing import Any, TypeVar, cast
 
+import anyio
 from anyio.to_thread import run_sync
 
 from dotpromptz.errors import ResolverFailedError
@@ -59,6 +82,158 @@ ResolverT = TypeVar('ResolverT', bound=ResolverCallable)
 DefinitionT = TypeVar('DefinitionT')
 
 
+class _ResolverWrapper:
+    """A resolver with settings for how `resolve` calls it."""
+
+    def __init__(
+        self,
+        resolver: ResolverCallable,
+        inline: bool = False,
+        limiter: anyio.CapacityLimiter | None = None,
+    ) -> None:
+        """Initialize the wrapper.
+
+        Args:
+            resolver: The wrapped resolver.
+            inline: Whether to call the resolver on the event loop.
+            limiter: Limiter of the worker threads running the resolver.
+        """
+        self.resolver = resolver
+        self.inline = inline
+        self.limiter = limiter
+
+    def __call__(self, name: str) -> Awaitable[Any] | Any:
+        """Call the wrapped resolver."""
+        return self.resolver(name)
+
+
+def non_blocking(resolver: ResolverT) -> ResolverT:
+    """Mark a sync resolver as cheap enough to call on the event loop.
+
+    `resolve` calls such resolvers directly instead of running them in a
+    worker thread, which saves a thread hop per lookup for resolvers that
+    look definitions up in memory, e.g. `non_blocking(tools.get)`. Resolvers
+    that do I/O must not be marked, as they would block the event loop.
+
+    Args:
+        resolver: The resolver to mark.
+
+    Returns:
+        A resolver that is called inline.
+    """
+    return cast(ResolverT, _ResolverWrapper(resolver, inline=True))
+
+
+def with_thread_limiter(resolver: ResolverT, limiter: anyio.CapacityLimiter | int) -> ResolverT:
+    """Run a blocking resolver in worker threads bounded by its own limiter.
+
+    By default, sync resolvers share anyio's default thread limiter with the
+    rest of the application. A dedicated limiter keeps a slow resolver from
+    using up those threads, and bounds the concurrent calls to its backend.
+
+    Args:
+        resolver: The blocking resolver.
+        limiter: The limiter to use, which may be shared with other
+            resolvers, or the maximum number of threads of a new one.
+
+    Returns:
+        A resolver that runs in threads bounded by the limiter.
+    """
+    if isinstance(limiter, int):
+        limiter = anyio.CapacityLimiter(limiter)
+    return cast(ResolverT, _ResolverWrapper(resolver, limiter=limiter))
+
+
+def _unwrap(resolver: ResolverCallable) -> tuple[ResolverCallable, bool, anyio.CapacityLimiter | None]:
+    """Split a resolver into the callable and the settings for calling it.
+
+    Args:
+        resolver: The resolver, possibly wrapped by `non_blocking` or
+            `with_thread_limiter`.
+
+    Returns:
+        The resolver callable, whether to call it inline and the limiter of
+        its worker threads.
+    """
+    if isinstance(resolver, _ResolverWrapper):
+        return resolver.resolver, resolver.inline, resolver.limiter
+    return resolver, False, None
+
+
+async def _call(fn: Callable[[Any], Any], arg: Any, inline: bool, limiter: anyio.CapacityLimiter | None) -> Any:
+    """Call a sync or async resolver function and wait for its result.
+
+    Args:
+        fn: The function to call.
+        arg: The argument to call it with.
+        inline: Whether to call a sync function on the event loop.
+        limiter: Limiter of the worker threads running a sync function.
+
+    Returns:
+        The result of the function, awaited if it is awaitable.
+    """
+    if inspect.iscoroutinefunction(fn) or inspect.iscoroutinefunction(type(fn).__call__):
+        # If resolver is async, call it directly and await.
+        return await fn(arg)
+
+    # If resolver is sync, run it in a thread pool and check the return
+    # type after calling, as we don't know it yet. It might still return
+    # an awaitable (e.g. sync function returning `asyncio.Future`) but
+    # calling it sync first is necessary to check. Resolvers marked as
+    # non-blocking are called on the event loop instead.
+    if inline:
+        result_or_awaitable = fn(arg)
+    else:
+        result_or_awaitable = await run_sync(cast(Any, fn), arg, limiter=limiter)
+    if inspect.isawaitable(result_or_awaitable):
+        return await result_or_awaitable
+    return result_or_awaitable
+
+
+def supports_batches(resolver: ResolverCallable | None) -> bool:
+    """Return whether a resolver has a `resolve_many` method.
+
+    Args:
+        resolver: The resolver, possibly wrapped by `non_blocking` or
+            `with_thread_limiter`.
+
+    Returns:
+        True if `resolve_many` can resolve several names in one call.
+    """
+    if resolver is None:
+        return False
+    call, _, _ = _unwrap(resolver)
+    # Look the method up on the type, so that objects that make up
+    # attributes on demand, such as mocks, are not taken for batch resolvers.
+    return callable(getattr(type(call), 'resolve_many', None))
+
+
+async def _resolve_batch(names: list[str], kind: str, resolver: ResolverCallable) -> dict[str, Any]:
+    """Call the `resolve_many` method of a resolver once.
+
+    Args:
+        names: The names to resolve.
+        kind: The kind of objects to resolve.
+        resolver: The resolver, which must support batches.
+
+    Returns:
+        The objects the resolver found, by name.
+
+    Raises:
+        ResolverFailedError: For exceptions raised by the resolver.
+        TypeError: If the resolver does not return a mapping.
+    """
+    call, inline, limiter = _unwrap(resolver)
+    try:
+        found = await _call(cast(Any, call).resolve_many, list(names), inline, limiter)
+    except Exception as e:
+        raise ResolverFailedError(', '.join(names), kind, str(e)) from e
+
+    if not isinstance(found, Mapping):
+        raise TypeError(f'{kind} resolver returned {type(found).__name__} from resolve_many, expected a mapping')
+    return {name: found[name] for name in names if found.get(name) is not None}
+
+
 # TODO(#497): Python 3.12+:
 # async def resolve[
 #     ResolverT: ResolverCallable,
@@ -68,7 +243,7 @@ async def resolve(name: str, kind: str, resolver: ResolverT | None) -> Definitio
     """Resolves a single object using the provided resolver.
 
     If the resolver is synchronous, it is run in a thread pool to avoid
-    blocking the event loop.
+    blocking the event loop, unless it was marked with `non_blocking`.
 
     Args:
         name: The name of the object to resolve.
@@ -125,19 +300,8 @@ async def resolve(name: str, kind: str, resolver: ResolverT | None) -> Definitio
         #     | (Context Manager) |
         #     +-------------------+
         # ```
-        if inspect.iscoroutinefunction(resolver):
-            # If resolver is async, call it directly and await.
-            obj = await resolver(name)
-        else:
-            # If resolver is sync, run it in a thread pool and check the return
-            # type after calling, as we don't know it yet. It might still return
-            # an awaitable (e.g. sync function returning `asyncio.Future`) but
-            # calling it sync first is necessary to check.
-            result_or_awaitable = await run_sync(cast(Any, resolver), name)
-            if inspect.isawaitable(result_or_awaitable):
-                obj = await result_or_awaitable
-            else:
-                obj = result_or_awaitable
+        call, inline, limiter = _unwrap(resolver)
+        obj = await _call(call, name, inline, limiter)
 
     except Exception as e:
         # Catch errors from both await and sync execution in thread.
@@ -150,12 +314,478 @@ async def resolve(name: str, kind: str, resolver: ResolverT | None) -> Definitio
     return obj
 
 
-async def resolve_tool(name: str, resolver: ToolResolver | None) -> ToolDefinition:
+@dataclass(frozen=True)
+class CachePolicy:
+    """How long a `ResolverCache` keeps the results of one kind of resolver.
+
+    Attributes:
+        ttl: Seconds a resolved object is used without calling the resolver
+            again, or None to keep it until it is evicted.
+        negative_ttl: Seconds a name the resolver returned None for keeps
+            failing without calling the resolver again; 0 disables negative
+            caching.
+        stale_ttl: Seconds after `ttl` during which an expired object is still
+            returned while it is resolved again in the background.
+    """
+
+    ttl: float | None = 300.0
+    negative_ttl: float = 30.0
+    stale_ttl: float = 0.0
+
+
+@dataclass
+class CacheStats:
+    """Counters of a `ResolverCache`.
+
+    Attributes:
+        hits: Lookups answered by an object that had not expired.
+        stale_hits: Lookups answered by an expired object while it was
+            resolved again in the background.
+        negative_hits: Lookups answered by a cached miss.
+        misses: Lookups that had to wait for the resolver.
+        refreshes: Background resolutions of expired objects.
+        evictions: Entries evicted to stay within the size bound.
+    """
+
+    hits: int = 0
+    stale_hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+    refreshes: int = 0
+    evictions: int = 0
+
+
+@dataclass
+class _Entry:
+    """A cached resolver result."""
+
+    # Kept so that the id in the key is not reused while the entry exists.
+    resolver: ResolverCallable
+    value: Any
+    # Message of the LookupError raised for a cached miss.
+    error: str | None
+    expires: float
+    stale_until: float
+    refreshing: bool = False
+
+
+@dataclass
+class _Pending:
+    """A resolution that other lookups of the same name wait for."""
+
+    done: anyio.Event = field(default_factory=anyio.Event)
+    value: Any = None
+    error: Exception | None = None
+    finished: bool = False
+
+
+_CacheKey = tuple[str, str, int]
+
+# Returned by `ResolverCache._cached` for names without a usable entry.
+_NOT_CACHED = object()
+
+
+class CacheDeadline:
+    """The earliest expiry of the cached results used by a computation.
+
+    Created by `ResolverCache.track_expiry`, so that results derived from
+    cached objects, such as compiled prompts, can expire with them.
+
+    Attributes:
+        at: The time, on the clock of the cache, when the first of the used
+            results expires; infinity if none of them expires.
+    """
+
+    def __init__(self, cache: ResolverCache) -> None:
+        """Initialize a deadline that no result has moved yet.
+
+        Args:
+            cache: The cache whose results are tracked.
+        """
+        self.at: float = math.inf
+        self._cache = cache
+
+    def passed(self) -> bool:
+        """Return whether one of the used results has expired."""
+        return self._cache._clock() >= self.at
+
+
+# Deadlines of the computations in progress in the current context.
+_deadlines: ContextVar[tuple[CacheDeadline, ...]] = ContextVar('_deadlines', default=())
+
+
+class ResolverCache:
+    """Caches the results of tool, schema and partial resolvers.
+
+    Results are cached per kind, name and resolver, so one cache can be
+    shared by `Dotprompt` instances with different resolvers. Names the
+    resolver returns None for are cached as misses and raise `LookupError`
+    again, while resolver failures are never cached. Concurrent lookups of
+    the same name share a single call to the resolver.
+
+    Expired objects within the stale window of their `CachePolicy` are
+    resolved again in the background, on asyncio as well as trio.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        policies: dict[str, CachePolicy] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached results; the least recently
+                used ones are evicted beyond it.
+            policies: Cache policy by kind ('tool', 'schema' or 'partial');
+                kinds without one use the default `CachePolicy`.
+            clock: Returns the current time in seconds.
+
+        Raises:
+            ValueError: If `max_entries` is not positive.
+        """
+        if max_entries <= 0:
+            raise ValueError('max_entries must be positive')
+        self._max_entries = max_entries
+        self._policies = dict(policies or {})
+        self._clock = clock
+        self._entries: OrderedDict[_CacheKey, _Entry] = OrderedDict()
+        self._pending: dict[_CacheKey, _Pending] = {}
+        self._stats: dict[str, CacheStats] = {}
+        # Background refreshes in progress and, on asyncio, their tasks.
+        self._refreshing: set[anyio.Event] = set()
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def __len__(self) -> int:
+        """Return the number of cached results, including misses."""
+        return len(self._entries)
+
+    def stats(self, kind: str | None = None) -> CacheStats:
+        """Return the counters of one kind of resolver or of all of them.
+
+        Args:
+            kind: The kind of resolver, or None for the totals.
+
+        Returns:
+            A copy of the counters.
+        """
+        if kind is not None:
+            return replace(self._stats.get(kind, CacheStats()))
+        total = CacheStats()
+        for stats in self._stats.values():
+            total.hits += stats.hits
+            total.stale_hits += stats.stale_hits
+            total.negative_hits += stats.negative_hits
+            total.misses += stats.misses
+            total.refreshes += stats.refreshes
+            total.evictions += stats.evictions
+        return total
+
+    def invalidate(self, kind: str | None = None, name: str | None = None) -> None:
+        """Forget cached results.
+
+        Args:
+            kind: Only forget results of this kind of resolver.
+            name: Only forget results for this name.
+        """
+        for key in [
+            key for key in self._entries if (kind is None or key[0] == kind) and (name is None or key[1] == name)
+        ]:
+            del self._entries[key]
+
+    @contextmanager
+    def track_expiry(self) -> Iterator[CacheDeadline]:
+        """Track the expiry of the results looked up in this cache.
+
+        Lookups made in the context of the `with` block, including the tasks
+        it starts, move the deadline to the expiry of the cached object or
+        miss they return. Objects returned from the stale window have
+        already expired.
+
+        Yields:
+            The deadline, which is final once the block exits.
+        """
+        deadline = CacheDeadline(self)
+        token = _deadlines.set((*_deadlines.get(), deadline))
+        try:
+            yield deadline
+        finally:
+            _deadlines.reset(token)
+
+    async def resolve(self, name: str, kind: str, resolver: ResolverCallable | None) -> Any:
+        """Resolve an object, using the cached result when there is one.
+
+        Args:
+            name: The name of the object to resolve.
+            kind: The kind of object to resolve.
+            resolver: The object resolver callable.
+
+        Returns:
+            The resolved object.
+
+        Raises:
+            LookupError: If the resolver returns, or recently returned, None
+                for the object.
+            ResolverFailedError: For exceptions raised by the resolver.
+            TypeError: If the resolver is not callable.
+            ValueError: If the resolver is not defined.
+        """
+        if resolver is None or not callable(resolver):
+            return await resolve(name, kind, resolver)
+
+        key = (kind, name, id(resolver))
+        value = self._cached(key, name, kind, resolver)
+        if value is not _NOT_CACHED:
+            return value
+
+        self._stats[kind].misses += 1
+        return await self._load(key, name, kind, resolver)
+
+    async def resolve_many(self, names: Iterable[str], kind: str, resolver: ResolverCallable) -> dict[str, Any]:
+        """Resolve several objects, calling a batch resolver once for the uncached ones.
+
+        Args:
+            names: The names of the objects to resolve.
+            kind: The kind of objects to resolve.
+            resolver: The object resolver, which must support batches.
+
+        Returns:
+            The resolved objects by name. Names the resolver returned None
+            for, now or recently, are left out.
+
+        Raises:
+            ResolverFailedError: For exceptions raised by the resolver.
+            TypeError: If the resolver does not return a mapping.
+        """
+        found: dict[str, Any] = {}
+        missing: list[str] = []
+        for name in dict.fromkeys(names):
+            try:
+                value = self._cached((kind, name, id(resolver)), name, kind, resolver)
+            except LookupError:
+                continue
+            if value is _NOT_CACHED:
+                missing.append(name)
+            else:
+                found[name] = value
+
+        if missing:
+            self._stats[kind].misses += len(missing)
+            loaded = await _resolve_batch(missing, kind, resolver)
+            for name in missing:
+                key = (kind, name, id(resolver))
+                if name in loaded:
+                    found[name] = loaded[name]
+                    self._store(key, kind, resolver, loaded[name], None)
+                else:
+                    self._store(key, kind, resolver, None, f"{kind} resolver for '{name}' returned None")
+        return found
+
+    def _cached(self, key: _CacheKey, name: str, kind: str, resolver: ResolverCallable) -> Any:
+        """Return the cached object for a name, refreshing it if it expired.
+
+        Returns:
+            The cached object, or `_NOT_CACHED` if the resolver must be called.
+
+        Raises:
+            LookupError: If a miss is cached for the name.
+        """
+        stats = self._stats.setdefault(kind, CacheStats())
+        entry = self._entries.get(key)
+        if entry is None:
+            return _NOT_CACHED
+        now = self._clock()
+        if now < entry.expires:
+            self._entries.move_to_end(key)
+            self._used(entry.expires)
+            if entry.error is not None:
+                stats.negative_hits += 1
+                raise LookupError(entry.error)
+            stats.hits += 1
+            return entry.value
+        if entry.error is None and now < entry.stale_until:
+            self._entries.move_to_end(key)
+            self._used(entry.expires)
+            stats.stale_hits += 1
+            self._refresh(key, name, kind, resolver, entry)
+            return entry.value
+        return _NOT_CACHED
+
+    async def _load(self, key: _CacheKey, name: str, kind: str, resolver: ResolverCallable) -> Any:
+        """Call the resolver, or wait for the call already in progress."""
+        while (pending := self._pending.get(key)) is not None:
+            await pending.done.wait()
+            if pending.finished:
+                if (entry := self._entries.get(key)) is not None:
+                    self._used(entry.expires)
+                if pending.error is not None:
+                    raise pending.error
+                return pending.value
+            # The lookup that called the resolver was cancelled, so try again.
+
+        pending = _Pending()
+        self._pending[key] = pending
+        try:
+            pending.value = await resolve(name, kind, resolver)
+            self._store(key, kind, resolver, pending.value, None)
+        except Exception as e:
+            if isinstance(e, LookupError):
+                self._store(key, kind, resolver, None, str(e))
+            pending.error = e
+            pending.finished = True
+            raise
+        else:
+            pending.finished = True
+        finally:
+            del self._pending[key]
+            pending.done.set()
+        return pending.value
+
+    def _store(self, key: _CacheKey, kind: str, resolver: ResolverCallable, value: Any, error: str | None) -> None:
+        """Cache a resolved object or a miss according to the policy of its kind."""
+        policy = self._policies.get(kind, CachePolicy())
+        now = self._clock()
+        if error is not None:
+            if policy.negative_ttl <= 0:
+                self._entries.pop(key, None)
+                return
+            expires = stale_until = now + policy.negative_ttl
+        else:
+            expires = math.inf if policy.ttl is None else now + policy.ttl
+            stale_until = expires + policy.stale_ttl
+
+        self._entries[key] = _Entry(resolver, value, error, expires, stale_until)
+        self._entries.move_to_end(key)
+        self._used(expires)
+        while len(self._entries) > self._max_entries:
+            evicted_key, _ = self._entries.popitem(last=False)
+            self._stats.setdefault(evicted_key[0], CacheStats()).evictions += 1
+
+    def _used(self, expires: float) -> None:
+        """Move the deadlines tracked in the current context to an expiry."""
+        for deadline in _deadlines.get():
+            if deadline._cache is self:
+                deadline.at = min(deadline.at, expires)
+
+    def _refresh(self, key: _CacheKey, name: str, kind: str, resolver: ResolverCallable, entry: _Entry) -> None:
+        """Resolve an expired object again in the background."""
+        if entry.refreshing:
+            return
+        try:
+            loop: asyncio.AbstractEventLoop | None = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        # trio is only imported by applications that run on it.
+        trio = sys.modules.get('trio') if loop is None else None
+        if loop is None and (trio is None or not trio.lowlevel.in_trio_run()):
+            return
+
+        done = anyio.Event()
+
+        async def refresh() -> None:
+            # The refresh outlives the lookup that started it, so it does not
+            # move the lookup's deadlines.
+            _deadlines.set(())
+            try:
+                await self._load(key, name, kind, resolver)
+            except Exception:
+                # Keep returning the expired object until the stale window
+                # ends; the lookup after that reports the failure.
+                entry.refreshing = False
+            finally:
+                self._refreshing.discard(done)
+                done.set()
+
+        entry.refreshing = True
+        self._stats[kind].refreshes += 1
+        self._refreshing.add(done)
+        if loop is not None:
+            task = loop.create_task(refresh())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        elif trio is not None:
+            # System tasks are not cancelled with the task that started them.
+            trio.lowlevel.spawn_system_task(refresh)
+
+
+async def resolve_many(
+    names: Iterable[str],
+    kind: str,
+    resolver: ResolverCallable | None,
+    cache: ResolverCache | None = None,
+    missing_ok: bool = False,
+) -> dict[str, Any]:
+    """Resolve several objects, in one call if the resolver supports batches.
+
+    Resolvers without a `resolve_many` method are called concurrently, once
+    per name.
+
+    Args:
+        names: The names of the objects to resolve.
+        kind: The kind of objects to resolve.
+        resolver: The object resolver callable.
+        cache: Cache to answer the lookups from, if any.
+        missing_ok: Whether to leave out names the resolver returns None for
+            instead of raising `LookupError`.
+
+    Returns:
+        The resolved objects by name, in the order of `names`.
+
+    Raises:
+        LookupError: If the resolver returns None for an object and
+            `missing_ok` is false.
+        ResolverFailedError: For exceptions raised by the resolver.
+        TypeError: If the resolver is not callable or returns an invalid type.
+        ValueError: If the resolver is not defined.
+    """
+    unique = list(dict.fromkeys(names))
+    if not unique:
+        return {}
+
+    found: dict[str, Any] = {}
+    if resolver is not None and supports_batches(resolver):
+        if cache is not None:
+            found = await cache.resolve_many(unique, kind, resolver)
+        else:
+            found = await _resolve_batch(unique, kind, resolver)
+    else:
+        # Failures are raised below, like those of a batch, rather than as an
+        # exception group from the task group.
+        failures: dict[str, Exception] = {}
+
+        async def resolve_one(name: str) -> None:
+            try:
+                if cache is not None:
+                    found[name] = await cache.resolve(name, kind, resolver)
+                else:
+                    found[name] = await resolve(name, kind, resolver)
+            except Exception as e:
+                if not missing_ok or not isinstance(e, LookupError):
+                    failures[name] = e
+                    tg.cancel_scope.cancel()
+
+        async with anyio.create_task_group() as tg:
+            for name in unique:
+                tg.start_soon(resolve_one, name)
+        for name in unique:
+            if name in failures:
+                raise failures[name]
+
+    if not missing_ok:
+        for name in unique:
+            if name not in found:
+                raise LookupError(f"{kind} resolver for '{name}' returned None")
+    return {name: found[name] for name in unique if name in found}
+
+
+async def resolve_tool(name: str, resolver: ToolResolver | None, cache: ResolverCache | None = None) -> ToolDefinition:
     """Resolve a tool using the provided resolver.
 
     Args:
         name: The name of the tool to resolve.
         resolver: The tool resolver callable (sync or async).
+        cache: Cache to answer the lookup from, if any.
 
     Returns:
         The resolved tool definition.
@@ -166,15 +796,18 @@ async def resolve_tool(name: str, resolver: ToolResolver | None) -> ToolDefiniti
         TypeError: If the resolver is not callable or returns an invalid type.
         ValueError: If the resolver is not defined.
     """
+    if cache is not None:
+        return cast(ToolDefinition, await cache.resolve(name, 'tool', resolver))
     return await resolve(name, 'tool', resolver)
 
 
-async def resolve_partial(name: str, resolver: PartialResolver | None) -> str:
+async def resolve_partial(name: str, resolver: PartialResolver | None, cache: ResolverCache | None = None) -> str:
     """Resolve a partial using the provided resolver.
 
     Args:
         name: The name of the partial to resolve.
         resolver: The partial resolver callable.
+        cache: Cache to answer the lookup from, if any.
 
     Returns:
         The resolved partial.
@@ -185,15 +818,20 @@ async def resolve_partial(name: str, resolver: PartialResolver | None) -> str:
         TypeError: If the resolver is not callable or returns an invalid type.
         ValueError: If the resolver is not defined.
     """
+    if cache is not None:
+        return cast(str, await cache.resolve(name, 'partial', resolver))
     return await resolve(name, 'partial', resolver)
 
 
-async def resolve_json_schema(name: str, resolver: SchemaResolver | None) -> JsonSchema:
+async def resolve_json_schema(
+    name: str, resolver: SchemaResolver | None, cache: ResolverCache | None = None
+) -> JsonSchema:
     """Resolve a JSON schema using the provided resolver.
 
     Args:
         name: The name of the JSON schema to resolve.
         resolver: The JSON schema resolver callable.
+        cache: Cache to answer the lookup from, if any.
 
     Returns:
         The resolved JSON schema.
@@ -203,4 +841,6 @@ async def resolve_json_schema(name: str, resolver: SchemaResolver | None) -> Jso
         ResolverFailedError: For exceptions raised by the resolver.
         TypeError: If the resolver is not callable or returns an invalid type.
     """
+    if cache is not None:
+        return cast(JsonSchema, await cache.resolve(name, 'schema', resolver))
     return await resolve(name, 'schema', resolver)
@@ -38,22 +38,25 @@ from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
-from dotpromptz.dotprompt import Dotprompt, _identify_partials
+from dotpromptz.dotprompt import Dotprompt, _base_handlebars, _estimate_size, _identify_partials, _merge_metadata
+from dotpromptz.resolvers import CachePolicy, ResolverCache
 from dotpromptz.typing import (
+    DataArgument,
     ModelConfigT,
     ParsedPrompt,
     PromptMetadata,
+    TextPart,
     ToolDefinition,
 )
-from handlebarrz import HelperFn, HelperOptions
+from handlebarrz import Handlebars, HelperFn, HelperOptions
 
 
 @pytest.fixture
 def mock_handlebars() -> Generator[Mock, None, None]:
     """Create a mock Handlebars instance."""
-    with patch('dotpromptz.dotprompt.Handlebars') as mock_handlebars_class:
+    with patch('dotpromptz.dotprompt._base_handlebars') as mock_base_handlebars:
         mock_instance = Mock()
-        mock_handlebars_class.return_value = mock_instance
+        mock_base_handlebars.return_value.fork.return_value = mock_instance
         yield mock_instance
 
 
@@ -97,7 +100,41 @@ def test_init_with_options(mock_handlebars: Mock) -> None:
     )
 
     mock_handlebars.register_helper.assert_called_with('helper1', helpers['helper1'])
-    mock_handlebars.register_partial.assert_called_with('partial1', partials['partial1'])
+    mock_handlebars.register_partials.assert_called_once_with(partials)
+
+
+def test_init_shares_base_handlebars() -> None:
+    """Test that instances fork the shared base engine instead of building one."""
+    _base_handlebars.cache_clear()
+    try:
+        with patch.object(Handlebars, 'register_dotprompt_helpers', autospec=True) as register:
+            first = Dotprompt()
+            second = Dotprompt()
+
+        register.assert_called_once()
+        assert first._handlebars is not second._handlebars
+    finally:
+        # The base built above lacks the helpers, so later tests build another.
+        _base_handlebars.cache_clear()
+
+
+def test_fork() -> None:
+    """Test that forks keep the configuration but not later definitions."""
+    base = Dotprompt(
+        default_model='base-model',
+        partials={'greeting': 'Hello {{name}}'},
+        helpers={'shout': lambda params, options: str(params[0]).upper()},
+    )
+    tenant = base.fork()
+    tenant.define_partial('greeting', 'Hi {{shout name}}')
+    tenant.define_tool(ToolDefinition(name='t', description='d', inputSchema={}))
+
+    assert tenant._default_model == 'base-model'
+    assert tenant._known_helpers['shout'] is True
+    assert tenant._tools == {'t': ToolDefinition(name='t', description='d', inputSchema={})}
+    assert base._tools == {}
+    assert tenant._handlebars.render_template('{{> greeting}}', {'name': 'ada'}) == 'Hi ADA'
+    assert base._handlebars.render_template('{{> greeting}}', {'name': 'ada'}) == 'Hello ada'
 
 
 def test_define_helper(mock_handlebars: Mock) -> None:
@@ -171,6 +208,233 @@ class TestCompileRender(IsolatedAsyncioTestCase):
 
         assert result == 'hello foo (bar, a@b.c)'
 
+    async def test_render_variants(self) -> None:
+        """Test rendering several prompt variants against the same data."""
+        dotprompt = Dotprompt()
+        compiled = await dotprompt.compile('Bye {{name}} ({{@state.id}})')
+        data = DataArgument[dict[str, Any]](input={'name': 'Ada'}, context={'state': {'id': 7}})
+
+        results = await dotprompt.render_variants(['Hi {{name}}', compiled], data)
+
+        assert [r.messages[0].content for r in results] == [[TextPart(text='Hi Ada')], [TextPart(text='Bye Ada (7)')]]
+        assert data.input == {'name': 'Ada'}
+
+    async def test_render_variants_from_other_instances(self) -> None:
+        """Test that variants compiled by other instances render their own templates."""
+        dotprompt = Dotprompt()
+        other = Dotprompt()
+        ours = await dotprompt.compile('Ours {{name}}')
+        theirs = await other.compile('Theirs {{name}}')
+        forked = await dotprompt.fork().compile('Forked {{name}}')
+        data = DataArgument[dict[str, Any]](input={'name': 'Ada'})
+
+        results = await dotprompt.render_variants([ours, theirs, forked], data)
+
+        assert [r.messages[0].content for r in results] == [
+            [TextPart(text='Ours Ada')],
+            [TextPart(text='Theirs Ada')],
+            [TextPart(text='Forked Ada')],
+        ]
+
+    async def test_rendered_prompts_do_not_share_metadata(self) -> None:
+        """Test that changing a rendered prompt does not change later renders."""
+        dotprompt = Dotprompt(tools={'search': ToolDefinition(name='search', inputSchema={'type': 'object'})})
+        source = '---\ntools: [search]\noutput:\n  format: json\n  schema:\n    name: string\n---\nHi'
+        data = DataArgument[dict[str, Any]]()
+
+        first = await dotprompt.render(source, data)
+        assert first.output is not None and first.tool_defs is not None
+        first.output.format = 'text'
+        first.output.schema['properties']['name']['type'] = 'integer'
+        first.tool_defs[0].input_schema['type'] = 'string'
+        second = await dotprompt.render(source, data)
+
+        assert second.output is not None and second.tool_defs is not None
+        assert second.output.format == 'json'
+        assert second.output.schema['properties']['name'] == {'type': 'string'}
+        assert second.tool_defs[0].input_schema == {'type': 'object'}
+
+    async def test_render_offloads_large_prompts(self) -> None:
+        """Test that only renders above the threshold run in a worker thread."""
+        dotprompt = Dotprompt(render_offload_threshold=100)
+        compiled = await dotprompt.compile('Hi {{name}}')
+
+        small = await compiled(DataArgument[dict[str, Any]](input={'name': 'Ada'}))
+        large = await compiled(DataArgument[dict[str, Any]](input={'name': 'x' * 200}))
+
+        assert small.messages[0].content == [TextPart(text='Hi Ada')]
+        assert large.messages[0].content == [TextPart(text='Hi ' + 'x' * 200)]
+        stats = compiled.stats
+        assert (stats.renders, stats.offloaded) == (2, 1)
+        assert stats.total_seconds >= stats.last_seconds > 0
+
+    async def test_render_without_offload_threshold(self) -> None:
+        """Test that renders stay on the event loop without a threshold."""
+        dotprompt = Dotprompt(render_offload_threshold=None)
+        compiled = await dotprompt.compile('Hi {{name}}')
+
+        await compiled(DataArgument[dict[str, Any]](input={'name': 'x' * 200}))
+
+        assert (compiled.stats.renders, compiled.stats.offloaded) == (1, 0)
+
+    async def test_render_variants_stats(self) -> None:
+        """Test that variant renders are recorded on the instance."""
+        dotprompt = Dotprompt(render_offload_threshold=0)
+        compiled = await dotprompt.compile('Bye {{name}}')
+        data = DataArgument[dict[str, Any]](input={'name': 'Ada'})
+
+        await dotprompt.render_variants(['Hi {{name}}', compiled], data)
+        await dotprompt.render_variants([compiled], data)
+
+        stats = dotprompt.variant_stats
+        assert (stats.renders, stats.offloaded) == (2, 2)
+        assert stats.total_seconds >= stats.last_seconds > 0
+        assert compiled.stats.renders == 0
+        assert dotprompt.fork().variant_stats.renders == 0
+
+    async def test_compile_cache(self) -> None:
+        """Test that compiled prompts are reused until definitions change."""
+        dotprompt = Dotprompt(compile_cache_size=2)
+        compiled = await dotprompt.compile('Hi {{name}}')
+
+        assert await dotprompt.compile('Hi {{name}}') is compiled
+        assert await dotprompt.compile('Hi {{name}}', PromptMetadata(model='m')) is not compiled
+        assert await dotprompt.compile('Bye {{name}}') is not compiled
+        assert await dotprompt.compile('Hi {{name}}') is not compiled
+
+        compiled = await dotprompt.compile('Hi {{name}}')
+        dotprompt.define_tool(ToolDefinition(name='t', inputSchema={}))
+        assert await dotprompt.compile('Hi {{name}}') is not compiled
+
+    async def test_render_reuses_compiled_prompt(self) -> None:
+        """Test that rendering a source again does not parse it again."""
+        dotprompt = Dotprompt()
+        data = DataArgument[dict[str, Any]](input={'name': 'Ada'})
+
+        with patch.object(dotprompt, 'parse', wraps=dotprompt.parse) as parse:
+            await dotprompt.render('Hi {{name}}', data)
+            await dotprompt.render('Hi {{name}}', data)
+            dotprompt.define_helper('shout', lambda params, options: str(params[0]).upper())
+            result = await dotprompt.render('Hi {{shout name}}', data)
+
+        assert parse.call_count == 2
+        assert result.messages[0].content == [TextPart(text='Hi ADA')]
+
+    async def test_compile_cache_disabled(self) -> None:
+        """Test that a cache size of 0 compiles every time."""
+        dotprompt = Dotprompt(compile_cache_size=0)
+
+        assert await dotprompt.compile('Hi') is not await dotprompt.compile('Hi')
+
+    async def test_compile_resolves_metadata_once(self) -> None:
+        """Test that tools are resolved when compiling, not on every render."""
+        tool = ToolDefinition(name='search', inputSchema={})
+        tool_resolver = AsyncMock(return_value=tool)
+        dotprompt = Dotprompt(model_configs={'m': {'temperature': 0.5}}, default_model='m', tool_resolver=tool_resolver)
+        compiled = await dotprompt.compile('---\ntools: [search]\n---\nHi {{name}}')
+        data = DataArgument[dict[str, Any]](input={'name': 'Ada'})
+
+        options = PromptMetadata[dict[str, Any]](config={'top_k': 3})
+
+        plain = await compiled(data)
+        overlaid = await compiled(data, options)
+
+        tool_resolver.assert_awaited_once_with('search')
+        assert plain.tool_defs == overlaid.tool_defs == [tool]
+        assert overlaid.config == {'temperature': 0.5, 'top_k': 3}
+        assert await dotprompt._overlay_metadata(
+            compiled.prompt, compiled.metadata, options
+        ) == await dotprompt.render_metadata(compiled.prompt, options)
+
+    async def test_resolver_cache(self) -> None:
+        """Test that a resolver cache answers lookups across compilations."""
+        tool_resolver = AsyncMock(return_value=ToolDefinition(name='search', inputSchema={}))
+        dotprompt = Dotprompt(tool_resolver=tool_resolver, resolver_cache=ResolverCache())
+
+        await dotprompt.compile('---\ntools: [search]\n---\nHi')
+        await dotprompt.fork().compile('---\ntools: [search]\n---\nBye')
+
+        tool_resolver.assert_awaited_once_with('search')
+
+    async def test_compiled_prompts_expire_with_resolver_cache(self) -> None:
+        """Test that cached compiled prompts pick up tools once they expire."""
+        now = 0.0
+        versions = iter(['v1', 'v2', 'v3'])
+
+        async def tool_resolver(name: str) -> ToolDefinition:
+            return ToolDefinition(name=name, description=next(versions), inputSchema={})
+
+        cache = ResolverCache(policies={'tool': CachePolicy(ttl=10, stale_ttl=10)}, clock=lambda: now)
+        dotprompt = Dotprompt(tool_resolver=tool_resolver, resolver_cache=cache)
+        source = '---\ntools: [search]\n---\nHi'
+        data = DataArgument[dict[str, Any]]()
+
+        async def description() -> str | None:
+            rendered = await dotprompt.render(source, data)
+            return rendered.tool_defs[0].description if rendered.tool_defs else None
+
+        assert await description() == 'v1'
+        now = 5
+        assert await description() == 'v1'
+
+        # Expired within the stale window: the stale tool is used while it is
+        # resolved again, and the next render picks up the new one.
+        now = 12
+        assert await description() == 'v1'
+        await asyncio.gather(*cache._tasks)
+        assert await description() == 'v2'
+
+        # Past the stale window, the tool is resolved before rendering.
+        now = 50
+        assert await description() == 'v3'
+        assert cache.stats('tool').stale_hits == 1
+
+    async def test_batch_resolvers(self) -> None:
+        """Test that batch resolvers are called once per kind or level of partials."""
+
+        class Registry:
+            def __init__(self, data: dict[str, Any]) -> None:
+                self.data = data
+                self.batches: list[list[str]] = []
+
+            async def __call__(self, name: str) -> Any:
+                raise AssertionError(f'{name} resolved alone')
+
+            async def resolve_many(self, names: list[str]) -> dict[str, Any]:
+                self.batches.append(sorted(names))
+                return {name: self.data[name] for name in names if name in self.data}
+
+        tools = Registry({name: ToolDefinition(name=name, inputSchema={}) for name in ('a', 'b', 'c')})
+        partials = Registry({'header': '{{> logo}}', 'logo': 'L', 'footer': 'F'})
+        schemas = Registry({name: {'type': 'string'} for name in ('User', 'Tag', 'Result')})
+        dotprompt = Dotprompt(tool_resolver=tools, partial_resolver=partials, schema_resolver=schemas)
+
+        compiled = await dotprompt.compile(
+            '---\n'
+            'tools: [a, b, c]\n'
+            'input:\n  schema:\n    user: User\n    tags(array): Tag\n'
+            'output:\n  schema: Result\n'
+            '---\n'
+            '{{> header}}{{> footer}}'
+        )
+        rendered = await compiled(DataArgument[dict[str, Any]]())
+
+        assert [tool.name for tool in compiled.metadata.tool_defs or []] == ['a', 'b', 'c']
+        assert compiled.metadata.output is not None
+        assert compiled.metadata.output.schema == {'type': 'string'}
+        assert rendered.messages[0].content[0].text == 'LF'  # type: ignore[union-attr]
+        assert tools.batches == [['a', 'b', 'c']]
+        assert partials.batches == [['footer', 'header'], ['logo']]
+        assert schemas.batches == [['Result', 'Tag', 'User']]
+
+
+def test_estimate_size() -> None:
+    """Test that the size estimate counts strings and stops at the limit."""
+    context = {'a': 'abc', 'b': [1, 'de'], 'c': None}
+
+    assert _estimate_size(context, 100) == 9
+    assert _estimate_size({'docs': ['x' * 50] * 1000}, 100) < 1000
+
 
 @patch('dotpromptz.dotprompt.parse_document')
 def test_parse(mock_parse_document: Mock, mock_handlebars: Mock) -> None:
@@ -226,6 +490,16 @@ def test_chainable_interface(mock_handlebars: Mock) -> None:
         ),
         # Partial with dash and underscore.
         ('Hello {{> header-component_name}}', {'header-component_name'}),
+        # Partial with arguments.
+        ('{{> card title=name}}', {'card'}),
+        # Block partial.
+        ('{{#> layout}}body{{/layout}}', {'layout'}),
+        # Partial nested in a block.
+        ('{{#each items}}{{> item}}{{/each}}', {'item'}),
+        # Inline partials are defined by the template itself.
+        ('{{#*inline "row"}}x{{/inline}}{{> row}}{{> footer}}', {'footer'}),
+        # Syntax errors surface when rendering.
+        ('{{#if}}{{> header}}', set()),
     ],
 )
 def test_identify_partials(template: str, expected: set[str]) -> None:
@@ -295,6 +569,20 @@ class TestMergeMetadata(IsolatedAsyncioTestCase):
         # Description should NOT be None because merge.model_dump excludes None
         self.assertEqual(result.description, expected.description)
 
+    async def test_merge_shares_validated_fields(self) -> None:
+        """Test that merging keeps the validated tool definitions as they are."""
+        tool = ToolDefinition(name='search', inputSchema={'type': 'object'})
+        base = PromptMetadata[dict[str, Any]](tool_defs=[tool], config={'temp': 0.5})
+        merge = ParsedPrompt[dict[str, Any]](template='Hi', model='m')
+
+        result = _merge_metadata(base, merge)
+
+        self.assertIs(result.tool_defs[0], tool)  # type: ignore[index]
+        self.assertIsNot(result.tool_defs, base.tool_defs)
+        self.assertEqual(result.model, 'm')
+        self.assertEqual(result.config, {'temp': 0.5})
+        self.assertEqual(result.model_extra, {'template': 'Hi'})
+
 
 class TestResolveTools(IsolatedAsyncioTestCase):
     """Test the resolve_tools method."""
@@ -340,5 +340,27 @@ class TestExtractDescription(unittest.TestCase):
         self.assertEqual(result, expected)
 
 
+class TestPicoschemaReferences(unittest.TestCase):
+    """Picoschema reference collection tests."""
+
+    def test_named_schemas(self) -> None:
+        """Test collecting the named schemas of a definition."""
+        schema = {
+            'user': 'User, the author',
+            'tags(array)': 'Tag',
+            'meta?(object)': {'owner': 'Owner', 'count': 'integer'},
+            'status(enum)': ['Open', 'Closed'],
+            '(*)': 'Extra',
+        }
+        self.assertEqual(picoschema.picoschema_references(schema), {'User', 'Tag', 'Owner', 'Extra'})
+        self.assertEqual(picoschema.picoschema_references('Result'), {'Result'})
+
+    def test_no_named_schemas(self) -> None:
+        """Test definitions that refer to no named schemas."""
+        self.assertEqual(picoschema.picoschema_references(None), set())
+        self.assertEqual(picoschema.picoschema_references('string'), set())
+        self.assertEqual(picoschema.picoschema_references({'type': 'object', 'properties': {}}), set())
+
+
 if __name__ == '__main__':
     unittest.main()
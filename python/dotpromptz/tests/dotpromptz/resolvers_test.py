@@ -34,15 +34,53 @@
 *   Successful resolution to the correct type via the core `resolve` function.
 *   Correct propagation of errors (e.g., `ResolverFailedError`, `LookupError`)
     from the core `resolve` function.
+
+## `ResolverCache`
+
+*   Expiry, negative caching, LRU eviction and stale-while-revalidate, using
+    a fake resolver that counts its calls and a fake clock.
+*   Background refreshes on both the asyncio and trio backends.
+*   Deadlines tracking the earliest expiry of the results a computation used.
+
+## `non_blocking` and `with_thread_limiter`
+
+*   Marked resolvers are called on the event loop thread.
+*   Limited resolvers never run in more threads than their limiter allows.
+
+## `resolve_many`
+
+*   Batch resolvers are called once for all names, and once for the names
+    missing from the cache.
+*   Missing names raise `LookupError` unless `missing_ok` is set.
+*   Resolvers without `resolve_many` are called once per name.
+*   Both kinds of resolvers raise the same errors for missing names and
+    failures.
 """
 
 import asyncio
+import importlib.util
+import threading
+import time
 import unittest
 from collections.abc import Awaitable
 from typing import Any
 
+import anyio
+import pytest
+
 from dotpromptz.errors import ResolverFailedError
-from dotpromptz.resolvers import resolve, resolve_json_schema, resolve_partial, resolve_tool
+from dotpromptz.resolvers import (
+    CachePolicy,
+    ResolverCache,
+    non_blocking,
+    resolve,
+    resolve_json_schema,
+    resolve_many,
+    resolve_partial,
+    resolve_tool,
+    supports_batches,
+    with_thread_limiter,
+)
 from dotpromptz.typing import JsonSchema, ToolDefinition
 
 
@@ -252,5 +290,328 @@ class TestResolveJsonSchema(unittest.IsolatedAsyncioTestCase):
             await resolve_json_schema('missing_schema', resolver)
 
 
+class CountingResolver:
+    """Fake resolver that counts its calls."""
+
+    def __init__(self, data: dict[str, Any], error: Exception | None = None) -> None:
+        """Initialize the fake resolver."""
+        self.data = data
+        self.error = error
+        self.calls: list[str] = []
+
+    async def __call__(self, name: str) -> Any:
+        """Return the object for a name and count the call."""
+        self.calls.append(name)
+        await anyio.sleep(0)
+        if self.error:
+            raise self.error
+        return self.data.get(name)
+
+
+class FakeClock:
+    """Clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        """Initialize the clock at 0."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+class TestResolverCache(unittest.IsolatedAsyncioTestCase):
+    """Tests for the resolver cache."""
+
+    def setUp(self) -> None:
+        """Create a cache with a fake clock."""
+        self.clock = FakeClock()
+        self.cache = ResolverCache(
+            max_entries=2,
+            policies={'partial': CachePolicy(ttl=10, negative_ttl=5, stale_ttl=10)},
+            clock=self.clock,
+        )
+
+    async def test_hits_until_expired(self) -> None:
+        """Test that a resolved object is reused until its TTL passes."""
+        resolver = CountingResolver({'a': 'A'})
+
+        self.assertEqual(await resolve_partial('a', resolver, self.cache), 'A')
+        self.clock.now = 9
+        self.assertEqual(await resolve_partial('a', resolver, self.cache), 'A')
+        self.clock.now = 25
+        self.assertEqual(await resolve_partial('a', resolver, self.cache), 'A')
+
+        self.assertEqual(resolver.calls, ['a', 'a'])
+        stats = self.cache.stats('partial')
+        self.assertEqual((stats.hits, stats.misses), (1, 2))
+
+    async def test_negative_caching(self) -> None:
+        """Test that misses are cached for the negative TTL."""
+        resolver = CountingResolver({})
+
+        for _ in range(2):
+            with self.assertRaisesRegex(LookupError, "partial resolver for 'x' returned None"):
+                await resolve_partial('x', resolver, self.cache)
+        self.clock.now = 6
+        resolver.data['x'] = 'X'
+
+        self.assertEqual(await resolve_partial('x', resolver, self.cache), 'X')
+        self.assertEqual(resolver.calls, ['x', 'x'])
+        self.assertEqual(self.cache.stats().negative_hits, 1)
+
+    async def test_failures_are_not_cached(self) -> None:
+        """Test that resolver errors call the resolver again."""
+        resolver = CountingResolver({}, error=RuntimeError('down'))
+
+        for _ in range(2):
+            with self.assertRaises(ResolverFailedError):
+                await resolve_tool('t', resolver, self.cache)
+
+        self.assertEqual(len(resolver.calls), 2)
+        self.assertEqual(len(self.cache), 0)
+
+    async def test_evicts_least_recently_used(self) -> None:
+        """Test that the size bound evicts the least recently used entry."""
+        resolver = CountingResolver({'a': 'A', 'b': 'B', 'c': 'C'})
+
+        for name in ['a', 'b', 'a', 'c', 'a', 'b']:
+            await resolve_partial(name, resolver, self.cache)
+
+        self.assertEqual(resolver.calls, ['a', 'b', 'c', 'b'])
+        self.assertEqual(self.cache.stats('partial').evictions, 2)
+
+    async def test_stale_while_revalidate(self) -> None:
+        """Test that an expired object is returned while it is refreshed."""
+        resolver = CountingResolver({'a': 'old'})
+        await resolve_partial('a', resolver, self.cache)
+        resolver.data['a'] = 'new'
+        self.clock.now = 15
+
+        self.assertEqual(await resolve_partial('a', resolver, self.cache), 'old')
+        self.assertEqual(await resolve_partial('a', resolver, self.cache), 'old')
+        await asyncio.gather(*self.cache._tasks)
+
+        self.assertEqual(await resolve_partial('a', resolver, self.cache), 'new')
+        self.assertEqual(resolver.calls, ['a', 'a'])
+        stats = self.cache.stats('partial')
+        self.assertEqual((stats.stale_hits, stats.refreshes, stats.hits), (2, 1, 1))
+
+    async def test_concurrent_lookups_share_one_call(self) -> None:
+        """Test that concurrent lookups of a name call the resolver once."""
+        resolver = CountingResolver({'s': mock_json_schema})
+
+        results = await asyncio.gather(*(resolve_json_schema('s', resolver, self.cache) for _ in range(3)))
+
+        self.assertEqual(results, [mock_json_schema] * 3)
+        self.assertEqual(resolver.calls, ['s'])
+
+    async def test_track_expiry(self) -> None:
+        """Test that a deadline tracks the earliest expiry of the results used."""
+        resolver = CountingResolver({'a': 'A'})
+        await resolve_partial('a', resolver, self.cache)
+        self.clock.now = 4
+
+        with self.cache.track_expiry() as deadline:
+            await resolve_partial('a', resolver, self.cache)
+            with self.assertRaises(LookupError):
+                await resolve_partial('missing', resolver, self.cache)
+        await resolve_partial('b', CountingResolver({'b': 'B'}), self.cache)
+
+        self.assertEqual(deadline.at, 9)
+        self.assertFalse(deadline.passed())
+        self.clock.now = 9
+        self.assertTrue(deadline.passed())
+
+    async def test_resolvers_are_cached_separately(self) -> None:
+        """Test that different resolvers do not share results."""
+        first = CountingResolver({'a': 'first'})
+        second = CountingResolver({'a': 'second'})
+
+        self.assertEqual(await resolve_partial('a', first, self.cache), 'first')
+        self.assertEqual(await resolve_partial('a', second, self.cache), 'second')
+
+        self.cache.invalidate('partial', 'a')
+        self.assertEqual(len(self.cache), 0)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    'anyio_backend',
+    [
+        'asyncio',
+        pytest.param(
+            'trio', marks=pytest.mark.skipif(importlib.util.find_spec('trio') is None, reason='trio is not installed')
+        ),
+    ],
+)
+async def test_stale_while_revalidate_backends(anyio_backend: str) -> None:
+    """Test that expired objects are refreshed in the background on each backend."""
+    clock = FakeClock()
+    cache = ResolverCache(policies={'partial': CachePolicy(ttl=10, stale_ttl=10)}, clock=clock)
+    resolver = CountingResolver({'a': 'old'})
+    await resolve_partial('a', resolver, cache)
+    resolver.data['a'] = 'new'
+    clock.now = 15
+
+    assert await resolve_partial('a', resolver, cache) == 'old'
+    for done in list(cache._refreshing):
+        await done.wait()
+
+    assert await resolve_partial('a', resolver, cache) == 'new'
+    assert resolver.calls == ['a', 'a']
+    assert cache.stats('partial').refreshes == 1
+
+
+class TestResolverThreads(unittest.IsolatedAsyncioTestCase):
+    """Tests for choosing where sync resolvers run."""
+
+    async def test_non_blocking_resolver_runs_inline(self) -> None:
+        """Test that a non-blocking resolver is called on the event loop thread."""
+        threads: list[int] = []
+
+        def resolver(name: str) -> str:
+            threads.append(threading.get_ident())
+            return name.upper()
+
+        self.assertEqual(await resolve('a', 'test', non_blocking(resolver)), 'A')
+        self.assertEqual(await resolve('b', 'test', resolver), 'B')
+
+        self.assertEqual(threads[0], threading.get_ident())
+        self.assertNotEqual(threads[1], threading.get_ident())
+
+    async def test_non_blocking_resolver_errors(self) -> None:
+        """Test that non-blocking resolvers report misses and failures as usual."""
+        with self.assertRaises(LookupError):
+            await resolve_partial('missing', non_blocking({}.get))
+        with self.assertRaises(ResolverFailedError):
+            await resolve_tool('bad', non_blocking(MockSyncResolver({}, error=KeyError('bad'))))
+
+    async def test_thread_limiter_bounds_concurrency(self) -> None:
+        """Test that a limited resolver runs in at most as many threads as allowed."""
+        lock = threading.Lock()
+        running = 0
+        most = 0
+
+        def resolver(name: str) -> str:
+            nonlocal running, most
+            with lock:
+                running += 1
+                most = max(most, running)
+            time.sleep(0.01)
+            with lock:
+                running -= 1
+            return name
+
+        limited = with_thread_limiter(resolver, 2)
+        results = await asyncio.gather(*(resolve(str(i), 'test', limited) for i in range(6)))
+
+        self.assertEqual(results, [str(i) for i in range(6)])
+        self.assertEqual(most, 2)
+
+
+class FakeRegistry:
+    """Registry resolver that counts its round trips."""
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        """Initialize the registry with its objects."""
+        self.data = data
+        self.round_trips = 0
+
+    async def __call__(self, name: str) -> Any:
+        """Resolve one object."""
+        self.round_trips += 1
+        return self.data.get(name)
+
+    async def resolve_many(self, names: list[str]) -> dict[str, Any]:
+        """Resolve several objects in one round trip."""
+        self.round_trips += 1
+        return {name: self.data[name] for name in names if name in self.data}
+
+
+class TestResolveMany(unittest.IsolatedAsyncioTestCase):
+    """Tests for the resolve_many function."""
+
+    async def test_batch_resolver_is_called_once(self) -> None:
+        """Test that a batch resolver resolves all names in one round trip."""
+        registry = FakeRegistry({'a': 1, 'b': 2, 'c': 3})
+
+        self.assertTrue(supports_batches(registry))
+        self.assertTrue(supports_batches(non_blocking(registry)))
+        self.assertEqual(await resolve_many(['c', 'a', 'c'], 'test', registry), {'c': 3, 'a': 1})
+        self.assertEqual(registry.round_trips, 1)
+
+    async def test_batch_resolver_with_cache(self) -> None:
+        """Test that only names missing from the cache are requested."""
+        registry = FakeRegistry({'a': 1, 'b': 2})
+        cache = ResolverCache()
+
+        self.assertEqual(await resolve_many(['a'], 'test', registry, cache), {'a': 1})
+        self.assertEqual(
+            await resolve_many(['a', 'b', 'x'], 'test', registry, cache, missing_ok=True), {'a': 1, 'b': 2}
+        )
+        self.assertEqual(
+            await resolve_many(['a', 'b', 'x'], 'test', registry, cache, missing_ok=True), {'a': 1, 'b': 2}
+        )
+
+        self.assertEqual(registry.round_trips, 2)
+        self.assertEqual(cache.stats('test').hits, 3)
+        self.assertEqual(cache.stats('test').negative_hits, 1)
+
+    async def test_missing_names(self) -> None:
+        """Test that missing names raise LookupError unless missing_ok is set."""
+        registry = FakeRegistry({'a': 1})
+
+        with self.assertRaises(LookupError):
+            await resolve_many(['a', 'x'], 'test', registry)
+        self.assertEqual(await resolve_many(['a', 'x'], 'test', registry, missing_ok=True), {'a': 1})
+
+    async def test_batch_resolver_errors(self) -> None:
+        """Test that failures and invalid results of a batch are reported."""
+
+        class FailingRegistry(FakeRegistry):
+            async def resolve_many(self, names: list[str]) -> dict[str, Any]:
+                raise KeyError(names[0])
+
+        class ListRegistry(FakeRegistry):
+            async def resolve_many(self, names: list[str]) -> Any:
+                return list(names)
+
+        with self.assertRaises(ResolverFailedError):
+            await resolve_many(['a'], 'test', FailingRegistry({}))
+        with self.assertRaises(TypeError):
+            await resolve_many(['a'], 'test', ListRegistry({}))
+
+    async def test_resolver_without_batches(self) -> None:
+        """Test that other resolvers are called once per name."""
+        resolver = CountingResolver({'a': 1, 'b': 2})
+
+        self.assertFalse(supports_batches(resolver))
+        self.assertEqual(await resolve_many(['b', 'a', 'x'], 'test', resolver, missing_ok=True), {'b': 2, 'a': 1})
+        self.assertEqual(sorted(resolver.calls), ['a', 'b', 'x'])
+
+    async def test_missing_names_raise_the_same_error(self) -> None:
+        """Test that batch and per-name resolvers raise LookupError alike."""
+        data = {'a': 1}
+
+        for resolver in [FakeRegistry(data), CountingResolver(data)]:
+            with self.subTest(batches=supports_batches(resolver)):
+                with self.assertRaisesRegex(LookupError, "test resolver for 'x' returned None"):
+                    await resolve_many(['a', 'x'], 'test', resolver)
+
+    async def test_failures_raise_the_same_error(self) -> None:
+        """Test that batch and per-name resolvers raise ResolverFailedError alike."""
+
+        class FailingRegistry(FakeRegistry):
+            async def resolve_many(self, names: list[str]) -> dict[str, Any]:
+                raise KeyError(names[0])
+
+        error = KeyError('a')
+        for resolver in [FailingRegistry({}), CountingResolver({}, error=error)]:
+            with self.subTest(batches=supports_batches(resolver)):
+                with self.assertRaises(ResolverFailedError):
+                    await resolve_many(['a', 'b'], 'test', resolver)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,421 @@
+// Copyright 2025 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+//
+// SPDX-License-Identifier: Apache-2.0
+
+//! Static analysis of parsed templates.
+
+use handlebars::Handlebars;
+use handlebars::template::{
+    DecoratorTemplate, HelperTemplate, Parameter, Template, TemplateElement,
+};
+use serde_json::Value;
+use std::collections::{BTreeSet, HashSet};
+
+/// Checks whether rendering a template may call one of a set of helpers.
+///
+/// The template is walked together with every statically named partial it
+/// includes (transitively), inline partial bodies, partial blocks and
+/// subexpressions. Partials selected dynamically at render time cannot be
+/// followed and are treated as not calling any of the helpers.
+///
+/// # Arguments
+///
+/// * `registry` - Registry used to look up partials.
+/// * `template` - The parsed template to inspect.
+/// * `is_target` - Predicate returning `true` for helper names of interest.
+///
+/// # Returns
+///
+/// `true` if any expression or block in the template or its partials names a
+/// helper accepted by `is_target`.
+pub(crate) fn references_helpers(
+    registry: &Handlebars<'_>,
+    template: &Template,
+    is_target: impl Fn(&str) -> bool,
+) -> bool {
+    let mut scan = HelperScan {
+        registry,
+        is_target,
+        visited_partials: HashSet::new(),
+    };
+    scan.template(template)
+}
+
+struct HelperScan<'a, 'reg, F> {
+    registry: &'a Handlebars<'reg>,
+    is_target: F,
+    visited_partials: HashSet<String>,
+}
+
+impl<F: Fn(&str) -> bool> HelperScan<'_, '_, F> {
+    fn template(&mut self, template: &Template) -> bool {
+        template.elements.iter().any(|e| self.element(e))
+    }
+
+    fn optional_template(&mut self, template: Option<&Template>) -> bool {
+        template.is_some_and(|t| self.template(t))
+    }
+
+    fn element(&mut self, element: &TemplateElement) -> bool {
+        match element {
+            TemplateElement::Expression(h)
+            | TemplateElement::HtmlExpression(h)
+            | TemplateElement::HelperBlock(h) => self.helper(h),
+            TemplateElement::DecoratorExpression(d) | TemplateElement::DecoratorBlock(d) => {
+                self.decorator(d)
+            }
+            TemplateElement::PartialExpression(d) | TemplateElement::PartialBlock(d) => {
+                self.partial(d)
+            }
+            _ => false,
+        }
+    }
+
+    fn helper(&mut self, h: &HelperTemplate) -> bool {
+        h.name.as_name().is_some_and(|name| (self.is_target)(name))
+            || self.parameters(h.params.iter().chain(h.hash.values()))
+            || self.optional_template(h.template.as_ref())
+            || self.optional_template(h.inverse.as_ref())
+    }
+
+    fn decorator(&mut self, d: &DecoratorTemplate) -> bool {
+        self.parameters(d.params.iter().chain(d.hash.values()))
+            || self.optional_template(d.template.as_ref())
+    }
+
+    fn partial(&mut self, d: &DecoratorTemplate) -> bool {
+        if self.decorator(d) {
+            return true;
+        }
+        let Some(name) = d.name.as_name() else {
+            return false;
+        };
+        if !self.visited_partials.insert(name.to_string()) {
+            return false;
+        }
+        let registry = self.registry;
+        registry
+            .get_template(name)
+            .is_some_and(|partial| self.template(partial))
+    }
+
+    fn parameters<'p>(&mut self, mut params: impl Iterator<Item = &'p Parameter>) -> bool {
+        params.any(|p| match p {
+            Parameter::Subexpression(subexpr) => self.element(&subexpr.element),
+            _ => false,
+        })
+    }
+}
+
+/// What a parsed template uses, as written in its source.
+#[derive(Debug, Default, PartialEq)]
+pub(crate) struct TemplateSummary {
+    /// Partials included by name, excluding the template's inline partials.
+    pub partials: BTreeSet<String>,
+    /// Inline partials defined with `{{#*inline "name"}}`.
+    pub inline_partials: BTreeSet<String>,
+    /// Whether a partial is selected at render time, e.g. `{{> (name)}}`.
+    pub dynamic_partials: bool,
+    /// Paths read from the context or data, relative to their block.
+    pub variables: BTreeSet<String>,
+    /// Helpers called, including block helpers such as `if` and `each`.
+    pub helpers: BTreeSet<String>,
+    /// Deepest nesting of blocks; 0 for a template without blocks.
+    pub depth: usize,
+    /// Number of template elements, including raw text.
+    pub node_count: usize,
+}
+
+/// Summarizes the partials, variables and helpers used by a template.
+///
+/// Unlike `references_helpers`, included partials are not followed, so the
+/// summary only describes the template itself.
+///
+/// # Arguments
+///
+/// * `template` - The parsed template to inspect.
+/// * `is_helper` - Predicate returning `true` for registered helper names.
+///   Expressions without arguments, such as `{{name}}`, are reported as
+///   helpers if it accepts the name and as variables otherwise.
+///
+/// # Returns
+///
+/// The summary of the template.
+pub(crate) fn summarize(template: &Template, is_helper: impl Fn(&str) -> bool) -> TemplateSummary {
+    let mut summarizer = Summarizer {
+        summary: TemplateSummary::default(),
+        is_helper,
+    };
+    summarizer.template(template, 0);
+
+    let mut summary = summarizer.summary;
+    let inline = &summary.inline_partials;
+    summary.partials.retain(|name| !inline.contains(name));
+    summary
+}
+
+struct Summarizer<F> {
+    summary: TemplateSummary,
+    is_helper: F,
+}
+
+impl<F: Fn(&str) -> bool> Summarizer<F> {
+    fn template(&mut self, template: &Template, depth: usize) {
+        self.summary.depth = self.summary.depth.max(depth);
+        for element in &template.elements {
+            self.element(element, depth);
+        }
+    }
+
+    fn optional_template(&mut self, template: Option<&Template>, depth: usize) {
+        if let Some(template) = template {
+            self.template(template, depth);
+        }
+    }
+
+    fn element(&mut self, element: &TemplateElement, depth: usize) {
+        self.summary.node_count += 1;
+        match element {
+            TemplateElement::Expression(h) | TemplateElement::HtmlExpression(h) => {
+                let name_only = h.params.is_empty() && h.hash.is_empty();
+                match h.name.as_name() {
+                    Some(name) if name_only && !(self.is_helper)(name) => self.variable(name),
+                    _ => self.helper(h, depth),
+                }
+            }
+            TemplateElement::HelperBlock(h) => self.helper(h, depth),
+            TemplateElement::DecoratorExpression(d) | TemplateElement::DecoratorBlock(d) => {
+                if d.name.as_name() == Some("inline") {
+                    if let Some(Parameter::Literal(Value::String(name))) = d.params.first() {
+                        self.summary.inline_partials.insert(name.clone());
+                    }
+                }
+                self.parameters(d.params.iter().chain(d.hash.values()), depth);
+                self.optional_template(d.template.as_ref(), depth + 1);
+            }
+            TemplateElement::PartialExpression(d) | TemplateElement::PartialBlock(d) => {
+                self.partial(d, depth);
+            }
+            _ => {}
+        }
+    }
+
+    fn helper(&mut self, h: &HelperTemplate, depth: usize) {
+        match &h.name {
+            Parameter::Subexpression(subexpr) => self.element(&subexpr.element, depth),
+            name => {
+                if let Some(name) = name.as_name() {
+                    self.summary.helpers.insert(name.to_string());
+                }
+            }
+        }
+        self.parameters(h.params.iter().chain(h.hash.values()), depth);
+        self.optional_template(h.template.as_ref(), depth + 1);
+        self.optional_template(h.inverse.as_ref(), depth + 1);
+    }
+
+    fn partial(&mut self, d: &DecoratorTemplate, depth: usize) {
+        match &d.name {
+            Parameter::Literal(Value::String(name)) => {
+                self.summary.partials.insert(name.clone());
+            }
+            Parameter::Subexpression(subexpr) => {
+                self.summary.dynamic_partials = true;
+                self.element(&subexpr.element, depth);
+            }
+            name => match name.as_name() {
+                Some("@partial-block") => {}
+                Some(name) => {
+                    self.summary.partials.insert(name.to_string());
+                }
+                None => self.summary.dynamic_partials = true,
+            },
+        }
+        self.parameters(d.params.iter().chain(d.hash.values()), depth);
+        self.optional_template(d.template.as_ref(), depth + 1);
+    }
+
+    fn parameters<'p>(&mut self, params: impl Iterator<Item = &'p Parameter>, depth: usize) {
+        for param in params {
+            match param {
+                Parameter::Subexpression(subexpr) => self.element(&subexpr.element, depth),
+                Parameter::Path(_) => {
+                    if let Some(name) = param.as_name() {
+                        self.variable(name);
+                    }
+                }
+                _ => {}
+            }
+        }
+    }
+
+    fn variable(&mut self, path: &str) {
+        if path != "this" && path != "." {
+            self.summary.variables.insert(path.to_string());
+        }
+    }
+}
+
+#[cfg(test)]
+mod references_helpers_tests {
+    use super::*;
+
+    fn references_python(registry: &Handlebars<'_>, source: &str) -> bool {
+        let template = Template::compile(source).unwrap();
+        references_helpers(registry, &template, |name| name == "python")
+    }
+
+    #[test]
+    fn with_plain_template_returns_false() {
+        let registry = Handlebars::new();
+
+        assert!(!references_python(
+            &registry,
+            "{{#each items}}{{this}}{{/each}}{{#if x}}{{y}}{{/if}}"
+        ));
+    }
+
+    #[test]
+    fn with_helper_expression_returns_true() {
+        let registry = Handlebars::new();
+
+        assert!(references_python(&registry, "Hi {{python name}}"));
+        assert!(references_python(&registry, "Hi {{{python name}}}"));
+        assert!(references_python(&registry, "{{#python}}x{{/python}}"));
+    }
+
+    #[test]
+    fn with_helper_in_nested_block_returns_true() {
+        let registry = Handlebars::new();
+
+        assert!(references_python(
+            &registry,
+            "{{#if a}}{{else}}{{#each b}}{{python this}}{{/each}}{{/if}}"
+        ));
+    }
+
+    #[test]
+    fn with_helper_in_subexpression_returns_true() {
+        let registry = Handlebars::new();
+
+        assert!(references_python(&registry, "{{#if (python a)}}x{{/if}}"));
+        assert!(references_python(&registry, "{{lookup a key=(python b)}}"));
+    }
+
+    #[test]
+    fn with_helper_in_partial_returns_true() {
+        let mut registry = Handlebars::new();
+        registry
+            .register_partial("inner", "{{python name}}")
+            .unwrap();
+        registry.register_partial("outer", "<{{> inner}}>").unwrap();
+
+        assert!(references_python(&registry, "{{> outer}}"));
+    }
+
+    #[test]
+    fn with_recursive_partial_terminates() {
+        let mut registry = Handlebars::new();
+        registry
+            .register_partial("tree", "{{#each children}}{{> tree}}{{/each}}")
+            .unwrap();
+
+        assert!(!references_python(&registry, "{{> tree}}"));
+    }
+
+    #[test]
+    fn with_helper_in_inline_partial_returns_true() {
+        let registry = Handlebars::new();
+
+        assert!(references_python(
+            &registry,
+            "{{#*inline \"item\"}}{{python this}}{{/inline}}{{> item}}"
+        ));
+    }
+}
+
+#[cfg(test)]
+mod summarize_tests {
+    use super::*;
+
+    fn summary(source: &str) -> TemplateSummary {
+        summarize(&Template::compile(source).unwrap(), |name| {
+            name == "history"
+        })
+    }
+
+    fn set(names: &[&str]) -> BTreeSet<String> {
+        names.iter().map(|name| name.to_string()).collect()
+    }
+
+    #[test]
+    fn with_plain_text_returns_empty_summary() {
+        let summary = summary("Hello world");
+
+        assert!(summary.partials.is_empty());
+        assert!(summary.variables.is_empty());
+        assert!(summary.helpers.is_empty());
+        assert_eq!(summary.depth, 0);
+        assert_eq!(summary.node_count, 1);
+    }
+
+    #[test]
+    fn with_variables_and_helpers_returns_them() {
+        let summary = summary(
+            "{{name}} {{{raw.html}}} {{history}} {{json doc indent=2}} \
+             {{#each items as |item|}}{{#if (eq item.id @state.id)}}{{item.name}}{{/if}}{{/each}}",
+        );
+
+        assert_eq!(
+            summary.variables,
+            set(&[
+                "@state.id",
+                "doc",
+                "item.id",
+                "item.name",
+                "items",
+                "name",
+                "raw.html"
+            ])
+        );
+        assert_eq!(
+            summary.helpers,
+            set(&["each", "eq", "history", "if", "json"])
+        );
+        assert_eq!(summary.depth, 2);
+    }
+
+    #[test]
+    fn with_partials_returns_static_names() {
+        let summary = summary(
+            "{{> header title=name}}{{#> layout}}body{{/layout}}\
+             {{#*inline \"row\"}}{{this}}{{/inline}}{{> row}}",
+        );
+
+        assert_eq!(summary.partials, set(&["header", "layout"]));
+        assert_eq!(summary.inline_partials, set(&["row"]));
+        assert!(!summary.dynamic_partials);
+        assert_eq!(summary.variables, set(&["name"]));
+    }
+
+    #[test]
+    fn with_dynamic_partial_reports_it() {
+        let summary = summary("{{> (lookup . \"which\")}}");
+
+        assert!(summary.partials.is_empty());
+        assert!(summary.dynamic_partials);
+        assert_eq!(summary.helpers, set(&["lookup"]));
+    }
+}
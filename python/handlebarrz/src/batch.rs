@@ -0,0 +1,297 @@
+// Copyright 2025 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+//
+// SPDX-License-Identifier: Apache-2.0
+
+//! Rendering many outputs in a single call.
+
+use crate::budget::{self, Budget, RenderFailure};
+use crate::data;
+use handlebars::{Context, Handlebars};
+use serde_json::Value;
+use std::thread;
+
+/// Renders one registered template against each of the given contexts.
+///
+/// # Arguments
+///
+/// * `registry` - Registry holding the template.
+/// * `name` - Name of the template.
+/// * `contexts` - Contexts to render the template with.
+/// * `runtime_data` - Data exposed as `@` variables to every render.
+/// * `budget` - Limits of each render.
+/// * `parallel` - Whether to spread the renders over all available cores.
+///
+/// # Returns
+///
+/// Rendered strings in the order of `contexts`.
+///
+/// # Errors
+///
+/// The failure of the first context that failed to render, naming its index.
+pub(crate) fn render_contexts(
+    registry: &Handlebars<'_>,
+    name: &str,
+    contexts: &[Context],
+    runtime_data: &Value,
+    budget: &Budget,
+    parallel: bool,
+) -> Result<Vec<String>, RenderFailure> {
+    map_ordered(contexts, runtime_data, parallel, |i, ctx| {
+        budget::render(registry, name, ctx, budget)
+            .map_err(|e| e.context(format_args!("Failed to render context {i}")))
+    })
+}
+
+/// Renders each of the given registered templates against one context.
+///
+/// # Arguments
+///
+/// * `registry` - Registry holding the templates.
+/// * `names` - Names of the templates.
+/// * `ctx` - Context to render every template with.
+/// * `runtime_data` - Data exposed as `@` variables to every render.
+/// * `budget` - Limits of each render.
+/// * `parallel` - Whether to spread the renders over all available cores.
+///
+/// # Returns
+///
+/// Rendered strings in the order of `names`.
+///
+/// # Errors
+///
+/// The failure of the first template that failed to render, naming it.
+pub(crate) fn render_templates(
+    registry: &Handlebars<'_>,
+    names: &[String],
+    ctx: &Context,
+    runtime_data: &Value,
+    budget: &Budget,
+    parallel: bool,
+) -> Result<Vec<String>, RenderFailure> {
+    map_ordered(names, runtime_data, parallel, |_, name| {
+        budget::render(registry, name, ctx, budget)
+            .map_err(|e| e.context(format_args!("Failed to render template {name}")))
+    })
+}
+
+/// Applies `render` to every item, keeping the results in input order.
+///
+/// When `parallel` is set, the items are split into one contiguous chunk per
+/// available core and each chunk is rendered on a scoped thread. The runtime
+/// data is installed on every thread that renders.
+fn map_ordered<T: Sync>(
+    items: &[T],
+    runtime_data: &Value,
+    parallel: bool,
+    render: impl Fn(usize, &T) -> Result<String, RenderFailure> + Sync,
+) -> Result<Vec<String>, RenderFailure> {
+    let threads = if parallel {
+        thread::available_parallelism()
+            .map_or(1, |n| n.get())
+            .min(items.len())
+    } else {
+        1
+    };
+    let render_chunk = |offset: usize, chunk: &[T]| {
+        data::with_runtime_data(runtime_data, || {
+            chunk
+                .iter()
+                .enumerate()
+                .map(|(i, item)| render(offset + i, item))
+                .collect::<Result<Vec<_>, _>>()
+        })
+    };
+    if threads <= 1 {
+        return render_chunk(0, items);
+    }
+
+    let chunk_size = items.len().div_ceil(threads);
+    thread::scope(|scope| {
+        let handles: Vec<_> = items
+            .chunks(chunk_size)
+            .enumerate()
+            .map(|(i, chunk)| scope.spawn(move || render_chunk(i * chunk_size, chunk)))
+            .collect();
+
+        let mut results = Vec::with_capacity(items.len());
+        for handle in handles {
+            let chunk = handle
+                .join()
+                .unwrap_or_else(|e| std::panic::resume_unwind(e))?;
+            results.extend(chunk);
+        }
+        Ok(results)
+    })
+}
+
+#[cfg(test)]
+mod render_contexts_tests {
+    use super::*;
+    use serde_json::json;
+
+    fn registry() -> Handlebars<'static> {
+        let mut handlebars = Handlebars::new();
+        handlebars
+            .register_template_string("greeting", "Hello {{name}}!")
+            .unwrap();
+        handlebars.set_strict_mode(true);
+        handlebars
+    }
+
+    fn contexts(count: usize) -> Vec<Context> {
+        (0..count)
+            .map(|i| Context::from(json!({"name": i})))
+            .collect()
+    }
+
+    #[test]
+    fn with_sequential_render_keeps_order() {
+        let rendered = render_contexts(
+            &registry(),
+            "greeting",
+            &contexts(3),
+            &Value::Null,
+            &Budget::default(),
+            false,
+        )
+        .unwrap();
+
+        assert_eq!(rendered, ["Hello 0!", "Hello 1!", "Hello 2!"]);
+    }
+
+    #[test]
+    fn with_parallel_render_keeps_order() {
+        let expected: Vec<_> = (0..1000).map(|i| format!("Hello {i}!")).collect();
+
+        let rendered = render_contexts(
+            &registry(),
+            "greeting",
+            &contexts(1000),
+            &Value::Null,
+            &Budget::default(),
+            true,
+        )
+        .unwrap();
+
+        assert_eq!(rendered, expected);
+    }
+
+    #[test]
+    fn with_no_contexts_returns_empty() {
+        assert!(
+            render_contexts(
+                &registry(),
+                "greeting",
+                &[],
+                &Value::Null,
+                &Budget::default(),
+                true
+            )
+            .unwrap()
+            .is_empty()
+        );
+    }
+
+    #[test]
+    fn with_runtime_data_renders_on_every_thread() {
+        let mut handlebars = registry();
+        handlebars.register_helper(data::DATA_HELPER, Box::new(data::DataHelper {}));
+        let mut template = handlebars::Template::compile("{{name}}{{@suffix}}").unwrap();
+        data::bind_data_variables(&mut template);
+        handlebars.register_template("suffixed", template);
+        let expected: Vec<_> = (0..100).map(|i| format!("{i}!")).collect();
+
+        let rendered = render_contexts(
+            &handlebars,
+            "suffixed",
+            &contexts(100),
+            &json!({"suffix": "!"}),
+            &Budget::default(),
+            true,
+        )
+        .unwrap();
+
+        assert_eq!(rendered, expected);
+    }
+
+    #[test]
+    fn with_failing_context_reports_index() {
+        let mut contexts = contexts(5);
+        contexts[3] = Context::from(json!({}));
+
+        let err = render_contexts(
+            &registry(),
+            "greeting",
+            &contexts,
+            &Value::Null,
+            &Budget::default(),
+            true,
+        )
+        .unwrap_err();
+
+        assert!(
+            err.message.starts_with("Failed to render context 3:"),
+            "{err}"
+        );
+    }
+}
+
+#[cfg(test)]
+mod render_templates_tests {
+    use super::*;
+    use serde_json::json;
+
+    #[test]
+    fn with_many_templates_keeps_order() {
+        let mut handlebars = Handlebars::new();
+        handlebars.register_template_string("a", "A {{x}}").unwrap();
+        handlebars.register_template_string("b", "B {{x}}").unwrap();
+        let names = ["b".to_string(), "a".to_string(), "b".to_string()];
+
+        let rendered = render_templates(
+            &handlebars,
+            &names,
+            &Context::from(json!({"x": 1})),
+            &Value::Null,
+            &Budget::default(),
+            true,
+        )
+        .unwrap();
+
+        assert_eq!(rendered, ["B 1", "A 1", "B 1"]);
+    }
+
+    #[test]
+    fn with_missing_template_reports_name() {
+        let handlebars = Handlebars::new();
+        let names = ["missing".to_string()];
+
+        let err = render_templates(
+            &handlebars,
+            &names,
+            &Context::from(json!({})),
+            &Value::Null,
+            &Budget::default(),
+            false,
+        )
+        .unwrap_err();
+
+        assert!(
+            err.message
+                .starts_with("Failed to render template missing:"),
+            "{err}"
+        );
+    }
+}
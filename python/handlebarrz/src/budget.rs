@@ -0,0 +1,539 @@
+// Copyright 2025 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+//
+// SPDX-License-Identifier: Apache-2.0
+
+//! Limits on the time, output size and loop iterations of a render.
+//!
+//! handlebars-rust has no hook into its render loop, so the limits are
+//! checked in two places: on every write to the output, and by the native
+//! `LoopCounterHelper`, which `bind_loop_counters` places at the start of the
+//! body of every `{{#each}}` block. Loop counters cost a helper call per
+//! iteration, so they are only bound while the budget of the engine counts
+//! loops, and bound or removed again when it changes. The usage of the render
+//! in progress is kept per thread, like the runtime data, and a render that
+//! exceeds a limit fails at the next check.
+
+use handlebars::template::{Parameter, Template, TemplateElement};
+use handlebars::{
+    Context, Handlebars, Helper, HelperDef, HelperResult, Output, RenderContext, RenderError,
+    RenderErrorReason, Renderable, StringOutput,
+};
+use serde::{Deserialize, Serialize};
+use std::cell::RefCell;
+use std::fmt;
+use std::io;
+use std::sync::OnceLock;
+use std::time::{Duration, Instant};
+
+/// Name under which `LoopCounterHelper` is registered.
+///
+/// Like `data::DATA_HELPER`, it cannot be written in a template.
+pub(crate) const LOOP_COUNTER_HELPER: &str = "@loop";
+
+/// Limits applied to each render; `None` means unlimited.
+#[derive(Clone, Copy, Debug, Default, PartialEq, Serialize, Deserialize)]
+pub(crate) struct Budget {
+    /// Maximum wall-clock time of a render.
+    pub(crate) timeout: Option<Duration>,
+    /// Maximum size of the rendered output in bytes.
+    pub(crate) max_output_bytes: Option<usize>,
+    /// Maximum number of `{{#each}}` iterations, summed over all loops.
+    pub(crate) max_iterations: Option<u64>,
+}
+
+impl Budget {
+    /// Returns whether no limit is set.
+    pub(crate) fn is_unlimited(&self) -> bool {
+        *self == Self::default()
+    }
+
+    /// Returns whether loop iterations must be checked, which requires the
+    /// loop counters of the templates to be bound.
+    ///
+    /// A timeout needs them too, since a loop may run for long without
+    /// writing any output.
+    pub(crate) fn counts_loops(&self) -> bool {
+        self.timeout.is_some() || self.max_iterations.is_some()
+    }
+}
+
+/// A limit of a `Budget`.
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+pub(crate) enum Limit {
+    Time,
+    OutputBytes,
+    Iterations,
+}
+
+impl Limit {
+    /// Returns the name of the limit, as exposed to Python.
+    pub(crate) fn as_str(self) -> &'static str {
+        match self {
+            Limit::Time => "timeout",
+            Limit::OutputBytes => "max_output_bytes",
+            Limit::Iterations => "max_iterations",
+        }
+    }
+}
+
+/// A failed render.
+#[derive(Debug)]
+pub(crate) struct RenderFailure {
+    /// Description of the failure.
+    pub(crate) message: String,
+    /// The limit that stopped the render, if it ran out of budget.
+    pub(crate) exceeded: Option<Limit>,
+}
+
+impl RenderFailure {
+    /// Prefixes the message with where the failure happened.
+    pub(crate) fn context(self, context: impl fmt::Display) -> Self {
+        Self {
+            message: format!("{context}: {}", self.message),
+            ..self
+        }
+    }
+}
+
+impl From<RenderError> for RenderFailure {
+    fn from(e: RenderError) -> Self {
+        Self {
+            message: e.to_string(),
+            exceeded: None,
+        }
+    }
+}
+
+impl fmt::Display for RenderFailure {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        f.write_str(&self.message)
+    }
+}
+
+/// What the render in progress on a thread has used so far.
+struct Usage {
+    deadline: Option<Instant>,
+    budget: Budget,
+    output_bytes: usize,
+    iterations: u64,
+    exceeded: Option<Limit>,
+}
+
+impl Usage {
+    fn check(&mut self) -> Result<(), Limit> {
+        let exceeded = if self.deadline.is_some_and(|d| Instant::now() >= d) {
+            Some(Limit::Time)
+        } else if self
+            .budget
+            .max_output_bytes
+            .is_some_and(|max| self.output_bytes > max)
+        {
+            Some(Limit::OutputBytes)
+        } else if self
+            .budget
+            .max_iterations
+            .is_some_and(|max| self.iterations > max)
+        {
+            Some(Limit::Iterations)
+        } else {
+            None
+        };
+        match exceeded {
+            Some(limit) => {
+                self.exceeded.get_or_insert(limit);
+                Err(limit)
+            }
+            None => Ok(()),
+        }
+    }
+}
+
+thread_local! {
+    /// Usage of the budgeted render in progress on this thread.
+    static USAGE: RefCell<Option<Usage>> = const { RefCell::new(None) };
+}
+
+/// Records usage of the render in progress and checks its budget.
+fn charge(output_bytes: usize, iterations: u64) -> Result<(), Limit> {
+    USAGE.with_borrow_mut(|usage| {
+        let Some(usage) = usage else {
+            return Ok(());
+        };
+        usage.output_bytes += output_bytes;
+        usage.iterations += iterations;
+        usage.check()
+    })
+}
+
+fn exceeded_message(limit: Limit) -> String {
+    format!("Render budget exceeded: {}", limit.as_str())
+}
+
+/// Renders a registered template within a budget.
+///
+/// # Arguments
+///
+/// * `registry` - Registry holding the template.
+/// * `name` - Name of the template.
+/// * `ctx` - Context to render the template with.
+/// * `budget` - Limits of the render.
+///
+/// # Returns
+///
+/// The rendered string.
+///
+/// # Errors
+///
+/// The render error, telling whether the budget was exceeded.
+pub(crate) fn render(
+    registry: &Handlebars<'_>,
+    name: &str,
+    ctx: &Context,
+    budget: &Budget,
+) -> Result<String, RenderFailure> {
+    if budget.is_unlimited() {
+        return Ok(registry.render_with_context(name, ctx)?);
+    }
+    let template = registry
+        .get_template(name)
+        .ok_or_else(|| RenderError::from(RenderErrorReason::TemplateNotFound(name.to_string())))?;
+    let mut out = StringOutput::new();
+    render_template(registry, template, ctx, budget, &mut out)?;
+    Ok(out.into_string().map_err(RenderError::from)?)
+}
+
+/// Renders a template into an output within a budget.
+///
+/// Output past the byte limit is never written to `out`.
+///
+/// # Arguments
+///
+/// * `registry` - Registry providing helpers and partials.
+/// * `template` - The template to render.
+/// * `ctx` - Context to render the template with.
+/// * `budget` - Limits of the render.
+/// * `out` - Output receiving the rendered text.
+///
+/// # Errors
+///
+/// The render error, telling whether the budget was exceeded.
+pub(crate) fn render_template<'reg: 'rc, 'rc>(
+    registry: &'reg Handlebars<'reg>,
+    template: &'reg Template,
+    ctx: &'rc Context,
+    budget: &Budget,
+    out: &mut dyn Output,
+) -> Result<(), RenderFailure> {
+    let mut rc = RenderContext::new(template.name.as_ref());
+    if budget.is_unlimited() {
+        return Ok(template.render(registry, ctx, &mut rc, out)?);
+    }
+
+    struct Restore(Option<Usage>);
+
+    impl Drop for Restore {
+        fn drop(&mut self) {
+            USAGE.set(self.0.take());
+        }
+    }
+
+    let _restore = Restore(
+        USAGE.replace(Some(Usage {
+            deadline: budget
+                .timeout
+                .and_then(|timeout| Instant::now().checked_add(timeout)),
+            budget: *budget,
+            output_bytes: 0,
+            iterations: 0,
+            exceeded: None,
+        })),
+    );
+    let result = template.render(registry, ctx, &mut rc, &mut BudgetOutput { inner: out });
+    // A helper may have swallowed the error raised by a check.
+    let exceeded = USAGE.with_borrow(|usage| usage.as_ref().and_then(|u| u.exceeded));
+    match (result, exceeded) {
+        (_, Some(limit)) => Err(RenderFailure {
+            message: exceeded_message(limit),
+            exceeded: Some(limit),
+        }),
+        (result, None) => Ok(result?),
+    }
+}
+
+/// `Output` charging every write to the budget of the render in progress.
+struct BudgetOutput<'a> {
+    inner: &'a mut dyn Output,
+}
+
+impl Output for BudgetOutput<'_> {
+    fn write(&mut self, seg: &str) -> io::Result<()> {
+        charge(seg.len(), 0).map_err(|limit| io::Error::other(exceeded_message(limit)))?;
+        self.inner.write(seg)
+    }
+}
+
+/// Places a call of `LoopCounterHelper` at the start of the body of every
+/// `{{#each}}` block of a template, including nested and inline ones.
+///
+/// Loops that already have a counter are left as they are.
+///
+/// # Arguments
+///
+/// * `template` - The parsed template to update in place.
+///
+/// # Returns
+///
+/// Whether any loop was found.
+pub(crate) fn bind_loop_counters(template: &mut Template) -> bool {
+    template
+        .elements
+        .iter_mut()
+        .fold(false, |bound, element| bind_element(element) | bound)
+}
+
+fn bind_optional_template(template: Option<&mut Template>) -> bool {
+    template.is_some_and(bind_loop_counters)
+}
+
+fn bind_element(element: &mut TemplateElement) -> bool {
+    match element {
+        TemplateElement::HelperBlock(h) => {
+            let mut bound = bind_optional_template(h.template.as_mut())
+                | bind_optional_template(h.inverse.as_mut());
+            if h.name.as_name() == Some("each") {
+                if let Some(body) = h.template.as_mut() {
+                    insert_counter(body);
+                    bound = true;
+                }
+            }
+            bound
+        }
+        TemplateElement::DecoratorBlock(d) | TemplateElement::PartialBlock(d) => {
+            bind_optional_template(d.template.as_mut())
+        }
+        _ => false,
+    }
+}
+
+/// Removes the calls of `LoopCounterHelper` placed by `bind_loop_counters`.
+///
+/// # Arguments
+///
+/// * `template` - The parsed template to update in place.
+///
+/// # Returns
+///
+/// Whether any counter was removed.
+pub(crate) fn unbind_loop_counters(template: &mut Template) -> bool {
+    template
+        .elements
+        .iter_mut()
+        .fold(false, |unbound, element| unbind_element(element) | unbound)
+}
+
+fn unbind_optional_template(template: Option<&mut Template>) -> bool {
+    template.is_some_and(unbind_loop_counters)
+}
+
+fn unbind_element(element: &mut TemplateElement) -> bool {
+    match element {
+        TemplateElement::HelperBlock(h) => {
+            let mut unbound = unbind_optional_template(h.template.as_mut())
+                | unbind_optional_template(h.inverse.as_mut());
+            if h.name.as_name() == Some("each") {
+                if let Some(body) = h.template.as_mut() {
+                    unbound |= remove_counter(body);
+                }
+            }
+            unbound
+        }
+        TemplateElement::DecoratorBlock(d) | TemplateElement::PartialBlock(d) => {
+            unbind_optional_template(d.template.as_mut())
+        }
+        _ => false,
+    }
+}
+
+/// Returns whether an element is a counter call placed by `insert_counter`.
+fn is_counter(element: &TemplateElement) -> bool {
+    matches!(element, TemplateElement::Expression(h) if h.name.as_name() == Some(LOOP_COUNTER_HELPER))
+}
+
+/// Inserts a counter call as the first element of a loop body.
+fn insert_counter(body: &mut Template) {
+    if body.elements.first().is_some_and(is_counter) {
+        return;
+    }
+    static COUNTER: OnceLock<TemplateElement> = OnceLock::new();
+    let counter = COUNTER.get_or_init(|| {
+        let mut template = Template::compile("{{counter}}").expect("counter template is valid");
+        let mut element = template.elements.remove(0);
+        if let TemplateElement::Expression(h) = &mut element {
+            h.name = Parameter::Name(LOOP_COUNTER_HELPER.to_string());
+        }
+        element
+    });
+    body.elements.insert(0, counter.clone());
+    // Errors are located through the mapping of each element.
+    if let Some(first) = body.mapping.first().cloned() {
+        body.mapping.insert(0, first);
+    }
+}
+
+/// Removes the counter call from the start of a loop body, if there is one.
+fn remove_counter(body: &mut Template) -> bool {
+    if !body.elements.first().is_some_and(is_counter) {
+        return false;
+    }
+    body.elements.remove(0);
+    // `insert_counter` duplicated the first mapping, if there was one.
+    if !body.mapping.is_empty() {
+        body.mapping.remove(0);
+    }
+    true
+}
+
+/// Helper counting loop iterations against the budget of the render in
+/// progress. It writes nothing.
+#[derive(Clone, Copy, Debug)]
+pub(crate) struct LoopCounterHelper {}
+
+impl HelperDef for LoopCounterHelper {
+    fn call<'reg: 'rc, 'rc>(
+        &self,
+        _h: &Helper<'rc>,
+        _r: &'reg Handlebars<'reg>,
+        _ctx: &'rc Context,
+        _rc: &mut RenderContext<'reg, 'rc>,
+        _out: &mut dyn Output,
+    ) -> HelperResult {
+        charge(0, 1).map_err(|limit| RenderErrorReason::Other(exceeded_message(limit)).into())
+    }
+}
+
+#[cfg(test)]
+mod budget_tests {
+    use super::*;
+    use serde_json::json;
+
+    fn registry(source: &str) -> Handlebars<'static> {
+        let mut registry = Handlebars::new();
+        registry.register_helper(LOOP_COUNTER_HELPER, Box::new(LoopCounterHelper {}));
+        let mut template = Template::compile(source).unwrap();
+        bind_loop_counters(&mut template);
+        registry.register_template("t", template);
+        registry
+    }
+
+    fn render_with(source: &str, budget: Budget) -> Result<String, RenderFailure> {
+        let ctx = Context::from(json!({"items": [1, 2, 3], "rows": [[1, 2], [3, 4]]}));
+        render(&registry(source), "t", &ctx, &budget)
+    }
+
+    #[test]
+    fn with_unlimited_budget_renders_loops_unchanged() {
+        let source = "{{#each items}}{{@index}}:{{this}},{{else}}none{{/each}}";
+
+        assert_eq!(
+            render_with(source, Budget::default()).unwrap(),
+            "0:1,1:2,2:3,"
+        );
+    }
+
+    #[test]
+    fn with_nested_loops_counts_every_iteration() {
+        let source = "{{#each rows}}{{#each this}}{{this}}{{/each}}{{/each}}";
+        let budget = |max| Budget {
+            max_iterations: Some(max),
+            ..Budget::default()
+        };
+
+        assert_eq!(render_with(source, budget(6)).unwrap(), "1234");
+        assert_eq!(
+            render_with(source, budget(5)).unwrap_err().exceeded,
+            Some(Limit::Iterations)
+        );
+    }
+
+    #[test]
+    fn with_output_limit_stops_before_writing_past_it() {
+        let budget = Budget {
+            max_output_bytes: Some(4),
+            ..Budget::default()
+        };
+        let mut written = StringOutput::new();
+        let registry = registry("{{#each items}}item {{this}} {{/each}}");
+        let template = registry.get_template("t").unwrap();
+        let ctx = Context::from(json!({"items": [1, 2, 3]}));
+
+        let err = render_template(&registry, template, &ctx, &budget, &mut written).unwrap_err();
+
+        assert_eq!(err.exceeded, Some(Limit::OutputBytes));
+        assert!(written.into_string().unwrap().is_empty());
+    }
+
+    #[test]
+    fn with_elapsed_timeout_returns_time_limit() {
+        let budget = Budget {
+            timeout: Some(Duration::ZERO),
+            ..Budget::default()
+        };
+
+        assert_eq!(
+            render_with("{{#each items}}{{/each}}", budget)
+                .unwrap_err()
+                .exceeded,
+            Some(Limit::Time)
+        );
+    }
+
+    #[test]
+    fn with_unbound_counters_returns_parsed_template() {
+        let source = "{{#each rows}}{{#each this}}{{this}}{{/each}}{{else}}none{{/each}}";
+        let parsed = Template::compile(source).unwrap();
+        let mut template = parsed.clone();
+
+        assert!(bind_loop_counters(&mut template));
+        let bound = template.clone();
+        bind_loop_counters(&mut template);
+        assert_eq!(template, bound);
+
+        assert!(unbind_loop_counters(&mut template));
+        assert_eq!(template, parsed);
+        assert!(!unbind_loop_counters(&mut template));
+    }
+
+    #[test]
+    fn counts_loops_only_with_time_or_iteration_limit() {
+        let budget = |timeout, max_output_bytes, max_iterations| Budget {
+            timeout,
+            max_output_bytes,
+            max_iterations,
+        };
+
+        assert!(!Budget::default().counts_loops());
+        assert!(!budget(None, Some(10), None).counts_loops());
+        assert!(budget(Some(Duration::ZERO), None, None).counts_loops());
+        assert!(budget(None, None, Some(10)).counts_loops());
+    }
+
+    #[test]
+    fn with_failure_context_prefixes_message() {
+        let failure = render_with("{{> missing}}", Budget::default()).unwrap_err();
+
+        assert_eq!(failure.exceeded, None);
+        assert!(failure.context("Failed").message.starts_with("Failed: "));
+    }
+}
@@ -0,0 +1,187 @@
+// Copyright 2025 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+//
+// SPDX-License-Identifier: Apache-2.0
+
+//! Conversion between Python objects and JSON values.
+//!
+//! Render contexts and helper arguments cross the FFI boundary as native
+//! objects. These functions walk them directly instead of serializing to JSON
+//! text on one side and parsing it again on the other.
+
+use pyo3::IntoPyObjectExt;
+use pyo3::exceptions::{PyTypeError, PyValueError};
+use pyo3::prelude::*;
+use pyo3::types::{PyBool, PyDict, PyFloat, PyInt, PyList, PyString, PyTuple};
+use serde_json::{Map, Number, Value};
+
+/// Maximum nesting depth of containers accepted from Python.
+///
+/// This is the recursion limit `serde_json` applies when parsing JSON text,
+/// so contexts that used to round-trip through JSON keep the same limit.
+const MAX_DEPTH: usize = 128;
+
+/// Converts a Python object into a JSON value.
+///
+/// Accepts the same types as `json.dumps`: `None`, `bool`, `int`, `float`,
+/// `str`, `dict` and `list`/`tuple` (including subclasses). Dictionary keys
+/// are converted to strings the same way `json.dumps` converts them.
+///
+/// # Arguments
+///
+/// * `obj` - The Python object to convert.
+///
+/// # Returns
+///
+/// The equivalent JSON value.
+///
+/// # Errors
+///
+/// `PyTypeError` if the object (or a nested value or key) is not JSON
+/// serializable, and `PyValueError` for out-of-range floats or containers
+/// nested more than `MAX_DEPTH` levels deep.
+pub(crate) fn py_to_value(obj: &Bound<'_, PyAny>) -> PyResult<Value> {
+    to_value(obj, 0)
+}
+
+fn to_value(obj: &Bound<'_, PyAny>, depth: usize) -> PyResult<Value> {
+    if obj.is_none() {
+        return Ok(Value::Null);
+    }
+    if let Ok(s) = obj.downcast::<PyString>() {
+        return Ok(Value::String(s.to_str()?.to_owned()));
+    }
+    // `bool` is a subclass of `int`, so it must be checked first.
+    if let Ok(b) = obj.downcast::<PyBool>() {
+        return Ok(Value::Bool(b.is_true()));
+    }
+    if let Ok(i) = obj.downcast::<PyInt>() {
+        return int_to_value(i);
+    }
+    if let Ok(f) = obj.downcast::<PyFloat>() {
+        return float_to_value(f.value());
+    }
+
+    if depth >= MAX_DEPTH {
+        return Err(PyValueError::new_err(format!(
+            "Context is nested more than {MAX_DEPTH} levels deep"
+        )));
+    }
+    if let Ok(dict) = obj.downcast::<PyDict>() {
+        let mut map = Map::with_capacity(dict.len());
+        for (key, value) in dict.iter() {
+            map.insert(key_to_string(&key)?, to_value(&value, depth + 1)?);
+        }
+        return Ok(Value::Object(map));
+    }
+    if let Ok(list) = obj.downcast::<PyList>() {
+        return list
+            .iter()
+            .map(|item| to_value(&item, depth + 1))
+            .collect::<PyResult<Vec<_>>>()
+            .map(Value::Array);
+    }
+    if let Ok(tuple) = obj.downcast::<PyTuple>() {
+        return tuple
+            .iter()
+            .map(|item| to_value(&item, depth + 1))
+            .collect::<PyResult<Vec<_>>>()
+            .map(Value::Array);
+    }
+
+    Err(PyTypeError::new_err(format!(
+        "Object of type {} is not JSON serializable",
+        obj.get_type().name()?
+    )))
+}
+
+fn int_to_value(i: &Bound<'_, PyInt>) -> PyResult<Value> {
+    if let Ok(v) = i.extract::<i64>() {
+        return Ok(Value::from(v));
+    }
+    if let Ok(v) = i.extract::<u64>() {
+        return Ok(Value::from(v));
+    }
+    // Like `serde_json`, represent integers outside the 64-bit range as floats.
+    float_to_value(i.extract::<f64>()?)
+}
+
+fn float_to_value(v: f64) -> PyResult<Value> {
+    Number::from_f64(v)
+        .map(Value::Number)
+        .ok_or_else(|| PyValueError::new_err("Out of range float values are not JSON compliant"))
+}
+
+fn key_to_string(key: &Bound<'_, PyAny>) -> PyResult<String> {
+    if let Ok(s) = key.downcast::<PyString>() {
+        return Ok(s.to_str()?.to_owned());
+    }
+    if key.is_none() {
+        return Ok("null".to_owned());
+    }
+    if let Ok(b) = key.downcast::<PyBool>() {
+        return Ok(if b.is_true() { "true" } else { "false" }.to_owned());
+    }
+    if key.is_instance_of::<PyInt>() || key.is_instance_of::<PyFloat>() {
+        return Ok(key.str()?.to_str()?.to_owned());
+    }
+    Err(PyTypeError::new_err(format!(
+        "keys must be str, int, float, bool or None, not {}",
+        key.get_type().name()?
+    )))
+}
+
+/// Converts a JSON value into the equivalent Python object.
+///
+/// Objects become `dict`, arrays become `list`, and scalars become `None`,
+/// `bool`, `int`, `float` or `str`.
+///
+/// # Arguments
+///
+/// * `py` - The Python GIL token.
+/// * `value` - The JSON value to convert.
+///
+/// # Returns
+///
+/// The equivalent Python object.
+pub(crate) fn value_to_py(py: Python<'_>, value: &Value) -> PyResult<PyObject> {
+    match value {
+        Value::Null => Ok(py.None()),
+        Value::Bool(b) => (*b).into_py_any(py),
+        Value::Number(n) => {
+            if let Some(i) = n.as_i64() {
+                i.into_py_any(py)
+            } else if let Some(u) = n.as_u64() {
+                u.into_py_any(py)
+            } else {
+                n.as_f64().into_py_any(py)
+            }
+        }
+        Value::String(s) => s.as_str().into_py_any(py),
+        Value::Array(items) => {
+            let list = PyList::empty(py);
+            for item in items {
+                list.append(value_to_py(py, item)?)?;
+            }
+            Ok(list.into_any().unbind())
+        }
+        Value::Object(map) => {
+            let dict = PyDict::new(py);
+            for (key, item) in map {
+                dict.set_item(key.as_str(), value_to_py(py, item)?)?;
+            }
+            Ok(dict.into_any().unbind())
+        }
+    }
+}
@@ -0,0 +1,261 @@
+// Copyright 2025 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+//
+// SPDX-License-Identifier: Apache-2.0
+
+//! Runtime `@data` variables.
+//!
+//! Handlebars.js exposes the `data` render option as `@` variables, so a
+//! template can read `{{@state.name}}` without the value being part of its
+//! context. handlebars-rust only resolves its own block variables (`@index`,
+//! `@first`, ...) and drops everything after the first segment of a local
+//! path. To support data variables, references to them are bound to the
+//! native `DataHelper` once, when the template is parsed, and the helper
+//! resolves them against the data installed for the current render with
+//! `with_runtime_data`. The template source is never rewritten.
+
+use crate::path;
+use handlebars::template::{Parameter, Subexpression, Template, TemplateElement};
+use handlebars::{Context, Handlebars, Helper, HelperDef, RenderContext, RenderError, ScopedJson};
+use serde_json::Value;
+use std::cell::RefCell;
+use std::collections::HashMap;
+
+/// Name under which `DataHelper` is registered.
+///
+/// It cannot be written as a helper call in a template, because the parser
+/// reads `@data` as a local variable.
+pub(crate) const DATA_HELPER: &str = "@data";
+
+/// Block variables provided by handlebars-rust itself.
+const BLOCK_VARIABLES: [&str; 6] = ["first", "index", "key", "last", "partial-block", "root"];
+
+thread_local! {
+    /// Runtime data of the render in progress on this thread.
+    static RUNTIME_DATA: RefCell<Value> = const { RefCell::new(Value::Null) };
+}
+
+/// Runs a render with the given runtime data visible to `@` variables.
+///
+/// The previous data is restored afterwards, so renders started by helpers
+/// during the render see their own data.
+///
+/// # Arguments
+///
+/// * `data` - The runtime data, usually an object.
+/// * `render` - The render to run.
+///
+/// # Returns
+///
+/// The result of `render`.
+pub(crate) fn with_runtime_data<R>(data: &Value, render: impl FnOnce() -> R) -> R {
+    struct Restore(Value);
+
+    impl Drop for Restore {
+        fn drop(&mut self) {
+            RUNTIME_DATA.set(std::mem::take(&mut self.0));
+        }
+    }
+
+    let _restore = Restore(RUNTIME_DATA.replace(data.clone()));
+    render()
+}
+
+/// Binds the `@` data variable references of a template to `DataHelper`.
+///
+/// `{{@state.name}}` becomes a call of the helper with the literal path
+/// `state.name`, and a data variable used as a parameter or hash value
+/// becomes the equivalent subexpression. Block variables are left alone.
+///
+/// # Arguments
+///
+/// * `template` - The parsed template to update in place.
+///
+/// # Returns
+///
+/// Whether any reference was bound.
+pub(crate) fn bind_data_variables(template: &mut Template) -> bool {
+    template
+        .elements
+        .iter_mut()
+        .fold(false, |bound, element| bind_element(element) | bound)
+}
+
+fn bind_optional_template(template: Option<&mut Template>) -> bool {
+    template.is_some_and(bind_data_variables)
+}
+
+fn bind_element(element: &mut TemplateElement) -> bool {
+    match element {
+        TemplateElement::Expression(h) | TemplateElement::HtmlExpression(h) => {
+            let mut bound = false;
+            if h.params.is_empty() && h.hash.is_empty() {
+                if let Some(path) = data_path(&h.name) {
+                    h.params.push(Parameter::Literal(Value::String(path)));
+                    h.name = Parameter::Name(DATA_HELPER.to_string());
+                    bound = true;
+                }
+            }
+            bind_parameters(h.params.iter_mut().chain(h.hash.values_mut())) | bound
+        }
+        TemplateElement::HelperBlock(h) => {
+            bind_parameters(h.params.iter_mut().chain(h.hash.values_mut()))
+                | bind_optional_template(h.template.as_mut())
+                | bind_optional_template(h.inverse.as_mut())
+        }
+        TemplateElement::DecoratorExpression(d)
+        | TemplateElement::DecoratorBlock(d)
+        | TemplateElement::PartialExpression(d)
+        | TemplateElement::PartialBlock(d) => {
+            bind_parameters(d.params.iter_mut().chain(d.hash.values_mut()))
+                | bind_optional_template(d.template.as_mut())
+        }
+        _ => false,
+    }
+}
+
+fn bind_parameters<'p>(params: impl Iterator<Item = &'p mut Parameter>) -> bool {
+    params.fold(false, |bound, param| bind_parameter(param) | bound)
+}
+
+fn bind_parameter(param: &mut Parameter) -> bool {
+    if let Parameter::Subexpression(subexpr) = param {
+        return bind_element(&mut subexpr.element);
+    }
+    let Some(path) = data_path(param) else {
+        return false;
+    };
+    *param = Parameter::Subexpression(Subexpression::new(
+        Parameter::Name(DATA_HELPER.to_string()),
+        vec![Parameter::Literal(Value::String(path))],
+        HashMap::new(),
+    ));
+    true
+}
+
+/// Returns the data path referenced by an `@` parameter, such as
+/// `state.name` for `@state.name`.
+fn data_path(param: &Parameter) -> Option<String> {
+    let Parameter::Path(_) = param else {
+        return None;
+    };
+    let path = param.as_name()?.strip_prefix('@')?;
+    let root = path.split(['.', '/', '[']).next().unwrap_or_default();
+    if root.is_empty() || BLOCK_VARIABLES.contains(&root) {
+        return None;
+    }
+    Some(path.replace('/', "."))
+}
+
+/// Helper resolving bound `@` data variables.
+///
+/// It is registered under `DATA_HELPER` and called with the path of the
+/// variable. Values are escaped like any other expression, and missing ones
+/// behave like missing context values.
+#[derive(Clone, Copy, Debug)]
+pub(crate) struct DataHelper {}
+
+impl HelperDef for DataHelper {
+    fn call_inner<'reg: 'rc, 'rc>(
+        &self,
+        h: &Helper<'rc>,
+        _reg: &'reg Handlebars<'reg>,
+        _ctx: &'rc Context,
+        _rc: &mut RenderContext<'reg, 'rc>,
+    ) -> Result<ScopedJson<'rc>, RenderError> {
+        let name = h.param(0).and_then(|p| p.value().as_str()).unwrap_or("");
+        let value = RUNTIME_DATA.with_borrow(|data| path::lookup(data, name).cloned());
+        Ok(value.map_or(ScopedJson::Missing, ScopedJson::Derived))
+    }
+}
+
+#[cfg(test)]
+mod data_variables_tests {
+    use super::*;
+    use serde_json::json;
+
+    fn render(source: &str, ctx: Value, data: Value) -> String {
+        let mut registry = Handlebars::new();
+        registry.register_helper(DATA_HELPER, Box::new(DataHelper {}));
+        let mut template = Template::compile(source).unwrap();
+        bind_data_variables(&mut template);
+        registry.register_template("t", template);
+
+        with_runtime_data(&data, || registry.render("t", &ctx)).unwrap()
+    }
+
+    #[test]
+    fn with_nested_path_returns_value() {
+        let data = json!({"state": {"name": "bar"}, "auth": {"email": "a@b.c"}});
+
+        assert_eq!(
+            render(
+                "{{name}} ({{@state.name}}, {{@auth.email}})",
+                json!({"name": "foo"}),
+                data
+            ),
+            "foo (bar, a@b.c)"
+        );
+    }
+
+    #[test]
+    fn with_variable_in_block_and_params_returns_value() {
+        let data = json!({"state": {"on": true, "items": [1, 2]}});
+
+        assert_eq!(
+            render(
+                "{{#if @state.on}}{{#each @state.items}}{{this}}{{@state.on}}{{/each}}{{/if}}",
+                json!({}),
+                data
+            ),
+            "1true2true"
+        );
+    }
+
+    #[test]
+    fn with_block_variables_keeps_them() {
+        assert_eq!(
+            render(
+                "{{#each items}}{{@index}}{{/each}}",
+                json!({"items": ["a", "b"]}),
+                json!({"index": "x"})
+            ),
+            "01"
+        );
+    }
+
+    #[test]
+    fn with_missing_variable_renders_empty() {
+        assert_eq!(render("[{{@state.name}}]", json!({}), Value::Null), "[]");
+    }
+
+    #[test]
+    fn with_html_value_escapes_expression() {
+        let data = json!({"v": "<b>"});
+
+        assert_eq!(render("{{@v}} {{{@v}}}", json!({}), data), "&lt;b&gt; <b>");
+    }
+
+    #[test]
+    fn with_nested_render_restores_data() {
+        let outer = json!({"a": 1});
+
+        let inner = with_runtime_data(&outer, || {
+            with_runtime_data(&json!({"a": 2}), || RUNTIME_DATA.with_borrow(Value::clone))
+        });
+
+        assert_eq!(inner, json!({"a": 2}));
+        assert_eq!(RUNTIME_DATA.with_borrow(Value::clone), Value::Null);
+    }
+}
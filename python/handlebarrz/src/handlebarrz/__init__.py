@@ -54,9 +54,9 @@ result = handlebars.render('greeting', {'name': 'World'})  # "Hello World!"
 
 
 # Using custom helpers.
-def format_name(params, hash, ctx):
+def format_name(params, options):
     name = params[0]
-    return name.upper() if hash.get('uppercase') else name
+    return name.upper() if options.hash_value('uppercase') else name
 
 
 handlebars.register_helper('format', format_name)
@@ -69,27 +69,34 @@ result = handlebars.render('formatted', {'name': 'World'})  # "Hello WORLD!"
 
 from __future__ import annotations
 
-import json
-import re
-from collections.abc import Callable
+import contextvars
+import copy
+import io
+import queue
+import threading
+import weakref
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
 from enum import Enum
 from pathlib import Path
-from typing import Any, TypedDict
+from typing import IO, Any, TypedDict, cast, overload
 
 import structlog
 
 from ._native import (
     HandlebarrzHelperOptions,
     HandlebarrzTemplate,
+    RenderBudgetError,
+    analyze_template as _analyze_template,
     html_escape,
+    marker_escape,
     no_escape,
 )
 
 logger = structlog.get_logger(__name__)
 
-
-HelperFn = Callable[[list[Any], 'HelperOptions'], str]
-NativeHelperFn = Callable[[str, HandlebarrzHelperOptions], str]
+HelperFn = Callable[[Sequence[Any], 'HelperOptions'], str]
+NativeHelperFn = Callable[[HandlebarrzHelperOptions], str]
 Context = dict[str, Any]
 
 
@@ -106,6 +113,152 @@ class RuntimeOptions(TypedDict):
 
 CompiledRenderer = Callable[[Context, RuntimeOptions | None], str]
 
+# Default size in bytes of the chunks produced by `render_into` and
+# `render_stream`.
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Number of rendered chunks `render_stream` holds before the render waits
+# for the consumer.
+_STREAM_BUFFER_CHUNKS = 2
+
+
+class _StreamClosedError(Exception):
+    """Raised into a streaming render whose consumer has stopped."""
+
+
+class _StreamEnd:
+    """Marks the end of a streaming render.
+
+    Attributes:
+        error: The exception that stopped the render, if any.
+    """
+
+    def __init__(self, error: BaseException | None = None) -> None:
+        """Initialize the end marker.
+
+        Args:
+            error: The exception that stopped the render, if any.
+        """
+        self.error = error
+
+
+class TemplateSummary(TypedDict):
+    """What a parsed template uses, as written in its source.
+
+    Attributes:
+        partials: Partials included by name (`{{> name}}` or
+            `{{#> name}}...{{/name}}`), excluding inline partials.
+        inline_partials: Partials defined inline with `{{#*inline "name"}}`.
+        dynamic_partials: Whether a partial is selected at render time, e.g.
+            `{{> (lookup . 'name')}}`.
+        variables: Paths read from the context or data (e.g. `user.name`,
+            `@state.id`), relative to the block they appear in.
+        helpers: Helpers called, including block helpers such as `if`.
+        depth: Deepest nesting of blocks; 0 for a template without blocks.
+        node_count: Number of template elements, including raw text.
+    """
+
+    partials: set[str]
+    inline_partials: set[str]
+    dynamic_partials: bool
+    variables: set[str]
+    helpers: set[str]
+    depth: int
+    node_count: int
+
+
+def analyze_template(template_string: str) -> TemplateSummary:
+    """Parse a template string and summarize what it uses.
+
+    Expressions without arguments, such as `{{name}}`, are reported as
+    variables since they can only be told apart from helper calls with a
+    registry; use `Template.analyze` to take registered helpers into account.
+
+    Args:
+        template_string: The template source code.
+
+    Returns:
+        The summary of the template.
+
+    Raises:
+        ValueError: If there is a syntax error in the template.
+    """
+    return cast(TemplateSummary, _analyze_template(template_string))
+
+
+def _runtime_data(options: RuntimeOptions | None) -> dict[str, Any] | None:
+    """Extract the runtime data exposed as `@` variables from the options.
+
+    Args:
+        options: Additional options for the template.
+
+    Returns:
+        The runtime data, or None if there is none.
+    """
+    return options.get('data') if options is not None else None
+
+
+class RenderBudget(TypedDict):
+    """Limits applied to each render of a `Template`.
+
+    A render exceeding any of them raises `RenderBudgetError`, whose
+    `limit` attribute names the key of the exceeded limit.
+
+    Attributes:
+        timeout: Maximum wall-clock time of a render in seconds, or None.
+        max_output_bytes: Maximum size of the output in UTF-8 bytes, or None.
+        max_iterations: Maximum number of `{{#each}}` iterations, summed over
+            all loops of a render, or None.
+    """
+
+    timeout: float | None
+    max_output_bytes: int | None
+    max_iterations: int | None
+
+
+class RegistryStats(TypedDict):
+    """Usage of the evictable templates of a `Template`.
+
+    Attributes:
+        entries: Number of evictable templates.
+        bytes: Total source length of the evictable templates.
+        hits: Compilations answered by an already compiled template.
+        misses: Compilations that had to parse the template.
+        hit_rate: Share of compilations that were hits; 0.0 before the first.
+        evictions: Number of templates evicted so far.
+        max_entries: Maximum number of evictable templates, or None.
+        max_bytes: Maximum total source length in bytes, or None.
+    """
+
+    entries: int
+    bytes: int
+    hits: int
+    misses: int
+    hit_rate: float
+    evictions: int
+    max_entries: int | None
+    max_bytes: int | None
+
+
+class TemplateRegistrationError(ValueError):
+    """Raised when templates registered together fail to parse.
+
+    None of the templates of the failed call are registered.
+
+    Attributes:
+        errors: The parse error of each failing template, by name.
+    """
+
+    def __init__(self, errors: dict[str, str]) -> None:
+        """Initialize the error.
+
+        Args:
+            errors: The parse error of each failing template, by name.
+        """
+        self.errors = errors
+        details = '; '.join(f'{name}: {error}' for name, error in sorted(errors.items()))
+        super().__init__(f'{len(errors)} template(s) failed to parse: {details}')
+
 
 class EscapeFunction(str, Enum):
     """Enumeration of built-in escape functions for Handlebars templates.
@@ -125,10 +278,16 @@ class EscapeFunction(str, Enum):
     Attributes:
         HTML_ESCAPE: Escapes HTML entities (default)
         NO_ESCAPE: Passes content through without any escaping
+        MARKER_ESCAPE: Escapes only Dotprompt markers such as
+            `<<<dotprompt:role:system>>>`, so that interpolated values cannot
+            inject messages, history or media into a rendered prompt. The
+            start of a marker at the end of a value and a `dotprompt` at its
+            start are escaped too, so adjacent values cannot form a marker
     """
 
     HTML_ESCAPE = 'html_escape'
     NO_ESCAPE = 'no_escape'
+    MARKER_ESCAPE = 'marker_escape'
 
 
 class Template:
@@ -174,6 +333,19 @@ class Template:
         self._template.set_strict_mode(strict_mode)
         self._template.set_dev_mode(dev_mode)
         self._known_partials: set[str] = set()
+        self._helpers: dict[str, HelperFn] = {}
+        self._bounded: bool = False
+        self._init_compiled()
+
+    def _init_compiled(self) -> None:
+        """Start counting the handles of compiled templates from scratch."""
+        # Live `CompiledTemplate` handles by compiled template name.
+        self._compiled_refs: dict[str, int] = {}
+        # Names whose handles were collected, released under the lock. The
+        # finalizers only append to it, since they may run while the lock is
+        # held by the thread they interrupted.
+        self._released: deque[str] = deque()
+        self._compiled_lock: threading.Lock = threading.Lock()
 
     @property
     def strict_mode(self) -> bool:
@@ -220,6 +392,109 @@ class Template:
         self._template.set_dev_mode(enabled)
         logger.debug({'event': 'dev_mode_changed', 'enabled': enabled})
 
+    @property
+    def render_budget(self) -> RenderBudget:
+        """The limits applied to each render.
+
+        Returns:
+            The limits; None for limits that are not enforced.
+        """
+        timeout, max_output_bytes, max_iterations = self._template.get_render_budget()
+        return {'timeout': timeout, 'max_output_bytes': max_output_bytes, 'max_iterations': max_iterations}
+
+    def set_render_budget(
+        self,
+        timeout: float | None = None,
+        max_output_bytes: int | None = None,
+        max_iterations: int | None = None,
+    ) -> None:
+        """Limit the time, output size and loop iterations of each render.
+
+        The limits are checked inside the native renderer while the template
+        renders: the time and output size whenever output is written, and the
+        iterations at the start of every `{{#each}}` iteration. A render that
+        exceeds a limit stops early and raises `RenderBudgetError`, a
+        `ValueError`, without building the rest of the output. The limits
+        apply to every render method and replace any previous budget.
+
+        Args:
+            timeout: Maximum wall-clock time of a render in seconds, or None.
+            max_output_bytes: Maximum size of the output in UTF-8 bytes, or
+                None.
+            max_iterations: Maximum number of loop iterations, summed over all
+                loops of a render, or None.
+
+        Raises:
+            ValueError: If the timeout is negative or not finite.
+        """
+        self._template.set_render_budget(timeout, max_output_bytes, max_iterations)
+        logger.debug({
+            'event': 'render_budget_changed',
+            'timeout': timeout,
+            'max_output_bytes': max_output_bytes,
+            'max_iterations': max_iterations,
+        })
+
+    def set_capacity(self, max_entries: int | None = None, max_bytes: int | None = None) -> None:
+        """Bound the number and total size of evictable templates.
+
+        Templates created by `compile` are evictable, as are templates and
+        partials passed to `unpin`. When adding one exceeds a limit, the least
+        recently rendered or compiled ones are unregistered. Everything else
+        is pinned and never evicted. The size of a template is the length of
+        its source, and a template is never evicted to make room for itself.
+
+        Compiled templates that were evicted are compiled again the next time
+        they are rendered.
+
+        Args:
+            max_entries: Maximum number of evictable templates, or None for
+                no limit.
+            max_bytes: Maximum total source length in bytes, or None for no
+                limit.
+
+        Raises:
+            ValueError: If `max_entries` is 0.
+        """
+        self._template.set_capacity(max_entries, max_bytes)
+        self._bounded = max_entries is not None or max_bytes is not None
+        logger.debug({'event': 'capacity_changed', 'max_entries': max_entries, 'max_bytes': max_bytes})
+
+    def pin(self, name: str) -> None:
+        """Protect a compiled or unpinned template from eviction.
+
+        Args:
+            name: The name of the template or partial.
+
+        Raises:
+            ValueError: If the template is not registered.
+        """
+        self._template.pin(name)
+
+    def unpin(self, name: str) -> None:
+        """Make a template or partial evictable.
+
+        Registering it again pins it again. Unpin partials only if they can be
+        registered again when missing, since templates including an evicted
+        partial fail to render.
+
+        Args:
+            name: The name of the template or partial.
+
+        Raises:
+            ValueError: If no template was registered from a string under the
+                name.
+        """
+        self._template.unpin(name)
+
+    def cache_stats(self) -> RegistryStats:
+        """Return usage counters of the evictable templates.
+
+        Returns:
+            The counters, for sizing the capacity.
+        """
+        return cast(RegistryStats, self._template.cache_stats())
+
     def set_escape_function(self, escape_fn: EscapeFunction) -> None:
         """Set the escape function used for HTML escaping.
 
@@ -295,6 +570,62 @@ class Template:
             })
             raise
 
+    def register_templates(self, templates: Mapping[str, str]) -> None:
+        """Register many templates at once.
+
+        The templates are parsed in parallel and installed in a single update,
+        which is much faster than registering them one by one. Either all of
+        them are registered or, if any fails to parse, none.
+
+        Args:
+            templates: Template strings by name.
+
+        Raises:
+            TemplateRegistrationError: If any template has a syntax error.
+        """
+        errors = self._template.register_templates(dict(templates))
+        if errors:
+            logger.error({'event': 'templates_registration_error', 'errors': errors})
+            raise TemplateRegistrationError(errors)
+        logger.debug({'event': 'templates_registered', 'count': len(templates)})
+
+    def register_partials(self, partials: Mapping[str, str]) -> None:
+        """Register many partials at once.
+
+        The partials are parsed in parallel and installed in a single update,
+        which is much faster than registering them one by one. Either all of
+        them are registered or, if any fails to parse, none.
+
+        Args:
+            partials: Partial template strings by name.
+
+        Raises:
+            TemplateRegistrationError: If any partial has a syntax error.
+        """
+        errors = self._template.register_partials(dict(partials))
+        if errors:
+            logger.error({'event': 'partials_registration_error', 'errors': errors})
+            raise TemplateRegistrationError(errors)
+        self._known_partials.update(partials)
+        logger.debug({'event': 'partials_registered', 'count': len(partials)})
+
+    def analyze(self, template_string: str) -> TemplateSummary:
+        """Parse a template string and summarize what it uses.
+
+        Unlike `analyze_template`, expressions without arguments that name a
+        helper registered with this engine are reported as helpers.
+
+        Args:
+            template_string: The template source code.
+
+        Returns:
+            The summary of the template.
+
+        Raises:
+            ValueError: If there is a syntax error in the template.
+        """
+        return cast(TemplateSummary, self._template.analyze(template_string))
+
     def has_partial(self, name: str) -> bool:
         """Check if a partial is registered.
 
@@ -304,7 +635,9 @@ class Template:
         Returns:
             True if the partial is registered, False otherwise.
         """
-        return name in self._known_partials
+        if name not in self._known_partials:
+            return False
+        return not self._bounded or self._template.has_template(name)
 
     def register_template_file(self, name: str, file_path: str | Path) -> None:
         """Register a template from a file.
@@ -381,19 +714,22 @@ class Template:
         be called from templates using the `{{helper_name arg1 arg2 key=value}}`
         syntax.
 
-        The helper function should take three parameters:
-        - params: List of positional parameters passed to the helper
-        - hash: Dictionary of named parameters (hash) passed to the helper
-        - context: Dictionary containing the current context
+        The helper function should take two parameters:
+        - params: Sequence of the positional parameters passed to the helper.
+          It is only valid during the call, so copy it with `list(params)` to
+          keep the parameters afterwards.
+        - options: `HelperOptions` giving access to the named parameters
+          (`options.hash_value`), the current context (`options.lookup`) and
+          the block contents.
 
         It should return a string that will be inserted into the template.
 
         Examples:
             ```python
             # A helper that formats a date
-            def format_date(params, hash, ctx):
+            def format_date(params: Sequence, options: HelperOptions) -> str:
                 date_obj = params[0]
-                format_str = hash.get('format', '%Y-%m-%d')
+                format_str = options.hash_value('format') or '%Y-%m-%d'
                 return date_obj.strftime(format_str)
 
 
@@ -409,6 +745,7 @@ class Template:
         """
         try:
             self._template.register_helper(name, create_helper(helper_fn))
+            self._helpers[name] = helper_fn
             # logger.debug({'event': 'helper_registered', 'name': name})
         except Exception as e:
             logger.exception({
@@ -440,12 +777,93 @@ class Template:
         self._template.unregister_template(name)
         logger.debug({'event': 'template_unregistered', 'name': name})
 
+    def fork(self) -> Template:
+        """Create a template engine that starts out as a copy of this one.
+
+        The new engine has the same templates, partials, helpers and settings.
+        It shares the native registry with this engine copy-on-write, so
+        forking does not register anything again and engines that are never
+        changed afterwards share a single registry. Changes made to either
+        engine after forking are not visible to the other.
+
+        This makes it cheap to keep one base engine with the common helpers
+        and partials and fork it for every tenant.
+
+        Returns:
+            The new template engine.
+        """
+        forked = copy.copy(self)
+        forked._template = self._template.fork()
+        forked._known_partials = set(self._known_partials)
+        forked._helpers = dict(self._helpers)
+        # Handles compiled so far release their templates from this engine.
+        forked._init_compiled()
+        return forked
+
+    def snapshot(self) -> bytes:
+        """Export the registered templates, partials and settings.
+
+        The snapshot is a versioned binary encoding of everything registered
+        so far: template and partial sources, template file paths, the native
+        helper sets, the escape function and the strict and development mode
+        settings. Python helpers are recorded by name only. Snapshots can be
+        built once, e.g. at deploy time, and loaded by every worker with
+        `from_snapshot` instead of registering each template again.
+
+        Returns:
+            The encoded snapshot.
+        """
+        return self._template.snapshot()
+
+    @classmethod
+    def from_snapshot(cls, snapshot: bytes, helpers: dict[str, HelperFn] | None = None) -> Template:
+        """Create a template engine from a snapshot.
+
+        All templates are registered natively in a single call, without a
+        round trip from Python for each of them.
+
+        Args:
+            snapshot: A snapshot returned by `snapshot`.
+            helpers: The Python helpers recorded in the snapshot, by name.
+
+        Returns:
+            The template engine.
+
+        Raises:
+            ValueError: If the snapshot is invalid or was written by an
+                unsupported version, or a recorded Python helper is missing
+                from `helpers`.
+            FileNotFoundError: If a recorded template file no longer exists.
+        """
+        helpers = dict(helpers or {})
+        native_helpers = {name: create_helper(fn) for name, fn in helpers.items()}
+        template = cls()
+        template._template = HandlebarrzTemplate.from_snapshot(snapshot, native_helpers)
+        template._known_partials = set(template._template.partial_names())
+        template._helpers = helpers
+        logger.debug({'event': 'template_snapshot_loaded', 'partials': len(template._known_partials)})
+        return template
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        """Pickle the template engine as a snapshot and its Python helpers.
+
+        Unpickling loads the snapshot with `from_snapshot`, so the Python
+        helpers must be picklable themselves, e.g. module level functions.
+
+        Returns:
+            The callable and arguments that recreate the template engine.
+        """
+        return (type(self).from_snapshot, (self.snapshot(), self._helpers))
+
     def render(self, name: str, data: dict[str, Any], options: RuntimeOptions | None = None) -> str:
         """Render a template with the given data.
 
         Renders a previously registered template using the provided data
-        context. The data is converted to JSON before being passed to the
-        template engine.
+        context. The data must be JSON serializable; it is converted to native
+        values directly, without an intermediate JSON string.
+
+        The `data` entry of the options is exposed to the template as `@`
+        variables (e.g. `{{@state.name}}`), as in Handlebars.js.
 
         Args:
             name: The name of the template to render
@@ -456,13 +874,12 @@ class Template:
             str: The rendered template string
 
         Raises:
+            TypeError: If the data is not JSON serializable.
             ValueError: If the template does not exist or there is a rendering
                 error.
         """
-        # TODO(#502): options is currently ignored; need to add support for it.
-
         try:
-            result = self._template.render(name, json.dumps(data))
+            result = self._template.render(name, data, _runtime_data(options))
             logger.debug({'event': 'template_rendered', 'name': name})
             return result
         except ValueError as e:
@@ -473,12 +890,257 @@ class Template:
             })
             raise
 
+    def render_into(
+        self,
+        template: str | CompiledTemplate,
+        data: dict[str, Any],
+        target: bytearray | IO[str] | IO[bytes],
+        options: RuntimeOptions | None = None,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+        """Render a template directly into a buffer or file.
+
+        The output is written in chunks of at most `chunk_size` bytes as it is
+        rendered, so it never exists as one large string. This keeps the peak
+        memory of very large renders close to the size of the output itself.
+
+        Text files (`io.TextIOBase`) receive `str` chunks; a `bytearray` is
+        extended with the UTF-8 encoded output, and any other file object
+        (e.g. `io.BytesIO` or a file opened in binary mode) receives UTF-8
+        encoded `bytes` chunks.
+
+        Args:
+            template: The name of a registered template or a template returned
+                by `compile`.
+            data: The data to render the template with.
+            target: The buffer or file to write the output to.
+            options: Additional options for the template.
+            chunk_size: Maximum size of the written chunks in bytes.
+
+        Raises:
+            TypeError: If the data is not JSON serializable.
+            ValueError: If the template does not exist or there is a rendering
+                error. Output rendered before the error has already been
+                written to `target`.
+        """
+        if isinstance(target, bytearray):
+            write, binary = target.extend, True
+        else:
+            write, binary = target.write, not isinstance(target, io.TextIOBase)
+        self._render_chunks(template, data, write, binary, options, chunk_size)
+
+    def render_stream(
+        self,
+        template: str | CompiledTemplate,
+        data: dict[str, Any],
+        options: RuntimeOptions | None = None,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Iterator[str]:
+        """Render a template as a sequence of string chunks.
+
+        The template is rendered in a worker thread when iteration starts,
+        and each chunk is yielded as soon as it is complete. The render waits
+        while a few chunks are waiting to be consumed, so the output is never
+        held as a whole, and it stops at the next chunk if the iterator is
+        closed early. Chunks hold at most `chunk_size` bytes of UTF-8.
+
+        Python helpers called by the template run in the worker thread, with
+        a copy of the context variables of the consumer.
+
+        Args:
+            template: The name of a registered template or a template returned
+                by `compile`.
+            data: The data to render the template with.
+            options: Additional options for the template.
+            chunk_size: Maximum size of the chunks in bytes.
+
+        Yields:
+            The rendered output, chunk by chunk.
+
+        Raises:
+            TypeError: If the data is not JSON serializable.
+            ValueError: If the template does not exist or there is a rendering
+                error.
+        """
+        chunks: queue.Queue[str | _StreamEnd] = queue.Queue(maxsize=_STREAM_BUFFER_CHUNKS)
+        closed = threading.Event()
+
+        def write(chunk: str) -> None:
+            if closed.is_set():
+                raise _StreamClosedError
+            chunks.put(chunk)
+
+        def produce() -> None:
+            try:
+                self._render_chunks(template, data, write, False, options, chunk_size)
+            except BaseException as e:
+                chunks.put(_StreamEnd(e))
+            else:
+                chunks.put(_StreamEnd())
+
+        worker = threading.Thread(target=contextvars.copy_context().run, args=(produce,), daemon=True)
+        worker.start()
+        try:
+            while not isinstance(chunk := chunks.get(), _StreamEnd):
+                yield chunk
+            if chunk.error is not None:
+                raise chunk.error
+        finally:
+            # Stop a render the consumer has abandoned: the next chunk it
+            # writes raises, and draining the queue unblocks a pending write
+            # and leaves room for the end marker.
+            closed.set()
+            while not chunks.empty():
+                chunks.get_nowait()
+
+    def _render_chunks(
+        self,
+        template: str | CompiledTemplate,
+        data: dict[str, Any],
+        write: Callable[[Any], object],
+        binary: bool,
+        options: RuntimeOptions | None,
+        chunk_size: int,
+    ) -> None:
+        """Render a template, passing the output to `write` in chunks.
+
+        Args:
+            template: The name of a registered template or a compiled template.
+            data: The data to render the template with.
+            write: Callable receiving each chunk.
+            binary: Whether the chunks are passed as `bytes` instead of `str`.
+            options: Additional options for the template.
+            chunk_size: Maximum size of the chunks in bytes.
+
+        Raises:
+            TypeError: If the data is not JSON serializable.
+            ValueError: If the template does not exist or there is a rendering
+                error.
+        """
+        name = template.name if isinstance(template, CompiledTemplate) else template
+        try:
+            self._template.render_into(name, data, write, binary, chunk_size, _runtime_data(options))
+            logger.debug({'event': 'template_rendered_into', 'name': name})
+        except ValueError as e:
+            logger.exception({
+                'event': 'template_rendering_error',
+                'name': name,
+                'error': str(e),
+            })
+            raise
+
+    def render_many(
+        self,
+        template: str | CompiledTemplate,
+        contexts: Iterable[Context],
+        options: RuntimeOptions | None = None,
+        *,
+        parallel: bool = False,
+    ) -> list[str]:
+        """Render a template with each of the given contexts in one call.
+
+        This avoids the per-call overhead of `render` when the same template is
+        rendered against many contexts, e.g. one per dataset row. Templates
+        that do not call Python helpers are rendered without holding the GIL.
+
+        Args:
+            template: The name of a registered template or a template returned
+                by `compile`.
+            contexts: The data to render the template with, one per output.
+            options: Additional options shared by every render.
+            parallel: Whether to spread the renders over all available cores.
+                Ignored for templates that call Python helpers.
+
+        Returns:
+            The rendered strings, in the same order as `contexts`.
+
+        Raises:
+            TypeError: If a context is not JSON serializable.
+            ValueError: If the template does not exist or there is a rendering
+                error with any of the contexts.
+        """
+        name = template.name if isinstance(template, CompiledTemplate) else template
+        try:
+            results = self._template.render_many(name, contexts, parallel, _runtime_data(options))
+            logger.debug({'event': 'template_rendered_many', 'name': name, 'count': len(results)})
+            return results
+        except ValueError as e:
+            logger.exception({
+                'event': 'template_rendering_error',
+                'name': name,
+                'error': str(e),
+            })
+            raise
+
+    def render_variants(
+        self,
+        templates: Sequence[str | CompiledRenderer],
+        data: Context,
+        options: RuntimeOptions | None = None,
+        *,
+        parallel: bool = False,
+    ) -> list[str]:
+        """Render each of the given templates with the same data in one call.
+
+        The data and the runtime data from `options` are converted to native
+        values once and shared by every template, which makes rendering many
+        variants of a prompt against one large input much cheaper than calling
+        each template separately.
+
+        Args:
+            templates: Names of registered templates or functions returned by
+                `compile`. Functions compiled by other engines are rendered
+                by their own engine.
+            data: The data to render every template with.
+            options: Additional options for the templates.
+            parallel: Whether to spread the renders over all available cores.
+                Ignored if any of the templates calls Python helpers.
+
+        Returns:
+            The rendered strings, in the same order as `templates`.
+
+        Raises:
+            TypeError: If the data is not JSON serializable.
+            ValueError: If any template does not exist, fails to parse or
+                fails to render.
+        """
+        # Registered templates and templates compiled by this engine are
+        # rendered in one native call; anything else, including templates
+        # compiled by other engines, whose generated names may collide with
+        # ours, is called separately and spliced into the results.
+        names: list[str] = []
+        separate: dict[int, CompiledRenderer] = {}
+        for i, template in enumerate(templates):
+            if isinstance(template, str):
+                names.append(template)
+            elif isinstance(template, CompiledTemplate) and template._template is self:
+                names.append(template.name)
+            else:
+                separate[i] = template
+
+        try:
+            batched = iter(self._template.render_variants(names, data, parallel, _runtime_data(options)))
+            results = [separate[i](data, options) if i in separate else next(batched) for i in range(len(templates))]
+            logger.debug({'event': 'template_variants_rendered', 'count': len(results)})
+            return results
+        except ValueError as e:
+            logger.exception({
+                'event': 'template_rendering_error',
+                'error': str(e),
+            })
+            raise
+
     def render_template(self, template_string: str, data: dict[str, Any], options: RuntimeOptions | None = None) -> str:
         """Render a template string directly without registering it.
 
         Parses and renders the template string in one step. This is useful for
         one-off template rendering, but for templates that will be rendered
-        multiple times, it's more efficient to register them first.
+        multiple times, it's more efficient to register or compile them first.
+
+        The `data` entry of the options is exposed to the template as `@`
+        variables (e.g. `{{@state.name}}`), as in Handlebars.js.
 
         Args:
             template_string: The template string to render
@@ -489,34 +1151,12 @@ class Template:
             Rendered template string.
 
         Raises:
+            TypeError: If the data is not JSON serializable.
             ValueError: If there is a syntax error in the template or a
                 rendering error.
         """
         try:
-            # Merging runtime data with the data dictionary.
-            runtime_data = (options.get('data') if options is not None else {}) or {}
-            for k, v in runtime_data.items():
-                data[k] = v
-
-            # TODO(#502): get rid of this once the Rust library has a local variables
-            # support.
-
-            # Local variables support workaround:
-            # Context: Handlebars Rust implementation currently doesn't support
-            # local variables (e.g. {{@my_variable}}), so instead we are
-            # dynamically replacing those with global variables
-            # (e.g. {{my_variable}}) to make things work.
-            # This is of course not an ideal solution, and it comes with some
-            # overhead, but so far we weren't able to detect a use case where
-            # this could be a blocker (but time will tell).
-            matches = re.findall(r'{{@.*?}}', template_string)
-            for m in set(matches):
-                key = m.strip('{}@').split('.')[0]
-                if key in runtime_data:
-                    template_string = template_string.replace(m, m.replace('@', ''))
-
-            # Render the template.
-            result = self._template.render_template(template_string, json.dumps(data))
+            result = self._template.render_template(template_string, data, _runtime_data(options))
             logger.debug({'event': 'template_string_rendered'})
             return result
         except ValueError as e:
@@ -533,39 +1173,96 @@ class Template:
         It takes a template string and returns a function that can be called
         with different data contexts to render the template.
 
+        The template is parsed once and kept in the native registry, keyed by
+        its source, so compiling the same string again reuses the parsed
+        template and rendering the returned function never reparses it. The
+        template is unregistered once every function compiled from the source
+        has been garbage collected.
+
         Note: Unlike the JS version which can bake options into the compiled
         template, this implementation returns a function that uses the current
         configuration (strict mode, escape function, registered helpers, etc.)
         of the `Template` instance at the time the returned function is called.
 
+        As with Handlebars.js, syntax errors are not raised here but when the
+        returned function is called.
+
         Args:
             template_string: The Handlebars template string to compile.
 
         Returns:
             A callable function that takes a data dictionary and some runtime
             options and returns the rendered string.
-
-        Raises:
-            ValueError: If there is a syntax error during the initial parse
-            check performed by render_template (depending on Rust implementation
-            details).  Rendering errors will occur when the returned function is
-            called.
         """
+        try:
+            compiled = CompiledTemplate(self, template_string)
+        except ValueError as e:
+            error = str(e)
+            logger.debug({'event': 'template_compilation_error', 'error': error})
+
+            def failed(context: Context, options: RuntimeOptions | None = None) -> str:
+                """Compiled template function for a template that failed to parse.
 
-        def compiled(context: Context, options: RuntimeOptions | None = None) -> str:
-            """Compiled template function.
+                Args:
+                    context: The data to render the template with.
+                    options: Additional options for the template.
 
-            Args:
-                context: The data to render the template with.
-                options: Additional options for the template.
+                Raises:
+                    ValueError: Always, with the original parse error.
+                """
+                raise ValueError(error) from None
 
-            Returns:
-                The rendered template string.
-            """
-            return self.render_template(template_string, context, options)
+            return failed
 
+        logger.debug({'event': 'template_compiled', 'name': compiled.name})
         return compiled
 
+    def _retain_compiled(self, template_string: str) -> str:
+        """Compile a template string for a new `CompiledTemplate` handle.
+
+        Must be called with the compiled lock held.
+
+        Args:
+            template_string: The template source code.
+
+        Returns:
+            The name of the compiled template.
+
+        Raises:
+            ValueError: If there is a syntax error in the template.
+        """
+        self._drain_released()
+        name = self._template.compile(template_string)
+        self._compiled_refs[name] = self._compiled_refs.get(name, 0) + 1
+        return name
+
+    def _release_compiled(self, name: str) -> None:
+        """Release a compiled template whose handle was garbage collected.
+
+        Args:
+            name: The name of the compiled template.
+        """
+        self._released.append(name)
+        # If the lock is held, its holder or the next compilation releases it.
+        if self._compiled_lock.acquire(blocking=False):
+            try:
+                self._drain_released()
+            finally:
+                self._compiled_lock.release()
+
+    def _drain_released(self) -> None:
+        """Unregister compiled templates whose last handle was released.
+
+        Must be called with the compiled lock held.
+        """
+        while self._released:
+            name = self._released.popleft()
+            count = self._compiled_refs.pop(name, 0) - 1
+            if count > 0:
+                self._compiled_refs[name] = count
+            elif count == 0:
+                self._template.unregister_template(name)
+
     def register_extra_helpers(self) -> None:
         """Registers extra helper functions.
 
@@ -586,17 +1283,216 @@ class Template:
             })
             raise
 
+    def register_dotprompt_helpers(self) -> None:
+        """Registers native implementations of the Dotprompt helpers.
+
+        - `history`
+        - `ifEquals`
+        - `json`
+        - `media`
+        - `role`
+        - `section`
+        - `unlessEquals`
+
+        Templates that only use these helpers render entirely in Rust. Helpers
+        registered later under the same names replace them.
+        """
+        try:
+            self._template.register_dotprompt_helpers()
+            logger.debug({'event': 'dotprompt_helpers_registered'})
+        except Exception as e:
+            logger.exception({
+                'event': 'dotprompt_helpers_registration_error',
+                'error': str(e),
+            })
+            raise
+
+
+class CompiledTemplate:
+    """A template string parsed once and rendered many times.
+
+    Instances are created by `Template.compile`. The parsed template is
+    registered in the native registry of the owning `Template` under a
+    generated name, so calling the instance renders it without parsing the
+    source again. It stays registered while any instance compiled from the
+    same source is alive.
+    """
+
+    def __init__(self, template: Template, template_string: str) -> None:
+        """Parse and register a template string.
+
+        Args:
+            template: The template engine that owns the compiled template.
+            template_string: The template source code.
+
+        Raises:
+            ValueError: If there is a syntax error in the template.
+        """
+        self._template: Template = template
+        self._template_string: str = template_string
+        with template._compiled_lock:
+            self._name: str = template._retain_compiled(template_string)
+        self._finalizer: weakref.finalize = weakref.finalize(self, template._release_compiled, self._name)
+
+    @property
+    def name(self) -> str:
+        """Name of the compiled template in the native registry.
+
+        If the template was evicted from a bounded registry, it is compiled
+        again first.
+
+        Returns:
+            The generated template name.
+        """
+        template = self._template
+        if template._bounded and not template._template.has_template(self._name):
+            with template._compiled_lock:
+                if not template._template.has_template(self._name):
+                    name = template._retain_compiled(self._template_string)
+                    self._finalizer.detach()
+                    self._finalizer = weakref.finalize(self, template._release_compiled, name)
+                    template._released.append(self._name)
+                    template._drain_released()
+                    self._name = name
+        return self._name
+
+    def __call__(self, context: Context, options: RuntimeOptions | None = None) -> str:
+        """Render the compiled template.
+
+        Args:
+            context: The data to render the template with.
+            options: Additional options for the template.
+
+        Returns:
+            The rendered template string.
+
+        Raises:
+            ValueError: If there is a rendering error.
+        """
+        return self._template.render(self.name, context, options)
+
+
+class HelperParams(Sequence[Any]):
+    """Positional parameters of a helper call.
+
+    Each parameter is converted to a Python value the first time it is
+    accessed, so helpers only pay for the parameters they read. Like the
+    options they come from, the parameters can only be read while the helper
+    call is in progress.
+
+    This is not a `list`: helpers that need list operations, or that keep the
+    parameters after returning, should convert them with `list(params)`.
+    """
+
+    __slots__ = ('_length', '_options', '_values')
+
+    def __init__(self, options: HandlebarrzHelperOptions) -> None:
+        """Wrap the parameters of a native helper call.
+
+        Args:
+            options: The native options of the helper call.
+        """
+        self._options: HandlebarrzHelperOptions = options
+        self._length: int = options.param_count()
+        self._values: dict[int, Any] = {}
+
+    def __len__(self) -> int:
+        """Return the number of parameters."""
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> Any: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Any]: ...
+
+    def __getitem__(self, index: int | slice) -> Any:
+        """Return the parameter at `index`, converting it on first access.
+
+        Args:
+            index: Position of the parameter, or a slice of positions.
+
+        Returns:
+            The parameter value, or a list of values for a slice.
+
+        Raises:
+            IndexError: If there is no parameter at `index`.
+        """
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('helper parameter index out of range')
+        if index not in self._values:
+            self._values[index] = self._options.param(index)
+        return self._values[index]
+
+    def __eq__(self, other: object) -> bool:
+        """Compare the parameters with another sequence element-wise."""
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        """Return a representation listing the parameter values."""
+        return f'HelperParams({list(self)!r})'
+
 
 class HelperOptions:
     """Handlebars helper options."""
 
     def __init__(self, options: HandlebarrzHelperOptions) -> None:
+        """Wrap the native options of a helper call.
+
+        Args:
+            options: The native options of the helper call.
+        """
         self._options: HandlebarrzHelperOptions = options
+        self._hash: dict[str, Any] | None = None
 
     def context(self) -> dict[str, Any]:
-        """Get a representation of a context."""
-        context_json = self._options.context_json()
-        return json.loads(context_json) or {}
+        """Get a representation of a context.
+
+        This converts the whole context; use `lookup` to read a few fields of
+        a large context.
+        """
+        return self._options.context() or {}
+
+    def lookup(self, path: str) -> Any:
+        """Get the value at a dotted path in the context.
+
+        The path is resolved natively and only the value found there is
+        converted to Python, so the cost does not depend on the size of the
+        rest of the context.
+
+        Examples:
+            ```python
+            def greet(params, options):
+                return f'Hello {options.lookup("user.name")}!'
+            ```
+
+        Args:
+            path: Dotted path such as `user.address.city`. Numeric segments
+                index into lists (`items.0`) and segments may be wrapped in
+                square brackets (`[first name]`).
+
+        Returns:
+            The value at the path, or None if the path does not exist.
+        """
+        return self._options.lookup(path)
+
+    def hash(self) -> dict[str, Any]:
+        """Get all hash arguments (resolved within the context).
+
+        The arguments are fetched from the native side once per helper call.
+
+        Returns:
+            A dictionary mapping hash keys to their values.
+        """
+        if self._hash is None:
+            self._hash = self._options.hash()
+        return self._hash
 
     def hash_value(self, key: str) -> Any:
         """Get a hash value for the given key (resolved within the context).
@@ -605,10 +1501,9 @@ class HelperOptions:
             key: The key corresponding for the hash required.
 
         Returns:
-            The hash value.
+            The hash value, or an empty string if the key was not passed.
         """
-        hash_value_json = self._options.hash_value_json(key)
-        return json.loads(hash_value_json) if hash_value_json else ''
+        return self.hash().get(key, '')
 
     def fn(self) -> str:
         """Renders a default inner template (if the helper is a block helper)."""
@@ -625,8 +1520,9 @@ def create_helper(
     """Create a helper function compatible with the Rust interface.
 
     This function adapts a Python function with typed parameters to the format
-    expected by the Rust bindings. It handles the serialization and
-    deserialization of JSON data between Rust and Python.
+    expected by the Rust bindings. The Rust bindings pass only the native
+    helper options; the positional parameters are exposed lazily through
+    `HelperParams` and the options are wrapped in `HelperOptions`.
 
     Helper functions in Handlebars can be used for various purposes:
 
@@ -637,16 +1533,14 @@ def create_helper(
     - Transforming data (sorting, filtering, mapping).
 
     Args:
-        fn: A function taking of type HelperFn (params, hash, context).
+        fn: A function of type HelperFn (params, options).
 
     Returns:
         Function compatible with the Rust interface.
     """
 
-    def wrapper(params_json: str, options: HandlebarrzHelperOptions) -> str:
-        params = json.loads(params_json)
-        result = fn(params, HelperOptions(options))
-        return result
+    def wrapper(options: HandlebarrzHelperOptions) -> str:
+        return fn(HelperParams(options), HelperOptions(options))
 
     return wrapper
 
@@ -666,11 +1560,22 @@ def package_name() -> str:
 
 
 __all__ = [
+    'DEFAULT_CHUNK_SIZE',
+    'CompiledTemplate',
     'EscapeFunction',
     'Handlebars',
+    'HelperOptions',
+    'HelperParams',
+    'RegistryStats',
+    'RenderBudget',
+    'RenderBudgetError',
     'Template',
+    'TemplateRegistrationError',
+    'TemplateSummary',
+    'analyze_template',
     'create_helper',
     'html_escape',
+    'marker_escape',
     'no_escape',
     'package_name',
 ]
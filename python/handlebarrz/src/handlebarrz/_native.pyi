@@ -16,17 +16,30 @@
 
 """Stub type annotations for native Handlebars."""
 
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
+from typing import Any
 
 def html_escape(text: str) -> str: ...
 def no_escape(text: str) -> str: ...
+def marker_escape(text: str) -> str: ...
+def analyze_template(template_string: str) -> dict[str, Any]: ...
+
+class RenderBudgetError(ValueError):
+    """Stub type annotations for the native render budget error."""
+
+    limit: str
 
 class HandlebarrzHelperOptions:
     """Stub type annotations for native Handlebars helper options."""
 
     def __init__(self) -> None: ...
     def context_json(self) -> str: ...
+    def context(self) -> Any: ...
+    def lookup(self, path: str) -> Any: ...
     def hash_value_json(self, key: str) -> str: ...
+    def param_count(self) -> int: ...
+    def param(self, index: int) -> Any: ...
+    def hash(self) -> dict[str, Any]: ...
     def template(self) -> str: ...
     def inverse(self) -> str: ...
 
@@ -34,6 +47,13 @@ class HandlebarrzTemplate:
     """Stub type annotations for native Handlebars."""
 
     def __init__(self) -> None: ...
+    def fork(self) -> HandlebarrzTemplate: ...
+    def snapshot(self) -> bytes: ...
+    @staticmethod
+    def from_snapshot(
+        snapshot: bytes, helpers: dict[str, Callable[[HandlebarrzHelperOptions], str]]
+    ) -> HandlebarrzTemplate: ...
+    def partial_names(self) -> list[str]: ...
 
     # Strict mode.
     def get_strict_mode(self) -> bool: ...
@@ -43,25 +63,60 @@ class HandlebarrzTemplate:
     def get_dev_mode(self) -> bool: ...
     def set_dev_mode(self, enabled: bool) -> None: ...
 
+    # Render budget.
+    def set_render_budget(
+        self, timeout: float | None = None, max_output_bytes: int | None = None, max_iterations: int | None = None
+    ) -> None: ...
+    def get_render_budget(self) -> tuple[float | None, int | None, int | None]: ...
+
     # Escape function.
     def set_escape_fn(self, escape_fn: str) -> None: ...
 
     # Template registration.
     def register_template(self, name: str, template_string: str) -> None: ...
     def register_partial(self, name: str, template_string: str) -> None: ...
+    def register_templates(self, templates: dict[str, str]) -> dict[str, str]: ...
+    def register_partials(self, partials: dict[str, str]) -> dict[str, str]: ...
     def register_template_file(self, name: str, file_path_str: str) -> None: ...
     def register_templates_directory(self, dir_path_str: str, extension: str) -> None: ...
+    def compile(self, template_string: str) -> str: ...
 
     # Helper registration.
-    def register_helper(self, name: str, helper_fn: Callable[[str, HandlebarrzHelperOptions], str]) -> None: ...
+    def register_helper(self, name: str, helper_fn: Callable[[HandlebarrzHelperOptions], str]) -> None: ...
 
     # Template management.
     def has_template(self, name: str) -> bool: ...
     def unregister_template(self, name: str) -> None: ...
 
+    # Eviction.
+    def set_capacity(self, max_entries: int | None = None, max_bytes: int | None = None) -> None: ...
+    def get_capacity(self) -> tuple[int | None, int | None]: ...
+    def pin(self, name: str) -> None: ...
+    def unpin(self, name: str) -> None: ...
+    def cache_stats(self) -> dict[str, Any]: ...
+
     # Rendering.
-    def render(self, name: str, data_json: str) -> str: ...
-    def render_template(self, template_str: str, data_json: str) -> str: ...
+    def render(self, name: str, data: Any, runtime_data: Any = None) -> str: ...
+    def render_into(
+        self,
+        name: str,
+        data: Any,
+        write: Callable[[Any], object],
+        binary: bool = False,
+        chunk_size: int = 65536,
+        runtime_data: Any = None,
+    ) -> None: ...
+    def render_many(
+        self, name: str, contexts: Iterable[Any], parallel: bool = False, runtime_data: Any = None
+    ) -> list[str]: ...
+    def render_variants(
+        self, names: list[str], data: Any, parallel: bool = False, runtime_data: Any = None
+    ) -> list[str]: ...
+    def render_template(self, template_str: str, data: Any, runtime_data: Any = None) -> str: ...
+
+    # Template introspection.
+    def analyze(self, template_string: str) -> dict[str, Any]: ...
 
     # Extra helper registration.
     def register_extra_helpers(self) -> None: ...
+    def register_dotprompt_helpers(self) -> None: ...
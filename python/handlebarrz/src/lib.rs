@@ -16,16 +16,42 @@
 
 use handlebars::{
     Context, Handlebars, Helper, HelperDef, Output, RenderContext, RenderError, RenderErrorReason,
-    Renderable,
+    Renderable, StringOutput, Template, TemplateError,
 };
-use pyo3::exceptions::{PyFileNotFoundError, PyValueError};
+use pyo3::exceptions::{PyFileNotFoundError, PyIndexError, PyRuntimeError, PyValueError};
 use pyo3::prelude::*;
+use pyo3::types::{PyBytes, PyDict, PyIterator, PyString};
 use pyo3::wrap_pyfunction;
 use serde_json::Value;
-use std::collections::HashMap;
+use std::collections::{HashMap, HashSet};
 use std::path::Path;
+use std::sync::{Arc, Mutex, MutexGuard, PoisonError, RwLock};
+use std::thread;
+use std::time::Duration;
 
+mod analysis;
+mod batch;
+mod budget;
+mod convert;
+mod data;
 mod helpers;
+mod lru;
+mod output;
+mod path;
+mod snapshot;
+
+/// Prefix of the names under which `compile` registers templates.
+const COMPILED_TEMPLATE_PREFIX: &str = "__handlebarrz_compiled__/";
+
+pyo3::create_exception!(
+    _native,
+    RenderBudgetError,
+    PyValueError,
+    "Raised when a render exceeds its time, output size or loop iteration budget."
+);
+
+/// Smallest number of templates worth parsing on a thread of its own.
+const MIN_PARSE_CHUNK: usize = 64;
 
 /// Python bindings for the handlebars-rust library.
 ///
@@ -36,12 +62,15 @@ mod helpers;
 /// - HTML escaping utilities.
 /// - Strict mode and development mode.
 /// - Template and helper function registration.
-#[pymodule]
+#[pymodule(gil_used = false)]
 fn _native(py: Python<'_>, m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_class::<HandlebarrzHelperOptions>()?;
     m.add_class::<HandlebarrzTemplate>()?;
+    m.add("RenderBudgetError", py.get_type::<RenderBudgetError>())?;
     m.add_function(wrap_pyfunction!(html_escape, py)?)?;
     m.add_function(wrap_pyfunction!(no_escape, py)?)?;
+    m.add_function(wrap_pyfunction!(marker_escape, py)?)?;
+    m.add_function(wrap_pyfunction!(analyze_template, py)?)?;
     Ok(())
 }
 
@@ -90,9 +119,77 @@ fn no_escape(text: &str) -> String {
     handlebars::no_escape(text)
 }
 
+/// Escapes Dotprompt markers such as `<<<dotprompt:role:system>>>` in a
+/// string and passes everything else through.
+///
+/// Use it as the escape function of engines rendering Dotprompt templates
+/// without HTML escaping, so that interpolated values cannot inject message,
+/// history, media or section markers. A trailing start of a marker and a
+/// leading `dotprompt` are escaped as well, so that values rendered next to
+/// each other cannot be joined into a marker.
+///
+/// # Arguments
+///
+/// * `text` - String to be escaped.
+///
+/// # Returns
+///
+/// String with the markers escaped.
+#[pyfunction]
+fn marker_escape(text: &str) -> String {
+    helpers::escape_markers(text)
+}
+
+/// Parses a template string and summarizes what it uses.
+///
+/// Expressions without arguments, such as `{{name}}`, are reported as
+/// variables. Use `HandlebarrzTemplate.analyze` to report the ones naming a
+/// registered helper as helpers.
+///
+/// # Arguments
+///
+/// * `template_string` - The template source code.
+///
+/// # Returns
+///
+/// A dict with the `partials`, `inline_partials`, `variables` and `helpers`
+/// sets, the `dynamic_partials` flag, and the block nesting `depth` and
+/// `node_count` of the template.
+///
+/// # Raises
+///
+/// `PyValueError` if the template cannot be parsed.
+#[pyfunction]
+fn analyze_template<'py>(py: Python<'py>, template_string: &str) -> PyResult<Bound<'py, PyDict>> {
+    let template =
+        Template::compile(template_string).map_err(|e| PyValueError::new_err(e.to_string()))?;
+    summary_to_py(py, analysis::summarize(&template, |_| false))
+}
+
+/// Converts a template summary to a Python dict.
+fn summary_to_py(
+    py: Python<'_>,
+    summary: analysis::TemplateSummary,
+) -> PyResult<Bound<'_, PyDict>> {
+    let dict = PyDict::new(py);
+    dict.set_item("partials", summary.partials)?;
+    dict.set_item("inline_partials", summary.inline_partials)?;
+    dict.set_item("dynamic_partials", summary.dynamic_partials)?;
+    dict.set_item("variables", summary.variables)?;
+    dict.set_item("helpers", summary.helpers)?;
+    dict.set_item("depth", summary.depth)?;
+    dict.set_item("node_count", summary.node_count)?;
+    Ok(dict)
+}
+
 /// Handlebars helper options Python wrapper.
 ///
+/// Positional parameters and hash values are converted to Python objects only
+/// when they are accessed.
+///
 /// WARNING: only intended to be used within the Python::with_gil(...) scope and not stored across threads.
+/// The options are invalidated when the helper call returns; using them after
+/// that raises `RuntimeError`.
 #[pyclass(unsendable)]
 pub struct HandlebarrzHelperOptions {
     helper_ptr: *const Helper<'static>,
@@ -101,6 +198,54 @@ pub struct HandlebarrzHelperOptions {
     rc_ptr: *mut RenderContext<'static, 'static>,
 }
 
+impl HandlebarrzHelperOptions {
+    /// Detaches the options from the helper call they were created for.
+    fn invalidate(&mut self) {
+        self.helper_ptr = std::ptr::null();
+        self.reg_ptr = std::ptr::null();
+        self.ctx_ptr = std::ptr::null();
+        self.rc_ptr = std::ptr::null_mut();
+    }
+
+    fn check_valid(&self) -> PyResult<()> {
+        if self.helper_ptr.is_null() {
+            return Err(PyRuntimeError::new_err(
+                "Helper options used outside of the helper call",
+            ));
+        }
+        Ok(())
+    }
+
+    fn helper(&self) -> PyResult<&Helper<'static>> {
+        self.check_valid()?;
+        Ok(unsafe { &*self.helper_ptr })
+    }
+
+    fn ctx(&self) -> PyResult<&Context> {
+        self.check_valid()?;
+        Ok(unsafe { &*self.ctx_ptr })
+    }
+
+    /// Renders a block of the helper into a string.
+    fn render_block(
+        &self,
+        block: impl FnOnce(&Helper<'static>) -> Option<&Template>,
+    ) -> PyResult<String> {
+        let helper = self.helper()?;
+        let reg = unsafe { &*self.reg_ptr };
+        let ctx = unsafe { &*self.ctx_ptr };
+        let rc = unsafe { &mut *self.rc_ptr };
+
+        if let Some(template) = block(helper) {
+            template
+                .renders(reg, ctx, rc)
+                .map_err(|e| PyValueError::new_err(e.to_string()))
+        } else {
+            Ok(String::new())
+        }
+    }
+}
+
 #[pymethods]
 impl HandlebarrzHelperOptions {
     #[new]
@@ -116,15 +261,42 @@ impl HandlebarrzHelperOptions {
     /// Returns JSON representation of a context.
     #[pyo3(text_signature = "($self)")]
     pub fn context_json(&self) -> PyResult<String> {
-        let ctx = unsafe { &*self.ctx_ptr };
+        let ctx = self.ctx()?;
         serde_json::to_string(ctx.data())
             .map_err(|e| pyo3::exceptions::PyValueError::new_err(e.to_string()))
     }
 
+    /// Returns the context as Python objects.
+    #[pyo3(text_signature = "($self)")]
+    pub fn context(&self, py: Python<'_>) -> PyResult<PyObject> {
+        convert::value_to_py(py, self.ctx()?.data())
+    }
+
+    /// Returns the value at a dotted path in the context.
+    ///
+    /// Only the value at the path is converted to Python objects, so this is
+    /// much cheaper than `context` when a helper needs a few fields of a large
+    /// context.
+    ///
+    /// # Arguments
+    ///
+    /// * `path` - Dotted path such as `user.address.city` or `items.0`.
+    ///
+    /// # Returns
+    ///
+    /// The value at the path, or `None` if the path does not exist.
+    #[pyo3(text_signature = "($self, path)")]
+    pub fn lookup(&self, py: Python<'_>, path: &str) -> PyResult<PyObject> {
+        match path::lookup(self.ctx()?.data(), path) {
+            Some(value) => convert::value_to_py(py, value),
+            None => Ok(py.None()),
+        }
+    }
+
     /// Returns hash JSON value for a given key (resolved within the context).
     #[pyo3(text_signature = "($self, key)")]
     pub fn hash_value_json(&self, key: &str) -> PyResult<String> {
-        let helper = unsafe { &*self.helper_ptr };
+        let helper = self.helper()?;
         if let Some(path_and_json) = helper.hash_get(key) {
             let value = path_and_json.value();
             serde_json::to_string(value)
@@ -134,38 +306,46 @@ impl HandlebarrzHelperOptions {
         }
     }
 
-    // Renders into a string and returns the default inner template (if the helper is a block helper).
+    /// Returns the number of positional parameters passed to the helper.
     #[pyo3(text_signature = "($self)")]
-    pub fn template(&self) -> PyResult<String> {
-        let helper = unsafe { &*self.helper_ptr };
-        let reg = unsafe { &*self.reg_ptr };
-        let ctx = unsafe { &*self.ctx_ptr };
-        let rc = unsafe { &mut *self.rc_ptr };
+    pub fn param_count(&self) -> PyResult<usize> {
+        Ok(self.helper()?.params().len())
+    }
 
-        if let Some(template) = helper.template() {
-            template
-                .renders(reg, ctx, rc)
-                .map_err(|e| PyValueError::new_err(e.to_string()))
-        } else {
-            Ok(String::new())
+    /// Returns the positional parameter at `index` as a Python object.
+    ///
+    /// # Raises
+    ///
+    /// `PyIndexError` if there is no parameter at `index`.
+    #[pyo3(text_signature = "($self, index)")]
+    pub fn param(&self, py: Python<'_>, index: usize) -> PyResult<PyObject> {
+        let param = self
+            .helper()?
+            .param(index)
+            .ok_or_else(|| PyIndexError::new_err("helper parameter index out of range"))?;
+        convert::value_to_py(py, param.value())
+    }
+
+    /// Returns all hash arguments (resolved within the context) as a dict.
+    #[pyo3(text_signature = "($self)")]
+    pub fn hash<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        let dict = PyDict::new(py);
+        for (key, value) in self.helper()?.hash() {
+            dict.set_item(*key, convert::value_to_py(py, value.value())?)?;
         }
+        Ok(dict)
+    }
+
+    // Renders into a string and returns the default inner template (if the helper is a block helper).
+    #[pyo3(text_signature = "($self)")]
+    pub fn template(&self) -> PyResult<String> {
+        self.render_block(|helper| helper.template())
     }
 
     // Renders into a string and returns the template of else branch (if any).
     #[pyo3(text_signature = "($self)")]
     pub fn inverse(&self) -> PyResult<String> {
-        let helper = unsafe { &*self.helper_ptr };
-        let reg = unsafe { &*self.reg_ptr };
-        let ctx = unsafe { &*self.ctx_ptr };
-        let rc = unsafe { &mut *self.rc_ptr };
-
-        if let Some(template) = helper.inverse() {
-            template
-                .renders(reg, ctx, rc)
-                .map_err(|e| PyValueError::new_err(e.to_string()))
-        } else {
-            Ok(String::new())
-        }
+        self.render_block(|helper| helper.inverse())
     }
 }
 
@@ -175,6 +355,8 @@ struct PyHelperDef {
 }
 
 impl HelperDef for PyHelperDef {
+    /// Calls the Python function, acquiring the GIL for the duration of the
+    /// call if the render released it.
     fn call<'reg: 'rc, 'rc>(
         &self,
         h: &Helper<'rc>,
@@ -184,17 +366,8 @@ impl HelperDef for PyHelperDef {
         out: &mut dyn Output,
     ) -> Result<(), RenderError> {
         Python::with_gil(|py| {
-            // Extract params.
-            let params: Vec<&Value> = h.params().iter().map(|p| p.value()).collect();
-            let params_json = match serde_json::to_string(&params) {
-                Ok(json) => json,
-                Err(e) => {
-                    let desc = format!("Failed to serialize params: {e}");
-                    return Err(RenderError::from(RenderErrorReason::Other(desc)));
-                }
-            };
-
-            // Create template helper context.
+            // Create template helper context. Params and hash values are
+            // converted on demand through it.
             let py_options = HandlebarrzHelperOptions {
                 helper_ptr: h as *const _ as *const _,
                 reg_ptr: reg as *const _ as *const _,
@@ -208,7 +381,12 @@ impl HelperDef for PyHelperDef {
             })?;
 
             // Call Python function.
-            let result = self.func.call1(py, (params_json, py_options_obj));
+            let result = self.func.call1(py, (py_options_obj.clone_ref(py),));
+
+            // The pointers are only valid for the duration of this call.
+            if let Ok(mut options) = py_options_obj.try_borrow_mut(py) {
+                options.invalidate();
+            }
 
             match result {
                 Ok(result) => {
@@ -257,10 +435,50 @@ impl HelperDef for PyHelperDef {
 /// result = engine.render('my_template', data)
 /// print(result)              # Output: <p>John</p>
 /// ```
-#[pyclass]
+///
+/// Templates (including the partials they use) that do not call any Python
+/// helper are rendered with the GIL released, so several threads can render
+/// them in parallel.
+///
+/// The registry is shared copy-on-write between an instance and the
+/// instances created from it with `fork`, so forking is cheap and only
+/// instances that are changed afterwards get their own copy.
+///
+/// All methods can be called from any number of threads at once. Every
+/// render works on the version of the engine that was current when it
+/// started, taken under a short read lock. Changes are made under the write
+/// lock, and templates are parsed before it is taken, so registering a
+/// template never waits for renders in progress and renders only wait for
+/// the change itself.
+#[pyclass(frozen)]
 struct HandlebarrzTemplate {
-    registry: Handlebars<'static>,
-    py_helpers: HashMap<String, PyObject>,
+    engine: RwLock<Engine>,
+}
+
+/// A version of the state of a `HandlebarrzTemplate`.
+///
+/// Cloning it is cheap: all parts are reference counted and copied when
+/// they are changed while shared.
+#[derive(Clone)]
+struct Engine {
+    registry: Arc<Handlebars<'static>>,
+    /// Names of the registered Python helpers.
+    py_helpers: Arc<HashSet<String>>,
+    /// Names of compiled templates keyed by their source.
+    compiled: Arc<HashMap<String, String>>,
+    next_compiled_id: usize,
+    /// What was registered, for `snapshot`.
+    registrations: Arc<snapshot::Registrations>,
+    /// Whether a registered template can be rendered without the GIL, keyed
+    /// by template name. Replaced whenever templates or helpers change.
+    gil_free: Arc<Mutex<HashMap<String, bool>>>,
+    /// Recency of the evictable templates. Shared by all versions of the
+    /// engine, and copied when it is forked.
+    lru: Arc<Mutex<lru::Lru>>,
+    /// Whether a capacity is set, so renders only track recency if needed.
+    bounded: bool,
+    /// Limits of each render.
+    budget: budget::Budget,
 }
 
 #[pymethods]
@@ -272,12 +490,161 @@ impl HandlebarrzTemplate {
     /// A new `HandlebarrzTemplate` instance.
     #[new]
     fn new() -> Self {
-        let registry = Handlebars::new();
+        let mut registry = Handlebars::new();
+        registry.register_helper(data::DATA_HELPER, Box::new(data::DataHelper {}));
+        registry.register_helper(
+            budget::LOOP_COUNTER_HELPER,
+            Box::new(budget::LoopCounterHelper {}),
+        );
 
-        Self {
-            registry,
-            py_helpers: HashMap::new(),
+        Self::from_engine(Engine {
+            registry: Arc::new(registry),
+            py_helpers: Arc::default(),
+            compiled: Arc::default(),
+            next_compiled_id: 0,
+            registrations: Arc::default(),
+            gil_free: Arc::default(),
+            lru: Arc::default(),
+            bounded: false,
+            budget: budget::Budget::default(),
+        })
+    }
+
+    /// Creates a template engine with the same templates, partials, helpers
+    /// and settings as this one.
+    ///
+    /// Nothing is copied up front: both engines share the registry until
+    /// either of them is changed, and changes made to one of them are never
+    /// visible to the other.
+    ///
+    /// # Returns
+    ///
+    /// A new `HandlebarrzTemplate` instance.
+    #[pyo3(text_signature = "($self)")]
+    fn fork(&self) -> Self {
+        let mut engine = self.engine();
+        engine.lru = Arc::new(Mutex::new(engine.lru().clone()));
+        Self::from_engine(engine)
+    }
+
+    /// Exports the registered templates, partials, helpers and settings as a
+    /// versioned binary snapshot.
+    ///
+    /// Python helpers are recorded by name only; `from_snapshot` binds them
+    /// again.
+    ///
+    /// # Returns
+    ///
+    /// The encoded snapshot.
+    #[pyo3(text_signature = "($self)")]
+    fn snapshot<'py>(&self, py: Python<'py>) -> Bound<'py, PyBytes> {
+        let engine = self.engine();
+        let snapshot = snapshot::Snapshot {
+            registrations: snapshot::Registrations::clone(&engine.registrations),
+            py_helpers: engine.py_helpers.iter().cloned().collect(),
+            strict_mode: engine.registry.strict_mode(),
+            dev_mode: engine.registry.dev_mode(),
+            next_compiled_id: engine.next_compiled_id,
+            budget: engine.budget,
+        };
+        PyBytes::new(py, &snapshot::encode(&snapshot))
+    }
+
+    /// Creates a template engine from a snapshot produced by `snapshot`.
+    ///
+    /// # Arguments
+    ///
+    /// * `snapshot` - The encoded snapshot.
+    /// * `helpers` - The Python helpers recorded in the snapshot, by name.
+    ///
+    /// # Returns
+    ///
+    /// A new `HandlebarrzTemplate` instance.
+    ///
+    /// # Raises
+    ///
+    /// `PyValueError` if the snapshot is invalid, a recorded helper is not
+    /// provided or a template cannot be registered.
+    /// `PyFileNotFoundError` if a recorded template file no longer exists.
+    #[staticmethod]
+    #[pyo3(text_signature = "(snapshot, helpers)")]
+    fn from_snapshot(
+        py: Python<'_>,
+        snapshot: &[u8],
+        helpers: &Bound<'_, PyDict>,
+    ) -> PyResult<Self> {
+        let snapshot = snapshot::decode(snapshot).map_err(PyValueError::new_err)?;
+        let mut missing = Vec::new();
+        let mut py_helpers = Vec::with_capacity(snapshot.py_helpers.len());
+        for name in &snapshot.py_helpers {
+            match helpers.get_item(name)? {
+                Some(helper) => py_helpers.push((name, helper.unbind())),
+                None => missing.push(name.as_str()),
+            }
+        }
+        if !missing.is_empty() {
+            return Err(PyValueError::new_err(format!(
+                "Helpers required by the snapshot were not provided: {}",
+                missing.join(", ")
+            )));
+        }
+
+        let registrations = snapshot.registrations;
+        let engine = Self::new();
+        engine.set_escape_fn(&registrations.escape_fn)?;
+        engine.set_strict_mode(snapshot.strict_mode)?;
+        if registrations.dotprompt_helpers {
+            engine.register_dotprompt_helpers()?;
+        }
+        if registrations.extra_helpers {
+            engine.register_extra_helpers()?;
+        }
+        for (name, helper) in py_helpers {
+            engine.register_helper(name, helper)?;
+        }
+        let (partials, templates): (Vec<_>, Vec<_>) = registrations
+            .sources
+            .iter()
+            .map(|(name, source)| (name.clone(), source.clone()))
+            .partition(|(name, _)| registrations.partials.contains(name));
+        for (sources, partial) in [(partials, true), (templates, false)] {
+            let errors = engine.register_sources(py, sources, partial);
+            if let Some((name, error)) = errors.into_iter().next() {
+                return Err(PyValueError::new_err(format!("{name}: {error}")));
+            }
+        }
+        for (name, path) in &registrations.files {
+            engine.register_template_file(name, path)?;
         }
+
+        let compiled = registrations
+            .sources
+            .iter()
+            .filter(|(name, _)| name.starts_with(COMPILED_TEMPLATE_PREFIX))
+            .map(|(name, source)| (source.clone(), name.clone()))
+            .collect();
+        engine.update(|e| {
+            e.compiled = Arc::new(compiled);
+            e.next_compiled_id = snapshot.next_compiled_id;
+            e.set_budget(snapshot.budget);
+        });
+        engine.set_dev_mode(snapshot.dev_mode)?;
+        Ok(engine)
+    }
+
+    /// Returns the names of the registered partials.
+    ///
+    /// # Returns
+    ///
+    /// The partial names, sorted.
+    #[pyo3(text_signature = "($self)")]
+    fn partial_names(&self) -> Vec<String> {
+        self.engine()
+            .registrations
+            .partials
+            .iter()
+            .cloned()
+            .collect()
     }
 
     /// Sets the strict mode for the template engine.
@@ -293,8 +660,8 @@ impl HandlebarrzTemplate {
     ///
     /// `None`
     #[pyo3(text_signature = "($self, enabled)")]
-    fn set_strict_mode(&mut self, enabled: bool) -> PyResult<()> {
-        self.registry.set_strict_mode(enabled);
+    fn set_strict_mode(&self, enabled: bool) -> PyResult<()> {
+        self.update(|e| e.registry_mut().set_strict_mode(enabled));
         Ok(())
     }
 
@@ -305,7 +672,7 @@ impl HandlebarrzTemplate {
     /// Whether strict mode is currently enabled.
     #[pyo3(text_signature = "($self)")]
     fn get_strict_mode(&self) -> bool {
-        self.registry.strict_mode()
+        self.engine().registry.strict_mode()
     }
 
     /// Sets the development mode for the template engine.
@@ -321,8 +688,8 @@ impl HandlebarrzTemplate {
     ///
     /// `None`
     #[pyo3(text_signature = "($self, enabled)")]
-    fn set_dev_mode(&mut self, enabled: bool) -> PyResult<()> {
-        self.registry.set_dev_mode(enabled);
+    fn set_dev_mode(&self, enabled: bool) -> PyResult<()> {
+        self.update(|e| e.registry_mut().set_dev_mode(enabled));
         Ok(())
     }
 
@@ -333,7 +700,71 @@ impl HandlebarrzTemplate {
     /// Whether development mode is currently enabled.
     #[pyo3(text_signature = "($self)")]
     fn get_dev_mode(&self) -> bool {
-        self.registry.dev_mode()
+        self.engine().registry.dev_mode()
+    }
+
+    /// Sets the limits applied to each render.
+    ///
+    /// The time and output size are checked whenever output is written, and
+    /// the iterations at the start of every `{{#each}}` iteration. A render
+    /// exceeding a limit stops at the next check and raises
+    /// `RenderBudgetError`. Limits that are `None` are not enforced.
+    ///
+    /// Loops are only counted while a timeout or an iteration limit is set,
+    /// so templates without either render their loops as they are parsed.
+    ///
+    /// # Arguments
+    ///
+    /// * `timeout` - Maximum wall-clock time of a render, in seconds.
+    /// * `max_output_bytes` - Maximum size of the output in UTF-8 bytes.
+    /// * `max_iterations` - Maximum number of loop iterations, summed over
+    ///   all loops of a render.
+    ///
+    /// # Returns
+    ///
+    /// `None`
+    ///
+    /// # Raises
+    ///
+    /// `PyValueError` if the timeout is negative or not finite.
+    #[pyo3(
+        signature = (timeout = None, max_output_bytes = None, max_iterations = None),
+        text_signature = "($self, timeout=None, max_output_bytes=None, max_iterations=None)"
+    )]
+    fn set_render_budget(
+        &self,
+        timeout: Option<f64>,
+        max_output_bytes: Option<usize>,
+        max_iterations: Option<u64>,
+    ) -> PyResult<()> {
+        let timeout = timeout
+            .map(Duration::try_from_secs_f64)
+            .transpose()
+            .map_err(|e| PyValueError::new_err(format!("Invalid timeout: {e}")))?;
+        self.update(|e| {
+            e.set_budget(budget::Budget {
+                timeout,
+                max_output_bytes,
+                max_iterations,
+            });
+        });
+        Ok(())
+    }
+
+    /// Gets the limits applied to each render.
+    ///
+    /// # Returns
+    ///
+    /// The timeout in seconds, maximum output bytes and maximum iterations,
+    /// each `None` if not enforced.
+    #[pyo3(text_signature = "($self)")]
+    fn get_render_budget(&self) -> (Option<f64>, Option<usize>, Option<u64>) {
+        let budget = self.engine().budget;
+        (
+            budget.timeout.map(|t| t.as_secs_f64()),
+            budget.max_output_bytes,
+            budget.max_iterations,
+        )
     }
 
     /// Sets the escape function for the template engine.
@@ -343,8 +774,8 @@ impl HandlebarrzTemplate {
     ///
     /// # Arguments
     ///
-    /// * `escape_fn` - The name of the escape function to use (either
-    ///   "html_escape" or "no_escape").
+    /// * `escape_fn` - The name of the escape function to use
+    ///   ("html_escape", "no_escape" or "marker_escape").
     ///
     /// # Returns
     ///
@@ -354,16 +785,21 @@ impl HandlebarrzTemplate {
     ///
     /// `PyValueError` if the specified escape function is not recognized.
     #[pyo3(text_signature = "($self, escape_fn)")]
-    fn set_escape_fn(&mut self, escape_fn: &str) -> PyResult<()> {
-        match escape_fn {
-            "html_escape" => self.registry.register_escape_fn(handlebars::html_escape),
-            "no_escape" => self.registry.register_escape_fn(handlebars::no_escape),
+    fn set_escape_fn(&self, escape_fn: &str) -> PyResult<()> {
+        let escape: fn(&str) -> String = match escape_fn {
+            "html_escape" => handlebars::html_escape,
+            "no_escape" => handlebars::no_escape,
+            "marker_escape" => helpers::escape_markers,
             _ => {
                 return Err(PyValueError::new_err(format!(
                     "Unknown escape function: {escape_fn}"
                 )));
             }
-        }
+        };
+        self.update(|e| {
+            e.registry_mut().register_escape_fn(escape);
+            e.registrations_mut().escape_fn = escape_fn.to_string();
+        });
         Ok(())
     }
 
@@ -382,10 +818,17 @@ impl HandlebarrzTemplate {
     ///
     /// `PyValueError` if the template cannot be registered.
     #[pyo3(text_signature = "($self, name, template_string)")]
-    fn register_template(&mut self, name: &str, template_string: &str) -> PyResult<()> {
-        self.registry
-            .register_template_string(name, template_string)
-            .map_err(|e| PyValueError::new_err(e.to_string()))
+    fn register_template(&self, name: &str, template_string: &str) -> PyResult<()> {
+        let template = parse_template(name, template_string, false)
+            .map_err(|e| PyValueError::new_err(e.to_string()))?;
+        self.update(|e| {
+            e.register_parsed(name, template);
+            e.registrations_mut()
+                .add_source(name, template_string, false);
+            e.lru().remove(name);
+            e.invalidate_gil_free();
+        });
+        Ok(())
     }
 
     /// Registers a partial with the given name.
@@ -403,10 +846,247 @@ impl HandlebarrzTemplate {
     ///
     /// `PyValueError` if the partial cannot be registered.
     #[pyo3(text_signature = "($self, name, template_string)")]
-    fn register_partial(&mut self, name: &str, template_string: &str) -> PyResult<()> {
-        self.registry
-            .register_partial(name, template_string)
-            .map_err(|e| PyValueError::new_err(e.to_string()))
+    fn register_partial(&self, name: &str, template_string: &str) -> PyResult<()> {
+        let template = parse_template(name, template_string, true)
+            .map_err(|e| PyValueError::new_err(e.to_string()))?;
+        self.update(|e| {
+            e.register_parsed(name, template);
+            e.registrations_mut()
+                .add_source(name, template_string, true);
+            e.lru().remove(name);
+            e.invalidate_gil_free();
+        });
+        Ok(())
+    }
+
+    /// Registers many templates in one registry update.
+    ///
+    /// The templates are parsed in parallel with the GIL released. Nothing is
+    /// registered unless all of them parse.
+    ///
+    /// # Arguments
+    ///
+    /// * `templates` - Template sources by name.
+    ///
+    /// # Returns
+    ///
+    /// Parse errors by template name; empty if the templates were registered.
+    #[pyo3(text_signature = "($self, templates)")]
+    fn register_templates(
+        &self,
+        py: Python<'_>,
+        templates: HashMap<String, String>,
+    ) -> HashMap<String, String> {
+        self.register_sources(py, templates.into_iter().collect(), false)
+    }
+
+    /// Registers many partials in one registry update.
+    ///
+    /// The partials are parsed in parallel with the GIL released. Nothing is
+    /// registered unless all of them parse.
+    ///
+    /// # Arguments
+    ///
+    /// * `partials` - Partial sources by name.
+    ///
+    /// # Returns
+    ///
+    /// Parse errors by partial name; empty if the partials were registered.
+    #[pyo3(text_signature = "($self, partials)")]
+    fn register_partials(
+        &self,
+        py: Python<'_>,
+        partials: HashMap<String, String>,
+    ) -> HashMap<String, String> {
+        self.register_sources(py, partials.into_iter().collect(), true)
+    }
+
+    /// Limits the number and total size of evictable templates.
+    ///
+    /// Compiled templates and unpinned templates are evictable; when adding
+    /// one exceeds a limit, the least recently used ones are unregistered.
+    /// The size of a template is the length of its source. A template is
+    /// never evicted to make room for itself.
+    ///
+    /// # Arguments
+    ///
+    /// * `max_entries` - Maximum number of evictable templates, or `None`.
+    /// * `max_bytes` - Maximum total source length in bytes, or `None`.
+    ///
+    /// # Returns
+    ///
+    /// `None`
+    ///
+    /// # Raises
+    ///
+    /// `PyValueError` if `max_entries` is 0.
+    #[pyo3(
+        signature = (max_entries=None, max_bytes=None),
+        text_signature = "($self, max_entries=None, max_bytes=None)"
+    )]
+    fn set_capacity(&self, max_entries: Option<usize>, max_bytes: Option<usize>) -> PyResult<()> {
+        if max_entries == Some(0) {
+            return Err(PyValueError::new_err("max_entries must be at least 1"));
+        }
+        self.update(|e| {
+            let evicted = e.lru().set_capacity(max_entries, max_bytes);
+            e.bounded = e.lru().is_bounded();
+            e.evict(evicted);
+        });
+        Ok(())
+    }
+
+    /// Returns the capacity set with `set_capacity`.
+    ///
+    /// # Returns
+    ///
+    /// The maximum number of evictable templates and their maximum total
+    /// size, each `None` if unlimited.
+    #[pyo3(text_signature = "($self)")]
+    fn get_capacity(&self) -> (Option<usize>, Option<usize>) {
+        self.engine().lru().capacity()
+    }
+
+    /// Protects a template from eviction.
+    ///
+    /// # Arguments
+    ///
+    /// * `name` - The name of the template.
+    ///
+    /// # Returns
+    ///
+    /// `None`
+    ///
+    /// # Raises
+    ///
+    /// `PyValueError` if the template is not registered.
+    #[pyo3(text_signature = "($self, name)")]
+    fn pin(&self, name: &str) -> PyResult<()> {
+        self.update(|e| {
+            if !e.registry.has_template(name) {
+                return Err(PyValueError::new_err(format!("Template not found: {name}")));
+            }
+            e.lru().remove(name);
+            Ok(())
+        })
+    }
+
+    /// Makes a template evictable, as the most recently used one.
+    ///
+    /// Registering the template again pins it again.
+    ///
+    /// # Arguments
+    ///
+    /// * `name` - The name of the template.
+    ///
+    /// # Returns
+    ///
+    /// `None`
+    ///
+    /// # Raises
+    ///
+    /// `PyValueError` if no template was registered from a string under the
+    /// name.
+    #[pyo3(text_signature = "($self, name)")]
+    fn unpin(&self, name: &str) -> PyResult<()> {
+        self.update(|e| {
+            let Some(size) = e.registrations.sources.get(name).map(String::len) else {
+                return Err(PyValueError::new_err(format!(
+                    "Only templates registered from strings can be unpinned: {name}"
+                )));
+            };
+            let evicted = e.lru().insert(name, size);
+            e.evict(evicted);
+            Ok(())
+        })
+    }
+
+    /// Returns usage counters of the evictable templates.
+    ///
+    /// # Returns
+    ///
+    /// A dictionary with the number (`entries`) and total source length
+    /// (`bytes`) of evictable templates, the compilations served from
+    /// (`hits`) and added to (`misses`) the registry, their `hit_rate`, the
+    /// number of `evictions`, and the capacity (`max_entries`, `max_bytes`).
+    #[pyo3(text_signature = "($self)")]
+    fn cache_stats<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        let engine = self.engine();
+        let lru = engine.lru();
+        let stats = lru.stats();
+        let (max_entries, max_bytes) = lru.capacity();
+        let lookups = stats.hits + stats.misses;
+        let hit_rate = if lookups == 0 {
+            0.0
+        } else {
+            stats.hits as f64 / lookups as f64
+        };
+
+        let dict = PyDict::new(py);
+        dict.set_item("entries", stats.entries)?;
+        dict.set_item("bytes", stats.bytes)?;
+        dict.set_item("hits", stats.hits)?;
+        dict.set_item("misses", stats.misses)?;
+        dict.set_item("hit_rate", hit_rate)?;
+        dict.set_item("evictions", stats.evictions)?;
+        dict.set_item("max_entries", max_entries)?;
+        dict.set_item("max_bytes", max_bytes)?;
+        Ok(dict)
+    }
+
+    /// Compiles a template string and registers it under a generated name.
+    ///
+    /// Compiled templates are cached by their source, so compiling the same
+    /// template string again returns the existing name without parsing it a
+    /// second time. The returned name can be passed to `render`, which then
+    /// renders the already parsed template. Unregistering the name forgets
+    /// the source, and compiling it again registers it under a new name.
+    ///
+    /// # Arguments
+    ///
+    /// * `template_string` - The template source code.
+    ///
+    /// # Returns
+    ///
+    /// Name under which the compiled template is registered.
+    ///
+    /// # Raises
+    ///
+    /// `PyValueError` if the template cannot be parsed.
+    #[pyo3(text_signature = "($self, template_string)")]
+    fn compile(&self, template_string: &str) -> PyResult<String> {
+        let engine = self.engine();
+        if let Some(name) = engine.compiled_name(template_string) {
+            let mut lru = engine.lru();
+            lru.record_hit();
+            lru.touch(&name);
+            return Ok(name);
+        }
+
+        // The name is only assigned under the write lock, so the template is
+        // parsed under the bare prefix and renamed.
+        let mut template = parse_template(COMPILED_TEMPLATE_PREFIX, template_string, false)
+            .map_err(|e| PyValueError::new_err(format!("Failed to parse template {e}")))?;
+        let name = self.update(|e| {
+            // Another thread may have compiled the same source meanwhile.
+            if let Some(name) = e.compiled_name(template_string) {
+                e.lru().record_hit();
+                return name;
+            }
+            e.lru().record_miss();
+            let name = format!("{COMPILED_TEMPLATE_PREFIX}{}", e.next_compiled_id);
+            e.next_compiled_id += 1;
+            template.name = Some(name.clone());
+            e.register_parsed(&name, template);
+            e.registrations_mut()
+                .add_source(&name, template_string, false);
+            Arc::make_mut(&mut e.compiled).insert(template_string.to_string(), name.clone());
+            let evicted = e.lru().insert(&name, template_string.len());
+            e.evict(evicted);
+            e.invalidate_gil_free();
+            name
+        });
+        Ok(name)
     }
 
     /// Registers a template file with the given name.
@@ -425,7 +1105,7 @@ impl HandlebarrzTemplate {
     /// `PyFileNotFoundError` if the template file does not exist.
     /// `PyValueError` if the template cannot be registered.
     #[pyo3(text_signature = "($self, name, file_path)")]
-    fn register_template_file(&mut self, name: &str, file_path: &str) -> PyResult<()> {
+    fn register_template_file(&self, name: &str, file_path: &str) -> PyResult<()> {
         let path = Path::new(file_path);
         if !path.exists() {
             return Err(PyFileNotFoundError::new_err(format!(
@@ -433,9 +1113,18 @@ impl HandlebarrzTemplate {
             )));
         }
 
-        self.registry
-            .register_template_file(name, file_path)
-            .map_err(|e| PyValueError::new_err(e.to_string()))
+        // Files are registered under the write lock, because handlebars-rust
+        // keeps the file as the source of the template for development mode.
+        self.update(|e| {
+            e.registry_mut()
+                .register_template_file(name, file_path)
+                .map_err(|err| PyValueError::new_err(err.to_string()))?;
+            e.bind_data_variables(name);
+            e.registrations_mut().add_file(name, file_path);
+            e.lru().remove(name);
+            e.invalidate_gil_free();
+            Ok(())
+        })
     }
 
     /// Registers a helper function with the given name.
@@ -449,14 +1138,13 @@ impl HandlebarrzTemplate {
     ///
     /// `None`
     #[pyo3(text_signature = "($self, name, helper_fn)")]
-    fn register_helper(&mut self, name: &str, helper_fn: PyObject) -> PyResult<()> {
-        Python::with_gil(|py| {
-            self.py_helpers
-                .insert(name.to_string(), helper_fn.clone_ref(py));
+    fn register_helper(&self, name: &str, helper_fn: PyObject) -> PyResult<()> {
+        let helper = PyHelperDef { func: helper_fn };
 
-            let helper = PyHelperDef { func: helper_fn };
-
-            self.registry.register_helper(name, Box::new(helper));
+        self.update(|e| {
+            Arc::make_mut(&mut e.py_helpers).insert(name.to_string());
+            e.registry_mut().register_helper(name, Box::new(helper));
+            e.invalidate_gil_free();
         });
 
         Ok(())
@@ -472,8 +1160,12 @@ impl HandlebarrzTemplate {
     ///
     /// `None`
     #[pyo3(text_signature = "($self, name)")]
-    fn unregister_template(&mut self, name: &str) -> PyResult<()> {
-        self.registry.unregister_template(name);
+    fn unregister_template(&self, name: &str) -> PyResult<()> {
+        self.update(|e| {
+            e.unregister(name);
+            e.lru().remove(name);
+            e.invalidate_gil_free();
+        });
         Ok(())
     }
 
@@ -488,7 +1180,7 @@ impl HandlebarrzTemplate {
     /// Whether the template exists.
     #[pyo3(text_signature = "($self, name)")]
     fn has_template(&self, name: &str) -> bool {
-        self.registry.has_template(name)
+        self.engine().registry.has_template(name)
     }
 
     /// Renders a template with the given data.
@@ -496,7 +1188,10 @@ impl HandlebarrzTemplate {
     /// # Arguments
     ///
     /// * `name` - The name of the template.
-    /// * `data` - The data to use for rendering (as JSON).
+    /// * `data` - The data to use for rendering (JSON-compatible Python
+    ///   objects).
+    /// * `runtime_data` - Optional data exposed as `@` variables, e.g.
+    ///   `{{@state.name}}`.
     ///
     /// # Returns
     ///
@@ -504,15 +1199,247 @@ impl HandlebarrzTemplate {
     ///
     /// # Raises
     ///
+    /// `PyTypeError` if the data is not JSON serializable.
     /// `PyValueError` if the template cannot be rendered.
-    #[pyo3(text_signature = "($self, name, data)")]
-    fn render(&self, name: &str, data: &str) -> PyResult<String> {
-        let data: Value = serde_json::from_str(data)
-            .map_err(|e| PyValueError::new_err(format!("invalid JSON: {e}")))?;
+    #[pyo3(
+        signature = (name, data, runtime_data = None),
+        text_signature = "($self, name, data, runtime_data=None)"
+    )]
+    fn render(
+        &self,
+        py: Python<'_>,
+        name: &str,
+        data: &Bound<'_, PyAny>,
+        runtime_data: Option<&Bound<'_, PyAny>>,
+    ) -> PyResult<String> {
+        let ctx = Context::from(convert::py_to_value(data)?);
+        let runtime_data = runtime_value(runtime_data)?;
+        let engine = self.engine();
+        engine.touch(name);
+        let registry = &*engine.registry;
+        let render = || {
+            data::with_runtime_data(&runtime_data, || {
+                budget::render(registry, name, &ctx, &engine.budget)
+            })
+        };
 
-        self.registry
-            .render(name, &data)
-            .map_err(|e| PyValueError::new_err(e.to_string()))
+        let result = if engine.is_gil_free(name) {
+            py.allow_threads(render)
+        } else {
+            render()
+        };
+        result.map_err(render_error)
+    }
+
+    /// Renders a template and passes the output to `write` in chunks.
+    ///
+    /// The output is never held as a single string: it is produced in chunks
+    /// of at most `chunk_size` bytes (split on character boundaries), each
+    /// passed to `write` as soon as it is complete. Templates that do not call
+    /// Python helpers are rendered with the GIL released, and it is only
+    /// reacquired to call `write`. If rendering fails, the chunks written
+    /// before the failure have already been passed to `write`.
+    ///
+    /// # Arguments
+    ///
+    /// * `name` - The name of the template.
+    /// * `data` - The data to use for rendering (JSON-compatible Python
+    ///   objects).
+    /// * `write` - Callable receiving each chunk, e.g. `file.write`.
+    /// * `binary` - Whether to pass chunks as UTF-8 `bytes` instead of `str`.
+    /// * `chunk_size` - Maximum chunk size in bytes.
+    /// * `runtime_data` - Optional data exposed as `@` variables.
+    ///
+    /// # Returns
+    ///
+    /// `None`
+    ///
+    /// # Raises
+    ///
+    /// `PyTypeError` if the data is not JSON serializable.
+    /// `PyValueError` if the template cannot be rendered.
+    /// Any exception raised by `write`.
+    #[pyo3(
+        signature = (name, data, write, binary = false, chunk_size = 65536, runtime_data = None),
+        text_signature = "($self, name, data, write, binary=False, chunk_size=65536, runtime_data=None)"
+    )]
+    #[allow(clippy::too_many_arguments)]
+    fn render_into(
+        &self,
+        py: Python<'_>,
+        name: &str,
+        data: &Bound<'_, PyAny>,
+        write: PyObject,
+        binary: bool,
+        chunk_size: usize,
+        runtime_data: Option<&Bound<'_, PyAny>>,
+    ) -> PyResult<()> {
+        let ctx = Context::from(convert::py_to_value(data)?);
+        let runtime_data = runtime_value(runtime_data)?;
+        let engine = self.engine();
+        engine.touch(name);
+        let registry = &*engine.registry;
+        // The exception raised by `write`, re-raised once rendering stops.
+        let mut write_error = None;
+        // The sink records the exception, so the closure is `FnMut`.
+        let mut render = || -> Result<(), budget::RenderFailure> {
+            let template = registry.get_template(name).ok_or_else(|| {
+                RenderError::from(RenderErrorReason::TemplateNotFound(name.to_string()))
+            })?;
+            let mut out = output::ChunkedOutput::new(chunk_size, |chunk: &str| {
+                Python::with_gil(|py| {
+                    let chunk = if binary {
+                        PyBytes::new(py, chunk.as_bytes()).into_any()
+                    } else {
+                        PyString::new(py, chunk).into_any()
+                    };
+                    write.call1(py, (chunk,)).map(drop)
+                })
+                .map_err(|e| {
+                    write_error = Some(e);
+                    std::io::Error::other("write failed")
+                })
+            });
+            data::with_runtime_data(&runtime_data, || {
+                budget::render_template(registry, template, &ctx, &engine.budget, &mut out)
+            })?;
+            Ok(out.flush().map_err(RenderError::from)?)
+        };
+
+        let result = if engine.is_gil_free(name) {
+            py.allow_threads(render)
+        } else {
+            render()
+        };
+        if let Some(e) = write_error {
+            return Err(e);
+        }
+        result.map_err(render_error)
+    }
+
+    /// Renders a template with each of the given contexts.
+    ///
+    /// All contexts are converted before rendering starts, and the renders
+    /// happen in a single call. Templates that do not call Python helpers are
+    /// rendered with the GIL released and, if `parallel` is set, spread over
+    /// all available cores.
+    ///
+    /// # Arguments
+    ///
+    /// * `name` - The name of the template.
+    /// * `contexts` - An iterable of data to render the template with
+    ///   (JSON-compatible Python objects).
+    /// * `parallel` - Whether to render on multiple threads. Ignored for
+    ///   templates that call Python helpers.
+    /// * `runtime_data` - Optional data exposed as `@` variables to every
+    ///   render.
+    ///
+    /// # Returns
+    ///
+    /// Rendered strings, one for each context and in the same order.
+    ///
+    /// # Raises
+    ///
+    /// `PyTypeError` if a context is not JSON serializable.
+    /// `PyValueError` if the template cannot be rendered with a context.
+    #[pyo3(
+        signature = (name, contexts, parallel = false, runtime_data = None),
+        text_signature = "($self, name, contexts, parallel=False, runtime_data=None)"
+    )]
+    fn render_many(
+        &self,
+        py: Python<'_>,
+        name: &str,
+        contexts: &Bound<'_, PyAny>,
+        parallel: bool,
+        runtime_data: Option<&Bound<'_, PyAny>>,
+    ) -> PyResult<Vec<String>> {
+        let contexts = PyIterator::from_object(contexts)?
+            .map(|data| Ok(Context::from(convert::py_to_value(&data?)?)))
+            .collect::<PyResult<Vec<_>>>()?;
+        let runtime_data = runtime_value(runtime_data)?;
+        let engine = self.engine();
+        engine.touch(name);
+        let registry = &*engine.registry;
+        let render = |parallel| {
+            batch::render_contexts(
+                registry,
+                name,
+                &contexts,
+                &runtime_data,
+                &engine.budget,
+                parallel,
+            )
+        };
+
+        let result = if engine.is_gil_free(name) {
+            py.allow_threads(|| render(parallel))
+        } else {
+            render(false)
+        };
+        result.map_err(render_error)
+    }
+
+    /// Renders each of the given templates with the same data.
+    ///
+    /// The data is converted once and shared by all renders. Templates that
+    /// do not call Python helpers are rendered with the GIL released and, if
+    /// `parallel` is set, spread over all available cores.
+    ///
+    /// # Arguments
+    ///
+    /// * `names` - The names of the templates.
+    /// * `data` - The data to use for rendering (JSON-compatible Python
+    ///   objects).
+    /// * `parallel` - Whether to render on multiple threads. Ignored if any of
+    ///   the templates calls Python helpers.
+    /// * `runtime_data` - Optional data exposed as `@` variables to every
+    ///   template.
+    ///
+    /// # Returns
+    ///
+    /// Rendered strings, one for each name and in the same order.
+    ///
+    /// # Raises
+    ///
+    /// `PyTypeError` if the data is not JSON serializable.
+    /// `PyValueError` if any of the templates cannot be rendered.
+    #[pyo3(
+        signature = (names, data, parallel = false, runtime_data = None),
+        text_signature = "($self, names, data, parallel=False, runtime_data=None)"
+    )]
+    fn render_variants(
+        &self,
+        py: Python<'_>,
+        names: Vec<String>,
+        data: &Bound<'_, PyAny>,
+        parallel: bool,
+        runtime_data: Option<&Bound<'_, PyAny>>,
+    ) -> PyResult<Vec<String>> {
+        let ctx = Context::from(convert::py_to_value(data)?);
+        let runtime_data = runtime_value(runtime_data)?;
+        let engine = self.engine();
+        for name in &names {
+            engine.touch(name);
+        }
+        let registry = &*engine.registry;
+        let render = |parallel| {
+            batch::render_templates(
+                registry,
+                &names,
+                &ctx,
+                &runtime_data,
+                &engine.budget,
+                parallel,
+            )
+        };
+
+        let result = if names.iter().all(|name| engine.is_gil_free(name)) {
+            py.allow_threads(|| render(parallel))
+        } else {
+            render(false)
+        };
+        result.map_err(render_error)
     }
 
     /// Renders a template string directly without registering.
@@ -520,22 +1447,78 @@ impl HandlebarrzTemplate {
     /// # Arguments
     ///
     /// * `template_string` - The template source code.
-    /// * `data_json` - The data to use for rendering (as JSON).
+    /// * `data` - The data to use for rendering (JSON-compatible Python
+    ///   objects).
+    /// * `runtime_data` - Optional data exposed as `@` variables.
     ///
     /// # Raises
     ///
+    /// `PyTypeError` if the data is not JSON serializable.
     /// `PyValueError` if the template cannot be rendered.
     ///
     /// # Returns
     ///
     /// Rendered template as a string.
-    #[pyo3(text_signature = "($self, template_string, data_json)")]
-    fn render_template(&self, template_string: &str, data_json: &str) -> PyResult<String> {
-        let data: Value = serde_json::from_str(data_json)
-            .map_err(|e| PyValueError::new_err(format!("invalid JSON: {e}")))?;
-        self.registry
-            .render_template(template_string, &data)
-            .map_err(|e| PyValueError::new_err(e.to_string()))
+    #[pyo3(
+        signature = (template_string, data, runtime_data = None),
+        text_signature = "($self, template_string, data, runtime_data=None)"
+    )]
+    fn render_template(
+        &self,
+        py: Python<'_>,
+        template_string: &str,
+        data: &Bound<'_, PyAny>,
+        runtime_data: Option<&Bound<'_, PyAny>>,
+    ) -> PyResult<String> {
+        let mut template =
+            Template::compile(template_string).map_err(|e| PyValueError::new_err(e.to_string()))?;
+        data::bind_data_variables(&mut template);
+        let ctx = Context::from(convert::py_to_value(data)?);
+        let runtime_data = runtime_value(runtime_data)?;
+        let engine = self.engine();
+        if engine.budget.counts_loops() {
+            budget::bind_loop_counters(&mut template);
+        }
+        let registry = &*engine.registry;
+        let render = || -> Result<String, budget::RenderFailure> {
+            data::with_runtime_data(&runtime_data, || {
+                let mut out = StringOutput::new();
+                budget::render_template(registry, &template, &ctx, &engine.budget, &mut out)?;
+                Ok(out.into_string().map_err(RenderError::from)?)
+            })
+        };
+
+        let result = if engine.references_py_helpers(&template) {
+            render()
+        } else {
+            py.allow_threads(render)
+        };
+        result.map_err(render_error)
+    }
+
+    /// Parses a template string and summarizes what it uses.
+    ///
+    /// Like `analyze_template`, but expressions without arguments that name a
+    /// helper registered with this engine are reported as helpers.
+    ///
+    /// # Arguments
+    ///
+    /// * `template_string` - The template source code.
+    ///
+    /// # Returns
+    ///
+    /// A dict describing the template; see `analyze_template`.
+    ///
+    /// # Raises
+    ///
+    /// `PyValueError` if the template cannot be parsed.
+    #[pyo3(text_signature = "($self, template_string)")]
+    fn analyze<'py>(&self, py: Python<'py>, template_string: &str) -> PyResult<Bound<'py, PyDict>> {
+        let template =
+            Template::compile(template_string).map_err(|e| PyValueError::new_err(e.to_string()))?;
+        let registry = self.engine().registry;
+        let summary = analysis::summarize(&template, |name| registry.has_helper(name));
+        summary_to_py(py, summary)
     }
 
     /// Registers the extra helper functions.
@@ -550,13 +1533,403 @@ impl HandlebarrzTemplate {
     ///
     /// `None`
     #[pyo3(text_signature = "($self)")]
-    fn register_extra_helpers(&mut self) -> PyResult<()> {
-        self.registry
-            .register_helper("ifEquals", Box::new(helpers::IfEqualsHelper {}));
-        self.registry
-            .register_helper("unlessEquals", Box::new(helpers::UnlessEqualsHelper {}));
-        self.registry
-            .register_helper("json", Box::new(helpers::JsonHelper {}));
+    fn register_extra_helpers(&self) -> PyResult<()> {
+        self.update(|e| {
+            for name in ["ifEquals", "unlessEquals", "json"] {
+                Arc::make_mut(&mut e.py_helpers).remove(name);
+            }
+            let registry = e.registry_mut();
+            registry.register_helper("ifEquals", Box::new(helpers::IfEqualsHelper {}));
+            registry.register_helper("unlessEquals", Box::new(helpers::UnlessEqualsHelper {}));
+            registry.register_helper("json", Box::new(helpers::JsonHelper {}));
+            e.registrations_mut().extra_helpers = true;
+            e.invalidate_gil_free();
+        });
         Ok(())
     }
+
+    /// Registers the Dotprompt builtin helpers.
+    ///
+    /// These native helpers replace the Python implementations in
+    /// `dotpromptz.helpers`, so templates using only them render without
+    /// calling back into Python:
+    ///
+    /// - `history`
+    /// - `ifEquals`
+    /// - `json`
+    /// - `media`
+    /// - `role`
+    /// - `section`
+    /// - `unlessEquals`
+    ///
+    /// # Returns
+    ///
+    /// `None`
+    #[pyo3(text_signature = "($self)")]
+    fn register_dotprompt_helpers(&self) -> PyResult<()> {
+        self.update(|e| {
+            for name in helpers::DOTPROMPT_HELPERS {
+                Arc::make_mut(&mut e.py_helpers).remove(name);
+            }
+            helpers::register_dotprompt_helpers(e.registry_mut());
+            e.registrations_mut().dotprompt_helpers = true;
+            e.invalidate_gil_free();
+        });
+        Ok(())
+    }
+}
+
+impl HandlebarrzTemplate {
+    /// Creates an instance starting out with the given engine version.
+    fn from_engine(engine: Engine) -> Self {
+        Self {
+            engine: RwLock::new(engine),
+        }
+    }
+
+    /// Returns the current version of the engine.
+    fn engine(&self) -> Engine {
+        self.engine
+            .read()
+            .unwrap_or_else(PoisonError::into_inner)
+            .clone()
+    }
+
+    /// Parses templates in parallel and registers them in one update.
+    ///
+    /// # Arguments
+    ///
+    /// * `py` - Python token, used to release the GIL while parsing.
+    /// * `sources` - Names and sources of the templates.
+    /// * `partial` - Whether to register the templates as partials.
+    ///
+    /// # Returns
+    ///
+    /// Parse errors by template name; empty if the templates were registered.
+    fn register_sources(
+        &self,
+        py: Python<'_>,
+        sources: Vec<(String, String)>,
+        partial: bool,
+    ) -> HashMap<String, String> {
+        let parsed = py.allow_threads(|| parse_templates(&sources, partial));
+        let mut templates = Vec::with_capacity(parsed.len());
+        let mut errors = HashMap::new();
+        for ((name, _), result) in sources.iter().zip(parsed) {
+            match result {
+                Ok(template) => templates.push(template),
+                Err(e) => {
+                    errors.insert(name.clone(), e.to_string());
+                }
+            }
+        }
+        if !errors.is_empty() || sources.is_empty() {
+            return errors;
+        }
+
+        self.update(|e| {
+            for ((name, source), template) in sources.iter().zip(templates) {
+                e.register_parsed(name, template);
+                e.registrations_mut().add_source(name, source, partial);
+                e.lru().remove(name);
+            }
+            e.invalidate_gil_free();
+        });
+        errors
+    }
+
+    /// Changes the engine under the write lock.
+    ///
+    /// Renders in progress keep the version they started with; parts of the
+    /// engine they share are copied before they are changed.
+    fn update<R>(&self, change: impl FnOnce(&mut Engine) -> R) -> R {
+        change(&mut self.engine.write().unwrap_or_else(PoisonError::into_inner))
+    }
+}
+
+impl Engine {
+    /// Returns the registry for changes, copying it first if it is shared
+    /// with a forked instance.
+    fn registry_mut(&mut self) -> &mut Handlebars<'static> {
+        Arc::make_mut(&mut self.registry)
+    }
+
+    /// Returns the registrations for changes, copying them first if they are
+    /// shared with a forked instance.
+    fn registrations_mut(&mut self) -> &mut snapshot::Registrations {
+        Arc::make_mut(&mut self.registrations)
+    }
+
+    /// Returns the recency tracker of the evictable templates.
+    fn lru(&self) -> MutexGuard<'_, lru::Lru> {
+        self.lru.lock().unwrap_or_else(PoisonError::into_inner)
+    }
+
+    /// Marks a template as used by a render, if a capacity is set.
+    fn touch(&self, name: &str) {
+        if self.bounded {
+            self.lru().touch(name);
+        }
+    }
+
+    /// Unregisters templates chosen for eviction.
+    ///
+    /// # Arguments
+    ///
+    /// * `names` - Names of the evicted templates.
+    fn evict(&mut self, names: Vec<String>) {
+        if names.is_empty() {
+            return;
+        }
+        for name in names {
+            self.unregister(&name);
+        }
+        self.invalidate_gil_free();
+    }
+
+    /// Unregisters a template and forgets its source, including the cache
+    /// entry of a compiled template.
+    ///
+    /// # Arguments
+    ///
+    /// * `name` - The name of the template.
+    fn unregister(&mut self, name: &str) {
+        if let Some(source) = self.registrations.sources.get(name) {
+            if self
+                .compiled
+                .get(source)
+                .is_some_and(|compiled| compiled == name)
+            {
+                Arc::make_mut(&mut self.compiled).remove(source);
+            }
+        }
+        self.registry_mut().unregister_template(name);
+        self.registrations_mut().remove(name);
+    }
+
+    /// Returns the name of the compiled template for a source, if it is
+    /// still registered.
+    fn compiled_name(&self, template_string: &str) -> Option<String> {
+        self.compiled
+            .get(template_string)
+            .filter(|name| self.registry.has_template(name))
+            .cloned()
+    }
+
+    /// Binds the `@` data variables of a newly registered template file, and
+    /// its loop counters if the budget counts loops.
+    ///
+    /// Templates reloaded from their sources in development mode are not
+    /// bound again.
+    fn bind_data_variables(&mut self, name: &str) {
+        let Some(template) = self.registry.get_template(name) else {
+            return;
+        };
+        let mut template = template.clone();
+        let counts_loops = self.budget.counts_loops();
+        if data::bind_data_variables(&mut template)
+            | (counts_loops && budget::bind_loop_counters(&mut template))
+        {
+            self.registry_mut().register_template(name, template);
+        }
+    }
+
+    /// Registers a parsed template, binding its loop counters if the budget
+    /// counts loops.
+    ///
+    /// # Arguments
+    ///
+    /// * `name` - The name of the template.
+    /// * `template` - The parsed template, with its data variables bound.
+    fn register_parsed(&mut self, name: &str, mut template: Template) {
+        if self.budget.counts_loops() {
+            budget::bind_loop_counters(&mut template);
+        }
+        self.registry_mut().register_template(name, template);
+    }
+
+    /// Changes the limits of each render.
+    ///
+    /// Loop counters are only bound while the budget counts loops, so they
+    /// are bound to, or removed from, every registered template when that
+    /// changes.
+    ///
+    /// # Arguments
+    ///
+    /// * `budget` - The new limits.
+    fn set_budget(&mut self, budget: budget::Budget) {
+        let counts_loops = budget.counts_loops();
+        if counts_loops != self.budget.counts_loops() {
+            let changed: Vec<(String, Template)> = self
+                .registry
+                .get_templates()
+                .iter()
+                .filter_map(|(name, template)| {
+                    let mut template = template.clone();
+                    let changed = if counts_loops {
+                        budget::bind_loop_counters(&mut template)
+                    } else {
+                        budget::unbind_loop_counters(&mut template)
+                    };
+                    changed.then(|| (name.clone(), template))
+                })
+                .collect();
+            for (name, template) in changed {
+                self.registry_mut().register_template(&name, template);
+            }
+        }
+        self.budget = budget;
+    }
+
+    /// Checks whether a registered template can be rendered without the GIL.
+    ///
+    /// Templates that do not exist are reported as GIL-free, so the error
+    /// raised for them is produced with the GIL released too.
+    fn is_gil_free(&self, name: &str) -> bool {
+        if self.py_helpers.is_empty() {
+            return true;
+        }
+        // Development mode reloads templates from their sources on every
+        // render, so the analysis cannot be cached.
+        if self.registry.dev_mode() {
+            return self
+                .registry
+                .get_template(name)
+                .is_none_or(|t| !self.references_py_helpers(t));
+        }
+
+        let mut gil_free = self.gil_free.lock().unwrap_or_else(PoisonError::into_inner);
+        if let Some(&cached) = gil_free.get(name) {
+            return cached;
+        }
+        let result = self
+            .registry
+            .get_template(name)
+            .is_none_or(|t| !self.references_py_helpers(t));
+        gil_free.insert(name.to_string(), result);
+        result
+    }
+
+    /// Checks whether a template or any partial it uses calls a Python helper.
+    fn references_py_helpers(&self, template: &Template) -> bool {
+        !self.py_helpers.is_empty()
+            && analysis::references_helpers(&self.registry, template, |name| {
+                self.py_helpers.contains(name)
+            })
+    }
+
+    /// Discards cached GIL analysis after templates or helpers change.
+    ///
+    /// The cache is replaced rather than cleared, so renders still using the
+    /// previous version cannot fill the new cache with stale results.
+    fn invalidate_gil_free(&mut self) {
+        self.gil_free = Arc::default();
+    }
+}
+
+/// Parses a template the way the registry registers it, without locking the
+/// engine.
+///
+/// # Arguments
+///
+/// * `name` - The name of the template.
+/// * `source` - The template source.
+/// * `partial` - Whether to parse the template as a partial.
+///
+/// # Returns
+///
+/// The parsed template, with its `@` data variables bound.
+///
+/// # Errors
+///
+/// The parse error.
+fn parse_template(name: &str, source: &str, partial: bool) -> Result<Template, TemplateError> {
+    parse_with(&mut Handlebars::new(), name, source, partial)
+}
+
+/// Parses many templates, spreading them over the available cores.
+///
+/// The templates are split into one contiguous chunk per thread, and each
+/// thread parses its chunk with a single scratch registry.
+///
+/// # Arguments
+///
+/// * `sources` - Names and sources of the templates.
+/// * `partial` - Whether to parse the templates as partials.
+///
+/// # Returns
+///
+/// The result of parsing each template, in the order of `sources`.
+fn parse_templates(
+    sources: &[(String, String)],
+    partial: bool,
+) -> Vec<Result<Template, TemplateError>> {
+    let parse_chunk = |chunk: &[(String, String)]| {
+        let mut scratch = Handlebars::new();
+        chunk
+            .iter()
+            .map(|(name, source)| parse_with(&mut scratch, name, source, partial))
+            .collect::<Vec<_>>()
+    };
+    let threads = thread::available_parallelism()
+        .map_or(1, |n| n.get())
+        .min(sources.len() / MIN_PARSE_CHUNK);
+    if threads <= 1 {
+        return parse_chunk(sources);
+    }
+
+    let chunk_size = sources.len().div_ceil(threads);
+    thread::scope(|scope| {
+        let handles: Vec<_> = sources
+            .chunks(chunk_size)
+            .map(|chunk| scope.spawn(move || parse_chunk(chunk)))
+            .collect();
+        handles
+            .into_iter()
+            .flat_map(|handle| {
+                handle
+                    .join()
+                    .unwrap_or_else(|e| std::panic::resume_unwind(e))
+            })
+            .collect()
+    })
+}
+
+/// Parses a template with a scratch registry, leaving the registry empty.
+fn parse_with(
+    scratch: &mut Handlebars<'static>,
+    name: &str,
+    source: &str,
+    partial: bool,
+) -> Result<Template, TemplateError> {
+    if partial {
+        scratch.register_partial(name, source)?;
+    } else {
+        scratch.register_template_string(name, source)?;
+    }
+    let mut template = scratch
+        .get_template(name)
+        .cloned()
+        .expect("template was just registered");
+    scratch.unregister_template(name);
+    data::bind_data_variables(&mut template);
+    Ok(template)
+}
+
+/// Converts a failed render to the exception raised for it.
+fn render_error(failure: budget::RenderFailure) -> PyErr {
+    let Some(limit) = failure.exceeded else {
+        return PyValueError::new_err(failure.message);
+    };
+    Python::with_gil(|py| {
+        let err = RenderBudgetError::new_err(failure.message);
+        // Exception instances accept new attributes.
+        let _ = err.value(py).setattr("limit", limit.as_str());
+        err
+    })
+}
+
+/// Converts optional runtime data to a value, treating `None` as no data.
+fn runtime_value(runtime_data: Option<&Bound<'_, PyAny>>) -> PyResult<Value> {
+    runtime_data.map_or(Ok(Value::Null), convert::py_to_value)
 }
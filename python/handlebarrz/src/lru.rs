@@ -0,0 +1,256 @@
+// Copyright 2025 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+//
+// SPDX-License-Identifier: Apache-2.0
+
+//! Least recently used eviction of registered templates.
+//!
+//! Only evictable templates are tracked: compiled templates and templates
+//! that were explicitly unpinned. Everything else is pinned and never
+//! evicted. The size of a template is measured by the length of its source.
+//!
+//! The tracker only decides which templates to evict; removing them from the
+//! registry is up to the caller.
+
+use std::collections::{BTreeMap, HashMap};
+
+/// Size and recency of a tracked template.
+#[derive(Clone, Copy, Debug)]
+struct Entry {
+    /// Value of the use counter when the template was last used.
+    tick: u64,
+    /// Length of the template source in bytes.
+    bytes: usize,
+}
+
+/// Counters describing how the tracked templates are used.
+#[derive(Clone, Copy, Debug, Default, PartialEq)]
+pub(crate) struct Stats {
+    /// Number of evictable templates.
+    pub(crate) entries: usize,
+    /// Total source length of the evictable templates.
+    pub(crate) bytes: usize,
+    /// Compilations answered by an already compiled template.
+    pub(crate) hits: u64,
+    /// Compilations that had to parse the template.
+    pub(crate) misses: u64,
+    /// Templates evicted so far.
+    pub(crate) evictions: u64,
+}
+
+/// Tracks evictable templates in order of use.
+#[derive(Clone, Debug, Default)]
+pub(crate) struct Lru {
+    max_entries: Option<usize>,
+    max_bytes: Option<usize>,
+    entries: HashMap<String, Entry>,
+    /// Tracked template names by the tick of their last use.
+    order: BTreeMap<u64, String>,
+    tick: u64,
+    stats: Stats,
+}
+
+impl Lru {
+    /// Returns whether a capacity is set.
+    pub(crate) fn is_bounded(&self) -> bool {
+        self.max_entries.is_some() || self.max_bytes.is_some()
+    }
+
+    /// Returns the maximum number of evictable templates and their maximum
+    /// total size.
+    pub(crate) fn capacity(&self) -> (Option<usize>, Option<usize>) {
+        (self.max_entries, self.max_bytes)
+    }
+
+    /// Returns the usage counters.
+    pub(crate) fn stats(&self) -> Stats {
+        self.stats
+    }
+
+    /// Changes the capacity.
+    ///
+    /// # Arguments
+    ///
+    /// * `max_entries` - Maximum number of evictable templates, if any.
+    /// * `max_bytes` - Maximum total source length of evictable templates,
+    ///   if any.
+    ///
+    /// # Returns
+    ///
+    /// Names of the templates to evict to fit the new capacity.
+    pub(crate) fn set_capacity(
+        &mut self,
+        max_entries: Option<usize>,
+        max_bytes: Option<usize>,
+    ) -> Vec<String> {
+        self.max_entries = max_entries;
+        self.max_bytes = max_bytes;
+        self.evict(None)
+    }
+
+    /// Tracks a newly registered evictable template as the most recently
+    /// used one.
+    ///
+    /// The template itself is never evicted to make room for it, even if it
+    /// is larger than the byte budget on its own.
+    ///
+    /// # Arguments
+    ///
+    /// * `name` - Name of the template.
+    /// * `bytes` - Length of the template source.
+    ///
+    /// # Returns
+    ///
+    /// Names of the templates to evict to make room for it.
+    pub(crate) fn insert(&mut self, name: &str, bytes: usize) -> Vec<String> {
+        self.remove(name);
+        self.tick += 1;
+        self.entries.insert(
+            name.to_string(),
+            Entry {
+                tick: self.tick,
+                bytes,
+            },
+        );
+        self.order.insert(self.tick, name.to_string());
+        self.stats.entries += 1;
+        self.stats.bytes += bytes;
+        self.evict(Some(name))
+    }
+
+    /// Marks a template as the most recently used one, if it is tracked.
+    ///
+    /// # Arguments
+    ///
+    /// * `name` - Name of the template.
+    pub(crate) fn touch(&mut self, name: &str) {
+        let Some(entry) = self.entries.get_mut(name) else {
+            return;
+        };
+        self.tick += 1;
+        let name = self
+            .order
+            .remove(&entry.tick)
+            .expect("tracked templates are ordered");
+        entry.tick = self.tick;
+        self.order.insert(self.tick, name);
+    }
+
+    /// Stops tracking a template, because it was pinned, registered again
+    /// or unregistered.
+    ///
+    /// # Arguments
+    ///
+    /// * `name` - Name of the template.
+    pub(crate) fn remove(&mut self, name: &str) {
+        if let Some(entry) = self.entries.remove(name) {
+            self.order.remove(&entry.tick);
+            self.stats.entries -= 1;
+            self.stats.bytes -= entry.bytes;
+        }
+    }
+
+    /// Counts a compilation answered by an already compiled template.
+    pub(crate) fn record_hit(&mut self) {
+        self.stats.hits += 1;
+    }
+
+    /// Counts a compilation that had to parse the template.
+    pub(crate) fn record_miss(&mut self) {
+        self.stats.misses += 1;
+    }
+
+    fn is_over_capacity(&self) -> bool {
+        self.max_entries.is_some_and(|max| self.stats.entries > max)
+            || self.max_bytes.is_some_and(|max| self.stats.bytes > max)
+    }
+
+    /// Stops tracking least recently used templates until the rest fit.
+    fn evict(&mut self, keep: Option<&str>) -> Vec<String> {
+        let mut evicted = Vec::new();
+        while self.is_over_capacity() {
+            let Some(name) = self
+                .order
+                .values()
+                .find(|name| Some(name.as_str()) != keep)
+                .cloned()
+            else {
+                break;
+            };
+            self.remove(&name);
+            self.stats.evictions += 1;
+            evicted.push(name);
+        }
+        evicted
+    }
+}
+
+#[cfg(test)]
+mod lru_tests {
+    use super::*;
+
+    fn bounded(max_entries: Option<usize>, max_bytes: Option<usize>) -> Lru {
+        let mut lru = Lru::default();
+        lru.set_capacity(max_entries, max_bytes);
+        lru
+    }
+
+    #[test]
+    fn with_entry_limit_returns_least_recently_used() {
+        let mut lru = bounded(Some(2), None);
+
+        assert!(lru.insert("a", 1).is_empty());
+        assert!(lru.insert("b", 1).is_empty());
+        lru.touch("a");
+
+        assert_eq!(lru.insert("c", 1), ["b"]);
+        assert_eq!(lru.insert("d", 1), ["a"]);
+        assert_eq!(lru.stats().evictions, 2);
+        assert_eq!(lru.stats().entries, 2);
+    }
+
+    #[test]
+    fn with_byte_limit_keeps_inserted_template() {
+        let mut lru = bounded(None, Some(10));
+        lru.insert("a", 4);
+        lru.insert("b", 4);
+
+        assert_eq!(lru.insert("big", 20), ["a", "b"]);
+        assert_eq!(lru.stats().bytes, 20);
+    }
+
+    #[test]
+    fn with_removed_template_returns_nothing_for_it() {
+        let mut lru = bounded(Some(1), None);
+        lru.insert("a", 1);
+        lru.remove("a");
+        lru.touch("a");
+
+        assert!(lru.insert("b", 1).is_empty());
+        assert_eq!(lru.stats().entries, 1);
+        assert_eq!(lru.stats().evictions, 0);
+    }
+
+    #[test]
+    fn with_smaller_capacity_returns_overflow() {
+        let mut lru = Lru::default();
+        for name in ["a", "b", "c"] {
+            lru.insert(name, 1);
+        }
+
+        assert!(!lru.is_bounded());
+        assert_eq!(lru.set_capacity(Some(1), None), ["a", "b"]);
+        assert!(lru.is_bounded());
+    }
+}
@@ -0,0 +1,145 @@
+// Copyright 2025 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+//
+// SPDX-License-Identifier: Apache-2.0
+
+//! Rendering output delivered in bounded chunks.
+
+use handlebars::Output;
+use std::io;
+
+/// `Output` that hands the rendered text to a sink in chunks.
+///
+/// Chunks end on character boundaries and hold at most `chunk_size` bytes,
+/// unless a single character is larger. Large segments, such as a long
+/// document inserted by one expression, are split as well, so the output is
+/// never buffered as a whole.
+pub(crate) struct ChunkedOutput<F> {
+    sink: F,
+    buffer: String,
+    chunk_size: usize,
+}
+
+impl<F: FnMut(&str) -> io::Result<()>> ChunkedOutput<F> {
+    /// Creates an output passing chunks of up to `chunk_size` bytes to `sink`.
+    ///
+    /// # Arguments
+    ///
+    /// * `chunk_size` - Maximum chunk size in bytes; at least 1 is used.
+    /// * `sink` - Called with every chunk, in order.
+    pub(crate) fn new(chunk_size: usize, sink: F) -> Self {
+        let chunk_size = chunk_size.max(1);
+        Self {
+            sink,
+            buffer: String::with_capacity(chunk_size),
+            chunk_size,
+        }
+    }
+
+    /// Passes any buffered text to the sink.
+    ///
+    /// # Errors
+    ///
+    /// The error returned by the sink.
+    pub(crate) fn flush(&mut self) -> io::Result<()> {
+        if self.buffer.is_empty() {
+            return Ok(());
+        }
+        let result = (self.sink)(&self.buffer);
+        self.buffer.clear();
+        result
+    }
+}
+
+impl<F: FnMut(&str) -> io::Result<()>> Output for ChunkedOutput<F> {
+    fn write(&mut self, mut seg: &str) -> io::Result<()> {
+        while !seg.is_empty() {
+            let room = self.chunk_size.saturating_sub(self.buffer.len());
+            if seg.len() <= room {
+                self.buffer.push_str(seg);
+                break;
+            }
+
+            let mut end = room;
+            while !seg.is_char_boundary(end) {
+                end -= 1;
+            }
+            if end == 0 && self.buffer.is_empty() {
+                // The next character alone exceeds the chunk size.
+                end = seg.chars().next().map_or(seg.len(), char::len_utf8);
+            }
+            self.buffer.push_str(&seg[..end]);
+            seg = &seg[end..];
+            self.flush()?;
+        }
+        if self.buffer.len() >= self.chunk_size {
+            self.flush()?;
+        }
+        Ok(())
+    }
+}
+
+#[cfg(test)]
+mod chunked_output_tests {
+    use super::*;
+
+    fn chunks(chunk_size: usize, segments: &[&str]) -> Vec<String> {
+        let mut chunks = Vec::new();
+        let mut out = ChunkedOutput::new(chunk_size, |chunk: &str| {
+            chunks.push(chunk.to_string());
+            Ok(())
+        });
+        for seg in segments {
+            out.write(seg).unwrap();
+        }
+        out.flush().unwrap();
+        drop(out);
+        chunks
+    }
+
+    #[test]
+    fn with_small_segments_joins_them() {
+        assert_eq!(chunks(4, &["a", "b", "cd", "e"]), ["abcd", "e"]);
+    }
+
+    #[test]
+    fn with_large_segment_splits_it() {
+        assert_eq!(chunks(3, &["x", "abcdefg"]), ["xab", "cde", "fg"]);
+    }
+
+    #[test]
+    fn with_multibyte_characters_keeps_them_whole() {
+        let chunks = chunks(4, &["aé€b"]);
+
+        assert_eq!(chunks.concat(), "aé€b");
+        assert_eq!(chunks, ["aé", "€b"]);
+    }
+
+    #[test]
+    fn with_character_larger_than_chunk_emits_it_alone() {
+        assert_eq!(chunks(1, &["a€b"]), ["a", "€", "b"]);
+    }
+
+    #[test]
+    fn with_no_output_emits_nothing() {
+        assert!(chunks(4, &["", ""]).is_empty());
+    }
+
+    #[test]
+    fn with_failing_sink_returns_error() {
+        let mut out = ChunkedOutput::new(2, |_: &str| Err(io::Error::other("closed")));
+
+        assert!(out.write("abc").is_err());
+    }
+}
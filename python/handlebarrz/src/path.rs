@@ -0,0 +1,111 @@
+// Copyright 2025 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+//
+// SPDX-License-Identifier: Apache-2.0
+
+//! Resolution of dotted paths within JSON values.
+
+use serde_json::Value;
+
+/// Resolves a dotted path such as `user.addresses.0.city` within a value.
+///
+/// Segments are separated by `.` and may be wrapped in square brackets
+/// (`items.[0]`, `[first name]`) like Handlebars path segments. Numeric
+/// segments index into arrays. An empty path, `this` or `.` refers to the
+/// value itself.
+///
+/// # Arguments
+///
+/// * `value` - The value to resolve the path in.
+/// * `path` - The dotted path.
+///
+/// # Returns
+///
+/// The value at the path, or `None` if any segment does not exist.
+pub(crate) fn lookup<'a>(value: &'a Value, path: &str) -> Option<&'a Value> {
+    let path = path.trim();
+    if path.is_empty() || path == "this" || path == "." {
+        return Some(value);
+    }
+    let path = path.strip_prefix("this.").unwrap_or(path);
+
+    segments(path).try_fold(value, |current, segment| match current {
+        Value::Object(map) => map.get(segment),
+        Value::Array(items) => segment.parse::<usize>().ok().and_then(|i| items.get(i)),
+        _ => None,
+    })
+}
+
+/// Splits a path into segments, keeping dots inside `[...]` segments.
+fn segments(path: &str) -> impl Iterator<Item = &str> {
+    let mut rest = path;
+    std::iter::from_fn(move || {
+        if rest.is_empty() {
+            return None;
+        }
+        let (segment, remainder) = match rest.strip_prefix('[') {
+            Some(bracketed) => match bracketed.find(']') {
+                Some(end) => (&bracketed[..end], &bracketed[end + 1..]),
+                None => (bracketed, ""),
+            },
+            None => match rest.find('.') {
+                Some(end) => (&rest[..end], &rest[end..]),
+                None => (rest, ""),
+            },
+        };
+        rest = remainder.strip_prefix('.').unwrap_or(remainder);
+        Some(segment)
+    })
+}
+
+#[cfg(test)]
+mod lookup_tests {
+    use super::*;
+    use serde_json::json;
+
+    #[test]
+    fn with_nested_path_returns_value() {
+        let value = json!({"user": {"name": "Ada", "tags": ["a", "b"]}});
+
+        assert_eq!(lookup(&value, "user.name"), Some(&json!("Ada")));
+        assert_eq!(lookup(&value, "user.tags.1"), Some(&json!("b")));
+        assert_eq!(lookup(&value, "user.tags.[0]"), Some(&json!("a")));
+    }
+
+    #[test]
+    fn with_bracketed_segment_keeps_dots() {
+        let value = json!({"a.b": {"c d": 1}});
+
+        assert_eq!(lookup(&value, "[a.b].[c d]"), Some(&json!(1)));
+    }
+
+    #[test]
+    fn with_this_returns_value() {
+        let value = json!({"x": 1});
+
+        assert_eq!(lookup(&value, ""), Some(&value));
+        assert_eq!(lookup(&value, "this"), Some(&value));
+        assert_eq!(lookup(&value, "this.x"), Some(&json!(1)));
+    }
+
+    #[test]
+    fn with_missing_path_returns_none() {
+        let value = json!({"user": {"tags": ["a"]}, "n": 1});
+
+        assert_eq!(lookup(&value, "user.email"), None);
+        assert_eq!(lookup(&value, "user.tags.3"), None);
+        assert_eq!(lookup(&value, "user.tags.first"), None);
+        assert_eq!(lookup(&value, "n.value"), None);
+    }
+}
@@ -0,0 +1,228 @@
+// Copyright 2025 Google LLC
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+//
+// SPDX-License-Identifier: Apache-2.0
+
+//! Versioned snapshots of a template registry.
+//!
+//! handlebars-rust does not expose a serializable form of its parsed
+//! templates, so a snapshot records what was registered: the template and
+//! partial sources, the template files, the native helper sets and the
+//! settings. Python helpers are recorded by name only and bound again when
+//! the snapshot is loaded.
+//!
+//! The encoding is a 4 byte magic, a little endian `u32` format version and
+//! the JSON encoded `Snapshot`.
+
+use crate::budget::Budget;
+use serde::{Deserialize, Serialize};
+use std::collections::{BTreeMap, BTreeSet};
+
+/// Magic bytes at the start of every snapshot.
+const MAGIC: &[u8; 4] = b"HBRZ";
+
+/// Version of the snapshot format written by `encode`.
+pub(crate) const VERSION: u32 = 1;
+
+/// Everything registered in a registry, in the form it was registered.
+#[derive(Clone, Debug, PartialEq, Serialize, Deserialize)]
+pub(crate) struct Registrations {
+    /// Sources of templates and partials registered from strings, by name.
+    pub(crate) sources: BTreeMap<String, String>,
+    /// Paths of templates registered from files, by name.
+    pub(crate) files: BTreeMap<String, String>,
+    /// Names of the templates registered as partials.
+    pub(crate) partials: BTreeSet<String>,
+    /// Name of the escape function.
+    pub(crate) escape_fn: String,
+    /// Whether `register_extra_helpers` was called.
+    pub(crate) extra_helpers: bool,
+    /// Whether `register_dotprompt_helpers` was called.
+    pub(crate) dotprompt_helpers: bool,
+}
+
+impl Default for Registrations {
+    fn default() -> Self {
+        Self {
+            sources: BTreeMap::new(),
+            files: BTreeMap::new(),
+            partials: BTreeSet::new(),
+            escape_fn: "html_escape".to_string(),
+            extra_helpers: false,
+            dotprompt_helpers: false,
+        }
+    }
+}
+
+impl Registrations {
+    /// Records a template registered from a string.
+    ///
+    /// # Arguments
+    ///
+    /// * `name` - The name of the template.
+    /// * `source` - The template source.
+    /// * `partial` - Whether the template was registered as a partial.
+    pub(crate) fn add_source(&mut self, name: &str, source: &str, partial: bool) {
+        self.remove(name);
+        self.sources.insert(name.to_string(), source.to_string());
+        if partial {
+            self.partials.insert(name.to_string());
+        }
+    }
+
+    /// Records a template registered from a file.
+    ///
+    /// # Arguments
+    ///
+    /// * `name` - The name of the template.
+    /// * `path` - The path of the template file.
+    pub(crate) fn add_file(&mut self, name: &str, path: &str) {
+        self.remove(name);
+        self.files.insert(name.to_string(), path.to_string());
+    }
+
+    /// Forgets an unregistered template.
+    ///
+    /// # Arguments
+    ///
+    /// * `name` - The name of the template.
+    pub(crate) fn remove(&mut self, name: &str) {
+        self.sources.remove(name);
+        self.files.remove(name);
+        self.partials.remove(name);
+    }
+}
+
+/// A snapshot of a registry.
+#[derive(Clone, Debug, PartialEq, Serialize, Deserialize)]
+pub(crate) struct Snapshot {
+    pub(crate) registrations: Registrations,
+    /// Names of the Python helpers, which must be provided on load.
+    pub(crate) py_helpers: BTreeSet<String>,
+    pub(crate) strict_mode: bool,
+    pub(crate) dev_mode: bool,
+    /// Number of templates compiled so far, used to name the next one.
+    pub(crate) next_compiled_id: usize,
+    /// Limits of each render; absent from snapshots written before they
+    /// existed.
+    #[serde(default)]
+    pub(crate) budget: Budget,
+}
+
+/// Encodes a snapshot.
+///
+/// # Arguments
+///
+/// * `snapshot` - The snapshot to encode.
+///
+/// # Returns
+///
+/// The encoded snapshot.
+pub(crate) fn encode(snapshot: &Snapshot) -> Vec<u8> {
+    let mut bytes = Vec::with_capacity(1024);
+    bytes.extend_from_slice(MAGIC);
+    bytes.extend_from_slice(&VERSION.to_le_bytes());
+    // Serializing plain maps, sets and strings cannot fail.
+    serde_json::to_writer(&mut bytes, snapshot).expect("snapshot is serializable");
+    bytes
+}
+
+/// Decodes a snapshot produced by `encode`.
+///
+/// # Arguments
+///
+/// * `bytes` - The encoded snapshot.
+///
+/// # Returns
+///
+/// The snapshot.
+///
+/// # Errors
+///
+/// A description of the problem if the bytes are not a snapshot or were
+/// written by an unsupported version.
+pub(crate) fn decode(bytes: &[u8]) -> Result<Snapshot, String> {
+    let Some(body) = bytes.strip_prefix(MAGIC) else {
+        return Err("Not a handlebarrz snapshot".to_string());
+    };
+    let Some((version, body)) = body.split_first_chunk::<4>() else {
+        return Err("Truncated handlebarrz snapshot".to_string());
+    };
+    let version = u32::from_le_bytes(*version);
+    if version != VERSION {
+        return Err(format!(
+            "Unsupported snapshot version {version}, expected {VERSION}"
+        ));
+    }
+    serde_json::from_slice(body).map_err(|e| format!("Corrupt handlebarrz snapshot: {e}"))
+}
+
+#[cfg(test)]
+mod snapshot_tests {
+    use super::*;
+
+    fn snapshot() -> Snapshot {
+        let mut registrations = Registrations::default();
+        registrations.add_source("page", "{{> header}}{{body}}", false);
+        registrations.add_source("header", "<h1>{{title}}</h1>", true);
+        registrations.add_file("footer", "templates/footer.hbs");
+        registrations.dotprompt_helpers = true;
+
+        Snapshot {
+            registrations,
+            py_helpers: BTreeSet::from(["shout".to_string()]),
+            strict_mode: true,
+            dev_mode: false,
+            next_compiled_id: 3,
+            budget: Budget {
+                max_iterations: Some(10),
+                ..Budget::default()
+            },
+        }
+    }
+
+    #[test]
+    fn with_encoded_snapshot_returns_same_snapshot() {
+        assert_eq!(decode(&encode(&snapshot())), Ok(snapshot()));
+    }
+
+    #[test]
+    fn with_reregistered_name_returns_latest_registration() {
+        let mut registrations = Registrations::default();
+        registrations.add_source("t", "a", true);
+        registrations.add_file("t", "t.hbs");
+
+        assert!(registrations.sources.is_empty());
+        assert!(registrations.partials.is_empty());
+        assert_eq!(
+            registrations.files.get("t").map(String::as_str),
+            Some("t.hbs")
+        );
+    }
+
+    #[test]
+    fn with_other_bytes_returns_error() {
+        assert!(decode(b"").is_err());
+        assert!(decode(b"HBRZ\x01").is_err());
+        assert!(decode(b"HBRZ\x01\x00\x00\x00{").is_err());
+    }
+
+    #[test]
+    fn with_other_version_returns_error() {
+        let mut bytes = encode(&snapshot());
+        bytes[4] = 99;
+
+        assert!(decode(&bytes).unwrap_err().contains("version 99"));
+    }
+}
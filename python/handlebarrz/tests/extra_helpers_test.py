@@ -194,5 +194,58 @@ class TestJsonHelper(unittest.TestCase):
         self.assertEqual(result, '{}')
 
 
+class TestDotpromptHelpers(unittest.TestCase):
+    """Test the native Dotprompt helpers."""
+
+    def setUp(self) -> None:
+        """Set up the test."""
+        self.template = Template()
+        self.template.register_dotprompt_helpers()
+
+    def render(self, source: str, data: dict[str, Any] | None = None) -> str:
+        """Render a template string with the test template engine."""
+        return self.template.render_template(source, data or {})
+
+    def test_marker_helpers(self) -> None:
+        """Test the role, history and section markers."""
+        self.assertEqual(self.render('{{role "system"}}'), '<<<dotprompt:role:system>>>')
+        self.assertEqual(self.render('{{history}}'), '<<<dotprompt:history>>>')
+        self.assertEqual(self.render('{{section "intro"}}'), '<<<dotprompt:section intro>>>')
+
+    def test_media_helper(self) -> None:
+        """Test the media marker with and without a content type."""
+        data = {'url': 'https://a/b.png', 'type': 'image/png'}
+
+        self.assertEqual(
+            self.render('{{media url=url contentType=type}}', data),
+            '<<<dotprompt:media:url https://a/b.png image/png>>>',
+        )
+        self.assertEqual(self.render('{{media url=url}}', data), '<<<dotprompt:media:url https://a/b.png>>>')
+        self.assertEqual(self.render('{{media url=missing}}', data), '')
+
+    def test_if_equals_is_strict(self) -> None:
+        """Test that ifEquals does not coerce between types."""
+        source = '{{#ifEquals a b}}yes{{else}}no{{/ifEquals}}'
+
+        self.assertEqual(self.render(source, {'a': 5, 'b': 5}), 'yes')
+        self.assertEqual(self.render(source, {'a': 5, 'b': '5'}), 'no')
+        self.assertEqual(self.render(source, {'a': None, 'b': 0}), 'no')
+        self.assertEqual(self.render(source, {'a': True, 'b': 1}), 'no')
+
+    def test_json_indent(self) -> None:
+        """Test that the json indent argument sets the indent width."""
+        data = {'value': {'test': True}}
+
+        self.assertEqual(self.render('{{json value}}', data), '{"test":true}')
+        self.assertEqual(self.render('{{json value indent=2}}', data), '{\n  "test": true\n}')
+        self.assertEqual(self.render('{{json value indent=4}}', data), '{\n    "test": true\n}')
+
+    def test_python_helper_overrides_native_helper(self) -> None:
+        """Test that a helper registered later replaces the native one."""
+        self.template.register_helper('role', lambda params, options: f'[{params[0]}]')
+
+        self.assertEqual(self.render('{{role "user"}}'), '[user]')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -14,7 +14,10 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
+import json
 import unittest
+from collections.abc import Sequence
+from typing import Any
 
 from handlebarrz import HelperOptions, Template
 
@@ -214,3 +217,119 @@ class HelpersTest(unittest.TestCase):
             "<script>alert('test');</script>",
             result_helper,
         )
+
+    def test_helper_receives_native_params(self) -> None:
+        """Test that helper params arrive as native Python values."""
+        template = Template()
+        received: list[Any] = []
+
+        def capture_helper(params: Sequence[Any], options: HelperOptions) -> str:
+            """Test helper that records its params."""
+            received.extend(params)
+            return ''
+
+        template.register_helper('capture', capture_helper)
+        template.register_template('capture-test', '{{capture doc 3 "x" true null}}')
+
+        template.render('capture-test', {'doc': {'title': 'T', 'tags': ['a', 'b'], 'score': 1.5}})
+
+        self.assertEqual(received, [{'title': 'T', 'tags': ['a', 'b'], 'score': 1.5}, 3, 'x', True, None])
+
+    def test_helper_params_sequence(self) -> None:
+        """Test that helper params support indexing, slicing and len."""
+        template = Template()
+        seen: dict[str, Any] = {}
+
+        def inspect_helper(params: Sequence[Any], options: HelperOptions) -> str:
+            """Test helper that records how its params look."""
+            seen['len'] = len(params)
+            seen['last'] = params[-1]
+            seen['slice'] = params[1:]
+            seen['equal'] = params == ['a', 2, 'c']
+            return ''
+
+        template.register_helper('inspect', inspect_helper)
+        template.register_template('inspect-test', '{{inspect "a" 2 "c"}}')
+
+        template.render('inspect-test', {})
+
+        self.assertEqual(seen, {'len': 3, 'last': 'c', 'slice': [2, 'c'], 'equal': True})
+
+    def test_helper_params_converted_to_list(self) -> None:
+        """Test that converted helper params support list operations."""
+        template = Template()
+        kept: list[Any] = []
+
+        def dump_helper(params: Sequence[Any], options: HelperOptions) -> str:
+            """Test helper that keeps and serializes its params as a list."""
+            values = list(params)
+            kept.append(values)
+            return json.dumps(values + [options.hash()])
+
+        template.register_helper('dump', dump_helper)
+        template.register_template('dump-test', '{{{dump "a" 2 flag=true}}}')
+
+        self.assertEqual(template.render('dump-test', {}), '["a", 2, {"flag": true}]')
+        self.assertEqual(kept, [['a', 2]])
+
+    def test_helper_hash(self) -> None:
+        """Test fetching all hash arguments at once."""
+        template = Template()
+        seen: list[Any] = []
+
+        def hash_helper(params: Sequence[Any], options: HelperOptions) -> str:
+            """Test helper that records its hash arguments."""
+            seen.append(options.hash())
+            seen.append(options.hash_value('missing'))
+            return ''
+
+        template.register_helper('hash', hash_helper)
+        template.register_template('hash-test', '{{hash a=1 b=name c=(hash)}}')
+
+        template.render('hash-test', {'name': {'first': 'Ada'}})
+
+        self.assertEqual(seen[2:], [{'a': 1, 'b': {'first': 'Ada'}, 'c': ''}, ''])
+
+    def test_helper_options_expire_after_call(self) -> None:
+        """Test that helper params and options cannot be used after the call."""
+        template = Template()
+        kept: list[Any] = []
+
+        def keep_helper(params: Sequence[Any], options: HelperOptions) -> str:
+            """Test helper that leaks its params and options."""
+            kept.extend([params, options])
+            return ''
+
+        template.register_helper('keep', keep_helper)
+        template.register_template('keep-test', '{{keep 1}}')
+        template.render('keep-test', {})
+
+        params, options = kept
+        with self.assertRaises(RuntimeError):
+            params[0]
+        with self.assertRaises(RuntimeError):
+            options.hash()
+
+    def test_helper_context_lookup(self) -> None:
+        """Test reading single fields of the context by path."""
+        template = Template()
+        seen: list[Any] = []
+
+        def lookup_helper(params: Sequence[Any], options: HelperOptions) -> str:
+            """Test helper that looks up context fields."""
+            seen.extend([
+                options.lookup('user.name'),
+                options.lookup('user.tags.1'),
+                options.lookup('user.missing'),
+                options.lookup('[odd.key]'),
+            ])
+            return str(options.lookup('user.name'))
+
+        template.register_helper('lookup_name', lookup_helper)
+        template.register_template('lookup-test', 'Hi {{lookup_name}}')
+
+        data = {'user': {'name': 'Ada', 'tags': ['x', {'y': 1}]}, 'odd.key': True, 'doc': 'long ' * 1000}
+        result = template.render('lookup-test', data)
+
+        self.assertEqual(result, 'Hi Ada')
+        self.assertEqual(seen, ['Ada', {'y': 1}, None, True])